@@ -0,0 +1,312 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+import Strategy
+from Strategy import calculate_entry_price, calculate_initial_sl, calculate_levels, ENTRY_OFFSET
+from CandleArchive import CandleArchive, to_epoch_seconds
+from TradingSchedule import parse_hhmm
+
+IST_OFFSET_SECONDS = 19800
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+TRADE_COLUMNS = [
+    'day', 'direction', 'signal_time', 'SCH', 'SCL', 'entry_level', 'entry_time', 'entry_price',
+    'exit_time', 'exit_reason', 'final_state', 'lots', 'points', 'pnl',
+]
+
+
+def load_candles(symbol, timeframe, archive=None):
+    """
+    Load candles for a symbol as a dict of NumPy arrays (ts, open, high, low, close, volume).
+    Reads the Parquet archive first and falls back to the legacy data/<SYMBOL>.csv snapshot.
+    """
+    symbol = symbol.split(':')[-1]
+    archive = archive or CandleArchive()
+    bars = archive.read(symbol, timeframe)
+    if bars.height:
+        return {
+            'ts': bars['date'].dt.epoch('s').to_numpy(),
+            'open': bars['open'].to_numpy(),
+            'high': bars['high'].to_numpy(),
+            'low': bars['low'].to_numpy(),
+            'close': bars['close'].to_numpy(),
+            'volume': bars['volume'].to_numpy(),
+        }
+
+    csv_path = os.path.join(DATA_DIR, f"{symbol}.csv")
+    df = pd.read_csv(csv_path)
+    return {
+        'ts': to_epoch_seconds(df['date']),
+        'open': df['open'].to_numpy(dtype=np.float64),
+        'high': df['high'].to_numpy(dtype=np.float64),
+        'low': df['low'].to_numpy(dtype=np.float64),
+        'close': df['close'].to_numpy(dtype=np.float64),
+        'volume': df['volume'].to_numpy(dtype=np.float64),
+    }
+
+
+def find_signals(candles, timeframe, start_time, stop_time):
+    """
+    Vectorised version of the check_signal_for_symbol pattern rules over a whole history.
+
+    A bar is a signal candle when, compared with the previous bar:
+      BUY:  green, high < prev high, low < prev low
+      SELL: red,   high > prev high, low > prev low
+    and the candle check that would see it (bar start + timeframe) falls inside StartTime-StopTime
+    (both inclusive, as in RowSchedule.in_window).
+    Only the first signal of each day is kept (one trade per day).
+
+    Returns:
+        (signal_index, direction) arrays; direction is +1 for BUY, -1 for SELL
+    """
+    ts, o, h, l, c = candles['ts'], candles['open'], candles['high'], candles['low'], candles['close']
+    start_s, stop_s = parse_hhmm(start_time), parse_hhmm(stop_time)
+    if start_s > stop_s:
+        raise ValueError("Overnight StartTime/StopTime windows are not supported by the backtester")
+
+    prev_h = np.roll(h, 1)
+    prev_l = np.roll(l, 1)
+    buy = (c > o) & (h < prev_h) & (l < prev_l)
+    sell = (c < o) & (h > prev_h) & (l > prev_l)
+    buy[0] = sell[0] = False
+
+    check_time = ts + timeframe * 60
+    check_sod = (check_time + IST_OFFSET_SECONDS) % 86400
+    same_day = (check_time + IST_OFFSET_SECONDS) // 86400 == (ts + IST_OFFSET_SECONDS) // 86400
+    in_window = same_day & (check_sod >= start_s) & (check_sod <= stop_s)
+
+    candidates = np.flatnonzero((buy | sell) & in_window)
+    if len(candidates) == 0:
+        return candidates, candidates
+
+    days = (ts[candidates] + IST_OFFSET_SECONDS) // 86400
+    first_of_day = np.concatenate(([True], days[1:] != days[:-1]))
+    signal_index = candidates[first_of_day]
+    direction = np.where(buy[signal_index], 1, -1)
+    return signal_index, direction
+
+
+def first_true(mask):
+    """Index of the first True in mask, or -1."""
+    index = int(np.argmax(mask))
+    return index if mask.size and mask[index] else -1
+
+
+def simulate_day(candles, signal_index, direction, params, day_end, stop_index):
+    """
+    Simulate entry and the T1-T4 / SL ladder of monitor_entry_exit for one signal, using bar
+    high/low as the tick range. When a stop and a target fall in the same bar the stop wins,
+    and at most one ladder step is taken per bar.
+
+    Returns:
+        dict with the trade fields (see TRADE_COLUMNS)
+    """
+    ts, o, h, l, c = candles['ts'], candles['open'], candles['high'], candles['low'], candles['close']
+    market_type = params.get('Market') or 'IO'
+    dir_name = 'BUY' if direction == 1 else 'SELL'
+    signal_value = h[signal_index] if direction == 1 else l[signal_index]
+
+    entry_offset = params.get('EntryOffset', ENTRY_OFFSET)
+    entry_level = calculate_entry_price(signal_value, dir_name, market_type, entry_offset)
+    initial_sl = calculate_initial_sl(l[signal_index], h[signal_index], dir_name, market_type, entry_offset)
+
+    trade = {
+        'day': pd.Timestamp(ts[signal_index], unit='s', tz='UTC').tz_convert('Asia/Kolkata').date(),
+        'direction': dir_name,
+        'signal_time': ts[signal_index],
+        'SCH': float(signal_value),
+        'SCL': float(l[signal_index] if direction == 1 else h[signal_index]),
+        'entry_level': float(entry_level),
+        'entry_time': None, 'entry_price': np.nan, 'exit_time': None,
+        'exit_reason': 'no_entry', 'final_state': 'expired_stoptime',
+        'lots': 0, 'points': 0.0, 'pnl': 0.0,
+    }
+
+    # Entry: first bar after the signal check (before StopTime) whose range reaches the entry price
+    first_bar = signal_index + 1
+    window_h, window_l = h[first_bar:stop_index], l[first_bar:stop_index]
+    hit = first_true(window_h >= entry_level) if direction == 1 else first_true(window_l <= entry_level)
+    entry_lots = int(params.get('EntryLots', 0))
+    if hit < 0 or entry_lots <= 0:
+        return trade
+
+    entry_bar = first_bar + hit
+    # A gap through the entry level fills at the open
+    fill = max(o[entry_bar], entry_level) if direction == 1 else min(o[entry_bar], entry_level)
+    levels = calculate_levels(
+        fill, dir_name,
+        params.get('T1Percent', 1.0), params.get('T2Percent', 1.0),
+        params.get('T3Percent', 1.0), params.get('T4Percent', 1.0),
+        params.get('SL1Points', 0), params.get('Sl2Points', 0),
+        params.get('Sl3Points', 0), params.get('Sl4Points', 0),
+    )
+
+    # (stop, target, lots exited at target, state after target) per ladder step, as in monitor_entry_exit
+    ladder = [
+        (initial_sl, levels['T1'], int(params.get('Tgt1Lots', 0)), 't1_hit', 'exited_sl1'),
+        (levels['SL2'], levels['T2'], int(params.get('Tgt2Lots', 0)), 't2_hit', 'exited_sl2'),
+        (levels['SL3'], levels['T3'], int(params.get('Tgt3Lots', 0)), 't3_hit', 'exited_sl3'),
+        (levels['SL4'], levels['T4'], None, 't4_hit', 'exited_sl4'),
+    ]
+
+    remaining = entry_lots
+    pnl = 0.0
+    state = 'in_position'
+    bar = entry_bar + 1
+    exit_time = None
+    exit_reason = None
+
+    for stop, target, target_lots, target_state, stop_state in ladder:
+        # While the target cannot be exited (lots not configured) only the stop stays active
+        target_active = target_lots is None or (target_lots > 0 and remaining >= target_lots)
+        seg_h, seg_l = h[bar:stop_index], l[bar:stop_index]
+        if direction == 1:
+            stop_hit = first_true(seg_l <= stop)
+            target_hit = first_true(seg_h >= target) if target_active else -1
+        else:
+            stop_hit = first_true(seg_h >= stop)
+            target_hit = first_true(seg_l <= target) if target_active else -1
+
+        if stop_hit >= 0 and (target_hit < 0 or stop_hit <= target_hit):
+            k = bar + stop_hit
+            price = min(o[k], stop) if direction == 1 else max(o[k], stop)
+            pnl += (price - fill) * direction * remaining
+            remaining = 0
+            state, exit_time, exit_reason = stop_state, ts[k], stop_state
+            break
+        if target_hit < 0:
+            break
+
+        k = bar + target_hit
+        price = max(o[k], target) if direction == 1 else min(o[k], target)
+        lots = remaining if target_lots is None else target_lots
+        pnl += (price - fill) * direction * lots
+        remaining -= lots
+        state, exit_time, exit_reason = target_state, ts[k], target_state
+        bar = k + 1
+        if remaining <= 0:
+            break
+
+    if remaining > 0:
+        # StopTime square-off at the first bar at/after StopTime, else at the last close of the day
+        if stop_index < day_end:
+            price, exit_time = o[stop_index], ts[stop_index]
+        else:
+            price, exit_time = c[day_end - 1], ts[day_end - 1]
+        pnl += (price - fill) * direction * remaining
+        state, exit_reason = 'squared_off_stoptime', 'squared_off_stoptime'
+
+    trade.update({
+        'entry_time': ts[entry_bar],
+        'entry_price': float(fill),
+        'exit_time': exit_time,
+        'exit_reason': exit_reason,
+        'final_state': state,
+        'lots': entry_lots,
+        'points': pnl / entry_lots,
+        'pnl': pnl,
+    })
+    return trade
+
+
+def prepare_signals(candles, params):
+    """
+    Signal bars plus each one's day end / StopTime bar index. These only depend on
+    Timeframe, StartTime and StopTime, so a parameter sweep can compute them once.
+
+    Returns:
+        list of (signal_index, direction, day_end, stop_index)
+    """
+    timeframe = int(params['Timeframe'])
+    stop_s = parse_hhmm(params['StopTime'])
+    ts = candles['ts']
+    signal_index, direction = find_signals(candles, timeframe, params['StartTime'], params['StopTime'])
+
+    # Day boundaries and first bar at/after StopTime for every signal's day (vectorised)
+    day = (ts + IST_OFFSET_SECONDS) // 86400
+    day_end = np.searchsorted(day, day[signal_index], side='right')
+    stop_ts = day[signal_index] * 86400 - IST_OFFSET_SECONDS + stop_s
+    stop_index = np.searchsorted(ts, stop_ts, side='left')
+    return list(zip(signal_index.tolist(), direction.tolist(), day_end.tolist(), stop_index.tolist()))
+
+
+def run_backtest(candles, params, signals=None):
+    """
+    Backtest one TradeSettings row over a candle history.
+
+    Args:
+        candles: dict of NumPy arrays from load_candles()
+        params: TradeSettings row as in Strategy.result_dict (Timeframe, EntryLots, levels, StartTime, StopTime, Market)
+        signals: optional prepare_signals() result for the same candles/timeframe/window
+
+    Returns:
+        (trades DataFrame, stats dict)
+    """
+    if signals is None:
+        signals = prepare_signals(candles, params)
+
+    trades = [
+        simulate_day(candles, i, d, params, day_end, stop_index)
+        for i, d, day_end, stop_index in signals
+    ]
+    trades = pd.DataFrame(trades, columns=TRADE_COLUMNS)
+    for column in ('signal_time', 'entry_time', 'exit_time'):
+        trades[column] = pd.to_datetime(trades[column], unit='s', utc=True).dt.tz_convert('Asia/Kolkata')
+    return trades, summarize(trades)
+
+
+def summarize(trades):
+    """Aggregate stats of a trades frame from run_backtest()."""
+    taken = trades[trades['entry_time'].notna()]
+    return pnl_stats(taken['pnl'].to_numpy(dtype=np.float64), len(trades))
+
+
+def pnl_stats(pnl, signals):
+    """
+    Stats of the per-trade P&L of the trades actually entered, in date order.
+
+    Args:
+        pnl: NumPy array of trade P&L
+        signals: number of signal days (entered or not)
+    """
+    equity = np.cumsum(pnl)
+    drawdown = (np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:] - equity) if len(pnl) else np.zeros(0)
+    gains = pnl[pnl > 0].sum()
+    losses = -pnl[pnl < 0].sum()
+    return {
+        'signals': int(signals),
+        'trades': int(len(pnl)),
+        'win_rate': float((pnl > 0).mean()) if len(pnl) else 0.0,
+        'total_pnl': float(pnl.sum()),
+        'avg_pnl': float(pnl.mean()) if len(pnl) else 0.0,
+        'max_drawdown': float(drawdown.max()) if len(drawdown) else 0.0,
+        'profit_factor': float(gains / losses) if losses > 0 else float('inf') if gains > 0 else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    # Backtest every TradeSettings.csv row (or only the symbols given on the command line)
+    Strategy.get_user_settings()
+    wanted = set(sys.argv[1:])
+    for unique_key, params in Strategy.result_dict.items():
+        if wanted and params['Symbol'] not in wanted:
+            continue
+        try:
+            candles = load_candles(params['Symbol'], params['Timeframe'])
+        except FileNotFoundError:
+            print(f"{params['Symbol']}: no archived candles or CSV snapshot, skipped")
+            continue
+
+        started = time.perf_counter()
+        trades, stats = run_backtest(candles, params)
+        elapsed = time.perf_counter() - started
+
+        print(f"\n{'='*85}")
+        print(f"{params['Symbol']} ({params['Timeframe']} min, {len(candles['ts'])} bars) - {elapsed * 1000:.1f} ms")
+        print(f"{'='*85}")
+        if len(trades):
+            print(trades[['day', 'direction', 'entry_price', 'exit_reason', 'points', 'pnl']].to_string(index=False))
+        print(" | ".join(f"{name}: {value:.2f}" if isinstance(value, float) else f"{name}: {value}" for name, value in stats.items()))
@@ -0,0 +1,286 @@
+import os
+import sys
+import io
+import gc
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from datetime import datetime
+import numpy as np
+import pytz
+
+import FyresIntegration
+import Strategy
+from LogWriter import BufferedLogWriter
+from CandleArchive import CandleArchive
+from Dashboard import build_snapshot, format_dashboard
+from FyersSimulator import synthetic_candles, symbol_base_price
+from LatencyTracker import LatencyTracker
+from PositionRecord import PositionRecord, PositionStatus
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+IST = pytz.timezone('Asia/Kolkata')
+
+
+class StubFyers:
+    """Offline stand-in for fyersModel.FyersModel with the calls the strategy makes."""
+
+    def __init__(self):
+        self.order_count = 0
+
+    def history(self, data):
+        if data.get("date_format") == "1":
+            range_from = int(IST.localize(datetime.strptime(data["range_from"], "%Y-%m-%d")).timestamp())
+            range_to = int(IST.localize(datetime.strptime(data["range_to"], "%Y-%m-%d")).timestamp()) + 86399
+        else:
+            range_from, range_to = int(data["range_from"]), int(data["range_to"])
+        range_to = min(range_to, int(time.time()))
+        return {"s": "ok", "candles": synthetic_candles(data["symbol"], data["resolution"], range_from, range_to)}
+
+    def quotes(self, data):
+        items = []
+        for symbol in data["symbols"].split(","):
+            ltp = symbol_base_price(symbol)
+            items.append({"n": symbol, "s": "ok", "v": {"lp": ltp, "bid": ltp - 0.05, "ask": ltp + 0.05, "volume": 1000}})
+        return {"s": "ok", "d": items}
+
+    def place_order(self, data):
+        self.order_count += 1
+        return {"s": "ok", "code": 1101, "id": f"BENCH{self.order_count}", "message": "Order submitted"}
+
+    def modify_order(self, data):
+        return {"s": "ok", "id": data.get("id")}
+
+    def orderbook(self):
+        return {"s": "ok", "orderBook": []}
+
+    def positions(self):
+        return {"s": "ok", "netPositions": []}
+
+    def get_profile(self):
+        return {"s": "ok", "data": {"name": "BENCH"}}
+
+
+def setup_rows(count, workdir):
+    """Load `count` synthetic TradeSettings rows (all-day trading window) into Strategy."""
+    csv_path = os.path.join(workdir, "TradeSettings.csv")
+    with open(csv_path, "w") as file:
+        file.write("Symbol,Timeframe,EntryLots,SL1Points,Sl2Points,Sl3Points,Sl4Points,Tgt1Lots,Tgt2Lots,"
+                   "Tgt3Lots,Tgt4Lots,T1Percent,T2Percent,T3Percent,T4Percent,StartTime,StopTime,Market\n")
+        for i in range(count):
+            timeframe = (1, 3, 5)[i % 3]
+            file.write(f"BENCH{i}-EQ,{timeframe},4,5,5,5,5,1,1,1,1,2,3,4,5,00:00,23:59,UL\n")
+
+    # get_user_settings reads TradeSettings.csv from the working directory
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            Strategy.get_user_settings()
+    finally:
+        os.chdir(cwd)
+    Strategy.positions_state = {}
+    Strategy.last_applied_ltp.clear()
+    FyresIntegration.shared_data.clear()
+    FyresIntegration.ohlc_cache.clear()
+    FyresIntegration.quote_cache.clear()
+
+
+def set_waiting_states():
+    """
+    Put every row into a signal state whose levels the benchmark LTPs never reach, so
+    monitor_entry_exit runs its full checks without placing orders: even rows wait for
+    entry, odd rows hold a position between SL and T1.
+    """
+    for i, (unique_key, params) in enumerate(Strategy.result_dict.items()):
+        ltp = 100.0
+        params['FyresLtp'] = ltp
+        record = PositionRecord()
+        record.state = PositionStatus.WAITING_ENTRY
+        record.direction = 'BUY'
+        record.market_type = 'UL'
+        record.entry = ltp + 50
+        record.initial_sl = ltp - 50
+        record.set_levels({'T1': ltp + 60, 'T2': ltp + 70, 'T3': ltp + 80, 'T4': ltp + 90,
+                           'SL1': ltp - 50, 'SL2': ltp - 50, 'SL3': ltp - 50, 'SL4': ltp - 50})
+        record.remaining_lots = params['EntryLots']
+        if i % 2:
+            record.state = PositionStatus.IN_POSITION
+            record.entry_price = ltp
+        Strategy.positions_state[unique_key] = record
+
+
+def percentile_summary(samples_ns):
+    samples = np.asarray(samples_ns, dtype=np.float64) / 1000.0
+    return {
+        'calls': int(len(samples)),
+        'mean_us': float(samples.mean()),
+        'p50_us': float(np.percentile(samples, 50)),
+        'p90_us': float(np.percentile(samples, 90)),
+        'p99_us': float(np.percentile(samples, 99)),
+        'max_us': float(samples.max()),
+    }
+
+
+def measure(call, prepare, samples, alloc_samples):
+    """
+    Time `samples` calls of call(i) with perf_counter_ns (prepare(i) runs untimed before each),
+    then repeat up to alloc_samples calls under tracemalloc for the allocation figures.
+    """
+    timings = []
+    gc.collect()
+    for i in range(samples):
+        prepare(i)
+        started = time.perf_counter_ns()
+        call(i)
+        timings.append(time.perf_counter_ns() - started)
+    stats = percentile_summary(timings)
+
+    peaks = []
+    retained = []
+    tracemalloc.start()
+    try:
+        for i in range(min(alloc_samples, samples)):
+            prepare(samples + i)
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            call(samples + i)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+    stats['alloc_peak_kib'] = float(np.mean(peaks) / 1024) if peaks else 0.0
+    stats['alloc_retained_kib'] = float(np.mean(retained) / 1024) if retained else 0.0
+    return stats
+
+
+def run_scenarios(row_counts, samples, alloc_samples):
+    """
+    Benchmark the strategy hot paths for each TradeSettings size.
+
+    Returns:
+        dict: "<function>[rows=N]" -> stats
+    """
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="strategy-bench-")
+    FyresIntegration.fyers = StubFyers()
+    Strategy.order_log_writer = BufferedLogWriter(os.path.join(workdir, "OrderLog.txt"))
+    Strategy.candle_archive = CandleArchive(os.path.join(workdir, "archive"))
+    Strategy.latency_tracker = LatencyTracker(os.path.join(workdir, "LatencyTrace.jsonl"))
+    devnull = open(os.devnull, "w")
+
+    try:
+        with contextlib.redirect_stdout(devnull):
+            for count in row_counts:
+                setup_rows(count, workdir)
+                keys = list(Strategy.result_dict)
+                symbols = list(Strategy.symbol_index)
+
+                # UpdateData: every symbol has a new LTP
+                def prepare_update(i):
+                    for symbol in symbols:
+                        FyresIntegration.shared_data[symbol] = 100.0 + (i % 50) * 0.05
+                results[f"UpdateData[rows={count}]"] = measure(lambda i: Strategy.UpdateData(), prepare_update,
+                                                               samples, alloc_samples)
+
+                # monitor_entry_exit: one row per call, no level reached
+                set_waiting_states()
+
+                def call_monitor(i):
+                    key = keys[i % count]
+                    Strategy.monitor_entry_exit(key, Strategy.result_dict[key], Strategy.positions_state)
+                results[f"monitor_entry_exit[rows={count}]"] = measure(call_monitor, lambda i: None,
+                                                                       samples, alloc_samples)
+
+                # check_signal_for_symbol: one row per call from a clean state, candle cache warm
+                for key in keys:
+                    params = Strategy.result_dict[key]
+                    FyresIntegration.fetchOHLC(params['FyresSymbol'], params['Timeframe'])
+
+                def prepare_signal(i):
+                    Strategy.positions_state[keys[i % count]] = PositionRecord()
+
+                def call_signal(i):
+                    key = keys[i % count]
+                    Strategy.check_signal_for_symbol(key, Strategy.result_dict[key], Strategy.positions_state)
+                results[f"check_signal_for_symbol[rows={count}]"] = measure(call_signal, prepare_signal,
+                                                                            samples, alloc_samples)
+
+                # publish_dashboard: the snapshot the trading thread hands to the dashboard thread
+                set_waiting_states()
+                results[f"publish_dashboard[rows={count}]"] = measure(lambda i: Strategy.publish_dashboard(),
+                                                                      lambda i: None, samples, alloc_samples)
+
+                # format_dashboard: the text the dashboard thread draws from that snapshot
+                snapshot = build_snapshot(Strategy.result_dict, Strategy.positions_state)
+                results[f"format_dashboard[rows={count}]"] = measure(lambda i: format_dashboard(snapshot),
+                                                                     lambda i: None, samples, alloc_samples)
+
+                # main_strategy: one polling-loop iteration over all rows
+                results[f"main_strategy[rows={count}]"] = measure(lambda i: Strategy.main_strategy(),
+                                                                  prepare_update, samples, alloc_samples)
+
+                Strategy.order_gateway.executor.submit(lambda: None).result()
+                Strategy.process_pending_events()
+    finally:
+        devnull.close()
+        Strategy.order_log_writer.close()
+        Strategy.latency_tracker.close()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print results next to the baseline.
+
+    Returns:
+        list of scenario names whose p50 grew by more than tolerance (fraction)
+    """
+    regressions = []
+    print(f"{'Scenario':<38} {'p50 us':>10} {'p90 us':>10} {'p99 us':>10} {'max us':>10} {'alloc KiB':>10} {'vs base':>9}")
+    print("-" * 102)
+    for name, stats in results.items():
+        change = ""
+        base = baseline.get(name)
+        if base and base.get('p50_us'):
+            ratio = stats['p50_us'] / base['p50_us']
+            change = f"{ratio:>8.2f}x"
+            if ratio > 1 + tolerance:
+                change += " REGRESSION"
+                regressions.append(name)
+        print(f"{name:<38} {stats['p50_us']:>10.1f} {stats['p90_us']:>10.1f} {stats['p99_us']:>10.1f} "
+              f"{stats['max_us']:>10.1f} {stats['alloc_peak_kib']:>10.1f} {change}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks of the strategy hot paths")
+    parser.add_argument("--rows", default="5,50,500", help="comma-separated TradeSettings sizes")
+    parser.add_argument("--samples", type=int, default=200, help="timed calls per scenario")
+    parser.add_argument("--alloc-samples", type=int, default=20, help="calls per scenario measured with tracemalloc")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    row_counts = [int(value) for value in args.rows.split(",")]
+    results = run_scenarios(row_counts, args.samples, args.alloc_samples)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} scenario(s) slower than the baseline by more than {args.tolerance:.0%}")
+        sys.exit(1)
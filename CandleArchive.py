@@ -0,0 +1,178 @@
+import os
+import glob
+import time
+import numpy as np
+import pandas as pd
+import polars as pl
+
+CANDLE_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+# Default archive location: ./data/archive/day=YYYY-MM-DD/symbol=<SYMBOL>/tf<N>-<first bar epoch>.parquet
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "archive")
+
+
+def to_epoch_seconds(dates):
+    """Convert a pandas datetime Series (naive = UTC, or tz-aware) to int64 epoch seconds."""
+    dates = pd.to_datetime(dates, utc=True)
+    return ((dates - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+
+class CandleArchive:
+    """
+    Append-only Parquet archive of completed candles, partitioned by trading day and symbol.
+
+    append() writes only bars newer than the last archived bar of the symbol/timeframe, so each
+    candle check adds a tiny part file instead of rewriting the whole history. compact() merges
+    the part files of a day. read() returns a polars DataFrame (slicing it is zero-copy),
+    read_pandas() the same data in the fetchOHLC() layout.
+    """
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        # (symbol, timeframe) -> epoch seconds of the last archived bar
+        self.last_archived = {}
+
+    def partition_dir(self, day, symbol):
+        return os.path.join(self.root, f"day={day}", f"symbol={symbol}")
+
+    def symbol_files(self, symbol):
+        return glob.glob(os.path.join(self.root, "day=*", f"symbol={symbol}", "*.parquet"))
+
+    def last_bar_time(self, symbol, timeframe):
+        """Epoch seconds of the newest archived bar for symbol/timeframe (None if nothing archived)."""
+        key = (symbol, int(timeframe))
+        if key not in self.last_archived:
+            last = None
+            files = self.symbol_files(symbol)
+            if files:
+                newest = (pl.scan_parquet(files)
+                          .filter(pl.col('timeframe') == int(timeframe))
+                          .select(pl.col('date').max())
+                          .collect())
+                if newest.height and newest['date'][0] is not None:
+                    last = int(newest['date'][0].timestamp())
+            self.last_archived[key] = last
+        return self.last_archived[key]
+
+    def append(self, symbol, timeframe, df, before=None):
+        """
+        Archive the bars of df (fetchOHLC() layout) that are newer than the last archived bar.
+
+        Args:
+            symbol: symbol name used for the partition (e.g. 'NIFTY25DEC26000CE')
+            timeframe: bar size in minutes
+            df: pandas DataFrame with date/open/high/low/close/volume
+            before: only bars starting before this time are archived (excludes the forming bar)
+
+        Returns:
+            int: number of bars written
+        """
+        if df is None or len(df) == 0:
+            return 0
+
+        timeframe = int(timeframe)
+        starts = to_epoch_seconds(df['date'])
+        keep = np.ones(len(starts), dtype=bool)
+        last = self.last_bar_time(symbol, timeframe)
+        if last is not None:
+            keep &= starts > last
+        if before is not None:
+            keep &= starts < int(pd.Timestamp(before).timestamp())
+        if not keep.any():
+            return 0
+
+        new_bars = pl.DataFrame({
+            'date': starts[keep],
+            'open': df['open'].to_numpy(dtype=np.float64)[keep],
+            'high': df['high'].to_numpy(dtype=np.float64)[keep],
+            'low': df['low'].to_numpy(dtype=np.float64)[keep],
+            'close': df['close'].to_numpy(dtype=np.float64)[keep],
+            'volume': df['volume'].fillna(0).to_numpy(dtype=np.float64)[keep],
+        }).with_columns(
+            pl.from_epoch('date', time_unit='s').dt.replace_time_zone('UTC').dt.convert_time_zone('Asia/Kolkata'),
+            pl.lit(timeframe, dtype=pl.Int32).alias('timeframe'),
+        )
+
+        for (day,), bars in new_bars.group_by(pl.col('date').dt.date(), maintain_order=True):
+            partition = self.partition_dir(day, symbol)
+            os.makedirs(partition, exist_ok=True)
+            first_bar = int(bars['date'][0].timestamp())
+            bars.write_parquet(os.path.join(partition, f"tf{timeframe}-{first_bar}.parquet"))
+
+        self.last_archived[(symbol, timeframe)] = int(starts[keep].max())
+        return int(keep.sum())
+
+    def read(self, symbol, timeframe=None, start=None, end=None):
+        """
+        Read archived bars of a symbol as a polars DataFrame sorted by date.
+
+        Args:
+            symbol: symbol name used for the partition
+            timeframe: only this timeframe (minutes); None returns all
+            start, end: optional datetime bounds (start inclusive, end exclusive)
+        """
+        files = self.symbol_files(symbol)
+        if not files:
+            return pl.DataFrame(schema={'date': pl.Datetime('us', 'Asia/Kolkata'), 'open': pl.Float64,
+                                        'high': pl.Float64, 'low': pl.Float64, 'close': pl.Float64,
+                                        'volume': pl.Float64, 'timeframe': pl.Int32})
+
+        frame = pl.scan_parquet(files)
+        if timeframe is not None:
+            frame = frame.filter(pl.col('timeframe') == int(timeframe))
+        if start is not None:
+            frame = frame.filter(pl.col('date') >= pd.Timestamp(start).tz_convert('Asia/Kolkata'))
+        if end is not None:
+            frame = frame.filter(pl.col('date') < pd.Timestamp(end).tz_convert('Asia/Kolkata'))
+        return (frame
+                .unique(subset=['timeframe', 'date'], keep='last', maintain_order=True)
+                .sort(['timeframe', 'date'])
+                .collect())
+
+    def read_pandas(self, symbol, timeframe, start=None, end=None):
+        """Same as read() for one timeframe, returned in the fetchOHLC() pandas layout."""
+        bars = self.read(symbol, timeframe, start, end)
+        df = pd.DataFrame({column: bars[column].to_numpy() for column in CANDLE_COLUMNS[1:]})
+        df.insert(0, 'date', pd.to_datetime(bars['date'].dt.epoch('s').to_numpy(), unit='s', utc=True))
+        df['date'] = df['date'].dt.tz_convert('Asia/Kolkata')
+        return df
+
+    def compact(self, day, symbol=None):
+        """Merge the part files of a day (optionally one symbol) into one file per partition."""
+        pattern = os.path.join(self.root, f"day={day}", f"symbol={symbol}" if symbol else "symbol=*")
+        for partition in glob.glob(pattern):
+            files = sorted(glob.glob(os.path.join(partition, "*.parquet")))
+            if len(files) < 2:
+                continue
+            merged = (pl.read_parquet(files)
+                      .unique(subset=['timeframe', 'date'], keep='last', maintain_order=True)
+                      .sort(['timeframe', 'date']))
+            tmp_path = os.path.join(partition, f"compacted-{int(time.time())}.parquet.tmp")
+            merged.write_parquet(tmp_path)
+            for path in files:
+                os.remove(path)
+            os.replace(tmp_path, os.path.join(partition, f"compacted-{int(time.time())}.parquet"))
+
+    def import_csv(self, csv_path, symbol, timeframe):
+        """Load a legacy data/<SYMBOL>.csv snapshot into the archive. Returns bars written."""
+        df = pd.read_csv(csv_path)
+        if len(df) == 0:
+            return 0
+        df['date'] = pd.to_datetime(df['date'], utc=True)
+        return self.append(symbol, timeframe, df)
+
+
+if __name__ == "__main__":
+    # Import the legacy ./data/<SYMBOL>.csv snapshots into the archive
+    # (timeframe inferred from the most common spacing between bars)
+    archive = CandleArchive()
+    data_dir = os.path.dirname(ARCHIVE_DIR)
+    for csv_path in sorted(glob.glob(os.path.join(data_dir, "*.csv"))):
+        symbol = os.path.splitext(os.path.basename(csv_path))[0]
+        dates = pd.to_datetime(pd.read_csv(csv_path, usecols=['date'])['date'], utc=True)
+        if len(dates) < 2:
+            print(f"{symbol}: not enough bars, skipped")
+            continue
+        timeframe = int(dates.diff().dropna().mode()[0] / pd.Timedelta(minutes=1))
+        written = archive.import_csv(csv_path, symbol, timeframe)
+        print(f"{symbol}: {written} bar(s) archived ({timeframe} min)")
@@ -0,0 +1,205 @@
+import threading
+import time
+from collections import deque
+import pandas as pd
+
+# IST is a fixed +05:30 offset (no DST), so session alignment can be done on epoch seconds
+IST_OFFSET_SECONDS = 19800
+
+# Session open (minutes after midnight IST) per exchange prefix of the Fyers symbol
+SESSION_OPEN_MINUTES = {
+    "NSE": 9 * 60 + 15,
+    "BSE": 9 * 60 + 15,
+    "MCX": 9 * 60,
+}
+DEFAULT_SESSION_OPEN_MINUTES = 9 * 60 + 15
+
+CANDLE_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+
+def get_session_open_minutes(symbol):
+    """Return the session open (minutes after midnight IST) for a Fyers symbol like 'NSE:SBIN-EQ'."""
+    exchange = str(symbol).split(':')[0].upper() if ':' in str(symbol) else "NSE"
+    return SESSION_OPEN_MINUTES.get(exchange, DEFAULT_SESSION_OPEN_MINUTES)
+
+
+def get_bar_start(epoch_seconds, timeframe_minutes, session_open_minutes):
+    """
+    Align a timestamp to the start of its bar, counting bars from the session open.
+
+    Args:
+        epoch_seconds: tick time (epoch seconds)
+        timeframe_minutes: bar size in minutes
+        session_open_minutes: session open in minutes after midnight IST
+
+    Returns:
+        int: epoch seconds of the bar start
+    """
+    day_start = (int(epoch_seconds) + IST_OFFSET_SECONDS) // 86400 * 86400 - IST_OFFSET_SECONDS
+    session_open = day_start + session_open_minutes * 60
+    bar_seconds = timeframe_minutes * 60
+    return session_open + (int(epoch_seconds) - session_open) // bar_seconds * bar_seconds
+
+
+class TickVolume:
+    """
+    Per-tick traded volume of Fyers messages: the increase of vol_traded_today since the
+    symbol's previous message, or last_traded_qty when a message has no day volume.
+
+    A day volume below the previous one (new session, or a reconnect snapshot) restarts the
+    count from that value and gives the tick no volume. FyresIntegration keeps the one instance
+    the live feed uses, so candles and tick buffers always agree on a tick's volume.
+    """
+
+    def __init__(self):
+        # symbol -> last cumulative day volume seen
+        self.last_day_volume = {}
+
+    def of(self, message):
+        """Volume traded by the tick in `message` (0 when it cannot be told)."""
+        day_volume = message.get('vol_traded_today')
+        if day_volume is None:
+            return message.get('last_traded_qty') or 0
+        symbol = message['symbol']
+        last = self.last_day_volume.get(symbol)
+        self.last_day_volume[symbol] = day_volume
+        if last is not None and day_volume >= last:
+            return day_volume - last
+        return 0
+
+
+class CandleAggregator:
+    """
+    Builds OHLCV bars (1/3/5/15 minute or any other minute timeframe) in memory from websocket ticks.
+
+    Bars are kept per (symbol, timeframe) and are aligned to the exchange session open.
+    REST history is only used to seed the bars at startup (see seed()).
+    on_message() is called from the websocket thread, get_candles() from the trading thread.
+    """
+
+    def __init__(self, max_bars=7000, tick_volume=None):
+        self.max_bars = max_bars
+        self.lock = threading.Lock()
+        # (symbol, timeframe) -> deque of completed bars [start, open, high, low, close, volume]
+        self.bars = {}
+        # (symbol, timeframe) -> forming bar [start, open, high, low, close, volume]
+        self.forming = {}
+        # symbol -> timeframes being built for it
+        self.symbol_timeframes = {}
+        # Per-tick volume of messages that do not carry 'tick_volume' (see on_message)
+        self.tick_volume = tick_volume or TickVolume()
+        # symbol -> session open minutes
+        self.session_open = {}
+
+    def track(self, symbol, timeframe):
+        """Start building bars of this timeframe for the symbol."""
+        timeframe = int(timeframe)
+        with self.lock:
+            timeframes = self.symbol_timeframes.setdefault(symbol, set())
+            timeframes.add(timeframe)
+            self.bars.setdefault((symbol, timeframe), deque(maxlen=self.max_bars))
+            self.session_open.setdefault(symbol, get_session_open_minutes(symbol))
+
+    def seed(self, symbol, timeframe, df):
+        """
+        Seed the bars of a symbol/timeframe from a REST history frame (output of fetchOHLC).
+        The last REST bar may still be forming; it is reopened when the next tick of the same bar arrives.
+        """
+        self.track(symbol, timeframe)
+        timeframe = int(timeframe)
+        if df is None or len(df) == 0:
+            return
+
+        starts = ((pd.to_datetime(df['date'], utc=True) - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).tolist()
+        rows = zip(starts, df['open'].tolist(), df['high'].tolist(), df['low'].tolist(),
+                   df['close'].tolist(), df['volume'].fillna(0).tolist())
+
+        with self.lock:
+            bars = self.bars[(symbol, timeframe)]
+            bars.clear()
+            bars.extend([int(start), float(o), float(h), float(l), float(c), float(v)] for start, o, h, l, c, v in rows)
+            self.forming.pop((symbol, timeframe), None)
+
+    def has_history(self, symbol, timeframe):
+        """True when bars for this symbol/timeframe have been seeded or built."""
+        key = (symbol, int(timeframe))
+        return bool(self.bars.get(key)) or key in self.forming
+
+    def on_message(self, message):
+        """
+        Websocket callback: feed a Fyers SymbolUpdate message into the bars.
+        Uses the message's 'tick_volume' (set by FyresIntegration.handle_tick_message) when present.
+        """
+        symbol = message.get('symbol')
+        ltp = message.get('ltp')
+        if symbol is None or ltp is None:
+            return
+
+        # Prefer exchange time so late ticks still land in the right bar
+        tick_time = message.get('exch_feed_time') or message.get('last_traded_time')
+
+        volume = message.get('tick_volume')
+        if volume is None:
+            volume = self.tick_volume.of(message)
+
+        self.on_tick(symbol, ltp, volume, tick_time)
+
+    def on_tick(self, symbol, ltp, volume=0, tick_time=None):
+        """
+        Apply a single trade tick to every timeframe tracked for the symbol.
+
+        Args:
+            symbol: Fyers symbol
+            ltp: last traded price
+            volume: traded volume since the previous tick
+            tick_time: epoch seconds of the tick (defaults to now)
+        """
+        timeframes = self.symbol_timeframes.get(symbol)
+        if not timeframes:
+            return
+        if tick_time is None:
+            tick_time = time.time()
+        ltp = float(ltp)
+        volume = float(volume or 0)
+        session_open = self.session_open[symbol]
+
+        with self.lock:
+            for timeframe in timeframes:
+                key = (symbol, timeframe)
+                bar_start = get_bar_start(tick_time, timeframe, session_open)
+                bar = self.forming.get(key)
+                bars = self.bars[key]
+
+                if bar is None and bars and bars[-1][0] == bar_start:
+                    # Seeded REST bar is still forming: reopen it
+                    bar = bars.pop()
+                    self.forming[key] = bar
+
+                if bar is not None and bar[0] == bar_start:
+                    if ltp > bar[2]:
+                        bar[2] = ltp
+                    if ltp < bar[3]:
+                        bar[3] = ltp
+                    bar[4] = ltp
+                    bar[5] += volume
+                elif bar is None or bar_start > bar[0]:
+                    if bar is not None:
+                        bars.append(bar)
+                    self.forming[key] = [bar_start, ltp, ltp, ltp, ltp, volume]
+                # Ticks older than the forming bar are ignored
+
+    def get_candles(self, symbol, timeframe):
+        """
+        Return the bars of a symbol/timeframe as a DataFrame shaped like fetchOHLC()
+        (completed bars followed by the forming bar, 'date' in Asia/Kolkata).
+        """
+        key = (symbol, int(timeframe))
+        with self.lock:
+            rows = [list(bar) for bar in self.bars.get(key, ())]
+            bar = self.forming.get(key)
+            if bar is not None:
+                rows.append(list(bar))
+
+        df = pd.DataFrame(rows, columns=CANDLE_COLUMNS)
+        df['date'] = pd.to_datetime(df['date'], unit='s', utc=True).dt.tz_convert('Asia/Kolkata')
+        return df
@@ -0,0 +1,246 @@
+import os
+import sys
+import time
+import threading
+from collections import deque
+from datetime import datetime
+import pytz
+
+from LogWriter import BufferedLogWriter
+from PositionRecord import PositionStatus, CLOSED_STATES, LADDER_STEP
+
+IST = pytz.timezone('Asia/Kolkata')
+
+WIDTH = 85
+# Lines of other console output shown below the live dashboard, and the file that keeps all of it
+CONSOLE_LINES = 8
+CONSOLE_LOG_PATH = 'Console.log'
+
+
+def candle_view(candle):
+    """(date, date_str, color) of a last_candle_* dict, or None."""
+    if not candle:
+        return None
+    return (candle.get('date'), candle.get('date_str', 'N/A'), candle.get('color'))
+
+
+def build_snapshot(result_dict, positions_state):
+    """
+    Copy what the dashboard shows into nested tuples, so another thread can format it
+    while the trading thread keeps changing result_dict / positions_state.
+
+    Returns:
+        (taken_at, rows): epoch seconds and one tuple per row
+        (symbol, ltp, state, direction, remaining_lots, entry_price, entry, candle1, candle2)
+    """
+    rows = []
+    for unique_key, params in result_dict.items():
+        pos_state = positions_state.get(unique_key)
+        if pos_state is None:
+            rows.append((params.get('Symbol', 'N/A'), params.get('FyresLtp'), PositionStatus.NO_SIGNAL,
+                         None, 0, None, None, None, None))
+            continue
+        rows.append((params.get('Symbol', 'N/A'), params.get('FyresLtp'), pos_state.state, pos_state.direction,
+                     pos_state.remaining_lots, pos_state.entry_price, pos_state.entry,
+                     candle_view(pos_state.last_candle_1), candle_view(pos_state.last_candle_2)))
+    return (time.time(), tuple(rows))
+
+
+def format_status(state, direction, remaining_lots, entry_price, entry, ltp):
+    """Compact status column of a row."""
+    if state in CLOSED_STATES:
+        return "EXITED"
+    if state in LADDER_STEP:
+        direction = direction or 'BUY'
+        entry_price = entry_price if entry_price is not None else entry
+        pnl = (ltp - entry_price) * remaining_lots if ltp and entry_price else 0
+        if pnl != 0:
+            return f"{direction} {remaining_lots}L P&L:{pnl:+.0f}"
+        return f"{direction} {remaining_lots}L"
+    if state is not PositionStatus.NO_SIGNAL:
+        return f"WAIT {direction or 'BUY'}@{entry or 0:.1f}"
+    return "NO SIGNAL"
+
+
+def format_candle(candle):
+    """'HH:MM G' / 'HH:MM R' for a candle_view() tuple."""
+    if candle is None:
+        return "N/A"
+    date, time_str, color = candle
+    if hasattr(date, 'strftime'):
+        time_str = date.strftime('%H:%M')
+    color = 'G' if color == 'GREEN' else 'R' if color == 'RED' else '?'
+    return f"{time_str} {color}"
+
+
+def format_dashboard(snapshot):
+    """Dashboard text lines of a build_snapshot() result."""
+    taken_at, rows = snapshot
+    current_time = datetime.fromtimestamp(taken_at, IST).strftime('%H:%M:%S')
+    lines = [
+        "",
+        '=' * WIDTH,
+        f"TRADING DASHBOARD - {current_time}",
+        '=' * WIDTH,
+        f"{'Symbol':<18} {'Status':<20} {'LTP':<10} {'C1':<8} {'C2':<8}",
+        '-' * WIDTH,
+    ]
+    for symbol, ltp, state, direction, remaining_lots, entry_price, entry, candle1, candle2 in rows:
+        # Truncate long symbol names
+        if len(symbol) > 17:
+            symbol = symbol[:14] + "..."
+        ltp_str = f"{ltp:.2f}" if ltp else "N/A"
+        status = format_status(state, direction, remaining_lots, entry_price, entry, ltp)
+        # Truncate status if too long
+        if len(status) > 19:
+            status = status[:16] + "..."
+        lines.append(f"{symbol:<18} {status:<20} {ltp_str:<10} {format_candle(candle1):<8} {format_candle(candle2):<8}")
+    lines.append('-' * WIDTH)
+    lines.append("")
+    return lines
+
+
+class ConsoleCapture:
+    """
+    Takes the place of sys.stdout / sys.stderr while the dashboard owns the terminal.
+
+    Text printed by any thread goes to the console log file, and its last lines are kept
+    for the renderer to show below the dashboard, so nothing is written over the
+    cursor-positioned screen.
+    """
+
+    def __init__(self, original, log_writer, max_lines=CONSOLE_LINES):
+        self.original = original
+        self.log_writer = log_writer
+        self.lines = deque(maxlen=max_lines)
+        self.partial = ""
+        self.lock = threading.Lock()
+        # Bumped for every complete line, so the renderer knows when to redraw
+        self.version = 0
+
+    def write(self, text):
+        with self.lock:
+            *complete, self.partial = (self.partial + text).split('\n')
+            for line in complete:
+                self.log_writer.write(line)
+                if line.strip():
+                    self.lines.append(line)
+                    self.version += 1
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def tail(self):
+        """(version, recent non-empty lines)."""
+        with self.lock:
+            return self.version, list(self.lines)
+
+    def __getattr__(self, name):
+        # encoding, isatty(), fileno() ... of the stream being replaced
+        return getattr(self.original, name)
+
+
+class DashboardRenderer:
+    """
+    Draws the dashboard on its own thread from the latest published snapshot.
+
+    The trading thread only calls publish() (a reference swap). Every refresh_interval
+    seconds the renderer formats the newest snapshot and rewrites just the lines that changed,
+    using ANSI cursor positioning; the whole screen is redrawn every full_redraw_interval
+    seconds as well.
+
+    While it runs (capture_output), sys.stdout and sys.stderr are replaced by a ConsoleCapture:
+    prints from other threads go to console_log_path and their last lines are drawn below
+    the dashboard instead of scrolling it.
+    """
+
+    def __init__(self, refresh_interval=1.0, full_redraw_interval=30.0, stream=None,
+                 capture_output=True, console_log_path=CONSOLE_LOG_PATH):
+        self.refresh_interval = refresh_interval
+        self.full_redraw_interval = full_redraw_interval
+        self.stream = stream
+        self.capture_output = capture_output
+        self.console_log_path = console_log_path
+        self.console = None
+        self.console_log = None
+        self.replaced_streams = None
+        self.console_version = 0
+        self.snapshot = None
+        self.rendered = None
+        self.drawn = []
+        self.last_full_redraw = 0.0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def publish(self, snapshot):
+        self.snapshot = snapshot
+
+    def start(self):
+        if self.thread is not None:
+            return
+        if os.name == 'nt':
+            # Lets the Windows console interpret ANSI escape sequences
+            os.system('')
+        if self.capture_output:
+            self.replaced_streams = (sys.stdout, sys.stderr)
+            # The dashboard itself still goes to the real terminal
+            self.stream = self.stream or sys.stdout
+            self.console_log = BufferedLogWriter(self.console_log_path)
+            self.console = ConsoleCapture(sys.stdout, self.console_log)
+            sys.stdout = sys.stderr = self.console
+        self.thread = threading.Thread(target=self.run, name="dashboard", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+        if self.replaced_streams is not None:
+            sys.stdout, sys.stderr = self.replaced_streams
+            self.replaced_streams = None
+            self.console = None
+            self.console_log.close()
+
+    def run(self):
+        while not self.stop_event.wait(self.refresh_interval):
+            try:
+                self.render()
+            except Exception as e:
+                print(f"Error printing dashboard: {e}")
+
+    def render(self):
+        """Draw the latest snapshot (and captured output) if it has not been drawn yet."""
+        snapshot = self.snapshot
+        console = self.console
+        version, console_lines = console.tail() if console is not None else (0, [])
+        if snapshot is None or (snapshot is self.rendered and version == self.console_version):
+            return
+        self.rendered = snapshot
+        self.console_version = version
+        lines = format_dashboard(snapshot)
+        if console is not None:
+            lines.append(f"Recent output (all of it in {self.console_log_path}):")
+            # Cut to the dashboard width: a wrapped line would shift every row below it
+            lines.extend(line[:WIDTH] for line in console_lines)
+
+        now = time.time()
+        parts = []
+        if now - self.last_full_redraw >= self.full_redraw_interval:
+            parts.append("\x1b[2J")
+            self.drawn = []
+            self.last_full_redraw = now
+        for row, line in enumerate(lines):
+            if row >= len(self.drawn) or self.drawn[row] != line:
+                parts.append(f"\x1b[{row + 1};1H{line}\x1b[K")
+        if len(lines) < len(self.drawn):
+            parts.append(f"\x1b[{len(lines) + 1};1H\x1b[J")
+        self.drawn = lines
+        if not parts:
+            return
+        # Leave the cursor below the dashboard
+        parts.append(f"\x1b[{len(lines) + 1};1H")
+        stream = self.stream or sys.stdout
+        stream.write("".join(parts))
+        stream.flush()
@@ -0,0 +1,872 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import random
+import socket
+import struct
+import argparse
+import threading
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, urlencode
+import numpy as np
+import pandas as pd
+import pytz
+
+IST = pytz.timezone('Asia/Kolkata')
+IST_OFFSET_SECONDS = 19800
+SESSION_OPEN_MINUTES = 9 * 60 + 15
+SESSION_CLOSE_MINUTES = 15 * 60 + 30
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+ACCESS_TOKEN = "SIMULATOR-TOKEN"
+
+
+def synthetic_candles(symbol, resolution, range_from, range_to):
+    """
+    Deterministic synthetic candles in the fyers.history() 'candles' format
+    ([epoch, open, high, low, close, volume] rows), NSE session hours only.
+
+    Args:
+        symbol: Fyers symbol (sets the price level, so a symbol always gets the same prices)
+        resolution: bar size in minutes
+        range_from, range_to: epoch seconds (bars starting in [range_from, range_to] are returned)
+    """
+    step = int(resolution) * 60
+    first_day = datetime.fromtimestamp(range_from, IST).date()
+    last_day = datetime.fromtimestamp(range_to, IST).date()
+
+    starts = []
+    day = first_day
+    while day <= last_day:
+        if day.weekday() < 5:
+            midnight = int(IST.localize(datetime.combine(day, datetime.min.time())).timestamp())
+            starts.append(np.arange(midnight + SESSION_OPEN_MINUTES * 60, midnight + SESSION_CLOSE_MINUTES * 60, step))
+        day += timedelta(days=1)
+    if not starts:
+        return []
+    starts = np.concatenate(starts)
+    starts = starts[(starts >= range_from) & (starts <= range_to)]
+    if len(starts) == 0:
+        return []
+
+    # Price path depends only on symbol and bar time, so delta requests agree with full loads
+    base = symbol_base_price(symbol)
+    phase = (starts // step).astype(np.float64)
+    close = base + 10 * np.sin(phase / 37.0) + 3 * np.sin(phase / 5.3)
+    open_ = base + 10 * np.sin((phase - 0.5) / 37.0) + 3 * np.sin((phase - 0.5) / 5.3)
+    high = np.maximum(open_, close) + 0.5 + np.abs(np.sin(phase))
+    low = np.minimum(open_, close) - 0.5 - np.abs(np.cos(phase))
+    volume = 1000 + (phase % 17) * 50
+    return np.column_stack([starts, open_, high, low, close, volume]).tolist()
+
+
+def symbol_base_price(symbol):
+    return 100 + zlib.crc32(symbol.encode()) % 400
+
+
+def load_recorded_bars(symbol, replay_dir, now=None):
+    """
+    Recorded bars of a symbol from <replay_dir>/<SYMBOL>.csv (the data/ snapshot layout),
+    moved forward by whole weeks so the recording ends within the last week before `now`
+    (fetchOHLC only asks for recent history; weekdays and session times are kept).
+
+    Returns:
+        NumPy array of [epoch, open, high, low, close, volume] rows, or None
+    """
+    if not replay_dir:
+        return None
+    path = os.path.join(replay_dir, f"{symbol.split(':')[-1]}.csv")
+    if not os.path.exists(path):
+        return None
+    df = pd.read_csv(path)
+    if len(df) == 0:
+        return None
+    dates = pd.to_datetime(df['date'], utc=True)
+    epochs = ((dates - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+    week = 7 * 86400
+    now = int(time.time()) if now is None else int(now)
+    if epochs[-1] < now:
+        epochs = epochs + (now - epochs[-1]) // week * week
+    return np.column_stack([epochs, df[['open', 'high', 'low', 'close', 'volume']].fillna(0).to_numpy(dtype=np.float64)])
+
+
+def resample_bars(bars, resolution):
+    """Re-bucket recorded bars into `resolution`-minute bars counted from the 09:15 session open."""
+    step = int(resolution) * 60
+    epochs = bars[:, 0].astype(np.int64)
+    day_start = (epochs + IST_OFFSET_SECONDS) // 86400 * 86400 - IST_OFFSET_SECONDS
+    session_open = day_start + SESSION_OPEN_MINUTES * 60
+    bucket = session_open + (epochs - session_open) // step * step
+    if len(bucket) and np.all(bucket == epochs):
+        return bars
+
+    starts, first = np.unique(bucket, return_index=True)
+    last = np.append(first[1:], len(bucket)) - 1
+    return np.column_stack([
+        starts,
+        bars[first, 1],
+        np.maximum.reduceat(bars[:, 2], first),
+        np.minimum.reduceat(bars[:, 3], first),
+        bars[last, 4],
+        np.add.reduceat(bars[:, 5], first),
+    ])
+
+
+# ----------------------------------------------------------------------------------------------
+# Minimal RFC 6455 websocket framing (server side)
+# ----------------------------------------------------------------------------------------------
+
+def ws_accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+def ws_encode_frame(payload, opcode=0x1):
+    """One unmasked, unfragmented frame (server -> client)."""
+    if isinstance(payload, str):
+        payload = payload.encode()
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def ws_read_frame(rfile):
+    """Read one client frame. Returns (opcode, payload bytes), or (None, None) when the peer went away."""
+    header = rfile.read(2)
+    if len(header) < 2:
+        return None, None
+    opcode = header[0] & 0x0F
+    masked = header[1] & 0x80
+    length = header[1] & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', rfile.read(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', rfile.read(8))[0]
+    mask = rfile.read(4) if masked else None
+    payload = rfile.read(length)
+    if mask:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return opcode, payload
+
+
+class WebSocketClient:
+    """A connected websocket peer of the simulator (data or order channel)."""
+
+    def __init__(self, connection, channel):
+        self.connection = connection
+        self.channel = channel
+        self.lock = threading.Lock()
+        self.symbols = set()
+        self.litemode = False
+        self.subscriptions = set()
+        self.alive = True
+
+    def send(self, message):
+        try:
+            with self.lock:
+                self.connection.sendall(ws_encode_frame(json.dumps(message)))
+        except OSError:
+            self.alive = False
+
+
+# ----------------------------------------------------------------------------------------------
+# Simulated exchange state
+# ----------------------------------------------------------------------------------------------
+
+class SymbolFeed:
+    """Price state of one symbol: replays recorded bars (O, H, L, C per bar) or random-walks."""
+
+    def __init__(self, symbol, recorded=None, rng=None):
+        self.symbol = symbol
+        self.rng = rng or random.Random(zlib.crc32(symbol.encode()))
+        if recorded is not None and len(recorded):
+            self.path = recorded[:, 1:5].reshape(-1)
+            self.ltp = float(self.path[0])
+        else:
+            self.path = None
+            self.ltp = float(symbol_base_price(symbol))
+        self.index = 0
+        self.volume = 0
+        self.open = self.high = self.low = self.prev_close = self.ltp
+        self.last_traded_time = int(time.time())
+
+    def next_tick(self):
+        if self.path is not None:
+            self.index = (self.index + 1) % len(self.path)
+            ltp = float(self.path[self.index])
+        else:
+            ltp = max(0.05, round(self.ltp * (1 + self.rng.gauss(0, 0.0005)) / 0.05) * 0.05)
+        self.ltp = round(ltp, 2)
+        self.high = max(self.high, self.ltp)
+        self.low = min(self.low, self.ltp)
+        traded = self.rng.randint(1, 20) * 25
+        self.volume += traded
+        self.last_traded_time = int(time.time())
+        return traded
+
+    def message(self, litemode, traded=0):
+        """Tick in the FyersDataSocket SymbolUpdate format."""
+        if litemode:
+            return {'ltp': self.ltp, 'symbol': self.symbol, 'type': 'sf'}
+        change = round(self.ltp - self.prev_close, 2)
+        return {
+            'ltp': self.ltp, 'vol_traded_today': self.volume, 'last_traded_time': self.last_traded_time,
+            'exch_feed_time': self.last_traded_time, 'bid_size': 100, 'ask_size': 100,
+            'bid_price': round(self.ltp - 0.05, 2), 'ask_price': round(self.ltp + 0.05, 2),
+            'last_traded_qty': traded, 'tot_buy_qty': 10000, 'tot_sell_qty': 10000, 'avg_trade_price': self.ltp,
+            'low_price': self.low, 'high_price': self.high, 'open_price': self.open,
+            'prev_close_price': self.prev_close, 'ch': change,
+            'chp': round(change / self.prev_close * 100, 2) if self.prev_close else 0.0,
+            'type': 'sf', 'symbol': self.symbol,
+        }
+
+
+class TokenBucket:
+    """Requests-per-second limiter (burst = one second worth of requests)."""
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self):
+        if self.rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class FyersSimulator:
+    """
+    Local stand-in for the Fyers REST API, data socket and order socket.
+
+    REST routes mirror fyersModel.Config under <url>/api/v3 and <url>/data, plus the login
+    routes used by automated_login under <url>/vagator/v2. Ticks are pushed on <url>/ws/data,
+    order updates on <url>/ws/orders. Market orders fill at the current simulated LTP, limit
+    orders when the LTP crosses their price.
+
+    Args:
+        host, port: listen address (port 0 picks a free port)
+        latency: mean added response latency in seconds
+        jitter: standard deviation of the added latency in seconds
+        rate_limits: requests per second per route group ('orders', 'data', 'default'); 0 = unlimited
+        error_rate: fraction of REST requests answered with an HTTP 500 error
+        tick_interval: seconds between ticks of each subscribed symbol
+        replay_dir: directory of <SYMBOL>.csv recorded bars (synthetic data for other symbols)
+        seed: random seed for latency, errors and the random-walk prices
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, latency=0.0, jitter=0.0, rate_limits=None,
+                 error_rate=0.0, tick_interval=0.25, replay_dir=None, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.tick_interval = tick_interval
+        self.replay_dir = replay_dir
+        self.rng = random.Random(seed)
+        self.buckets = {group: TokenBucket(rate) for group, rate in
+                        {'orders': 10, 'data': 10, 'default': 10, **(rate_limits or {})}.items()}
+
+        self.lock = threading.Lock()
+        self.feeds = {}
+        # symbol -> recorded bars (None when the symbol has no recording)
+        self.recorded = {}
+        self.orders = {}
+        self.trades = []
+        self.next_order_id = 1
+        self.clients = []
+        # route -> [count, errors, rate limited, list of service times]
+        self.stats = {}
+
+        self.server = None
+        self.threads = []
+        self.running = threading.Event()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    # -- lifecycle ---------------------------------------------------------------------------------
+
+    def start(self):
+        """Start the HTTP/websocket server and the tick feed in background threads."""
+        simulator = self
+
+        class Handler(SimulatorRequestHandler):
+            pass
+        Handler.simulator = simulator
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.running.set()
+        for target, name in ((self.server.serve_forever, "sim-http"), (self._tick_loop, "sim-ticks")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def stop(self):
+        self.running.clear()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        for client in list(self.clients):
+            try:
+                client.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    # -- market data --------------------------------------------------------------------------------
+
+    def recorded_bars(self, symbol):
+        if symbol not in self.recorded:
+            self.recorded[symbol] = load_recorded_bars(symbol, self.replay_dir)
+        return self.recorded[symbol]
+
+    def feed(self, symbol):
+        with self.lock:
+            feed = self.feeds.get(symbol)
+            if feed is None:
+                feed = SymbolFeed(symbol, self.recorded_bars(symbol))
+                self.feeds[symbol] = feed
+            return feed
+
+    def history(self, params):
+        symbol = params.get('symbol', '')
+        resolution = params.get('resolution', '1')
+        if resolution.upper() in ('D', '1D'):
+            resolution = '375'
+        if params.get('date_format') == '1':
+            range_from = int(IST.localize(datetime.strptime(params['range_from'], "%Y-%m-%d")).timestamp())
+            range_to = int(IST.localize(datetime.strptime(params['range_to'], "%Y-%m-%d")).timestamp()) + 86399
+        else:
+            range_from, range_to = int(params['range_from']), int(params['range_to'])
+
+        with self.lock:
+            recorded = self.recorded_bars(symbol)
+        if recorded is not None:
+            bars = resample_bars(recorded, resolution)
+            bars = bars[(bars[:, 0] >= range_from) & (bars[:, 0] <= range_to)]
+            candles = [[int(row[0])] + row[1:].tolist() for row in bars]
+        else:
+            candles = synthetic_candles(symbol, resolution, range_from, min(range_to, int(time.time())))
+            candles = [[int(row[0])] + row[1:] for row in candles]
+        return {"s": "ok", "code": 200, "candles": candles}
+
+    def quotes(self, params):
+        symbols = [symbol for symbol in params.get('symbols', '').split(',') if symbol]
+        if len(symbols) > 50:
+            return 400, {"s": "error", "code": -300, "message": "Maximum 50 symbols allowed"}
+        items = []
+        for symbol in symbols:
+            feed = self.feed(symbol)
+            items.append({"n": symbol, "s": "ok", "v": {
+                "symbol": symbol, "lp": feed.ltp, "bid": round(feed.ltp - 0.05, 2), "ask": round(feed.ltp + 0.05, 2),
+                "volume": feed.volume, "open_price": feed.open, "high_price": feed.high, "low_price": feed.low,
+                "prev_close_price": feed.prev_close, "ch": round(feed.ltp - feed.prev_close, 2),
+            }})
+        return 200, {"s": "ok", "code": 200, "d": items}
+
+    def _tick_loop(self):
+        while self.running.is_set():
+            started = time.monotonic()
+            data_clients = [client for client in self.clients if client.channel == "data" and client.alive]
+            symbols = set()
+            for client in data_clients:
+                symbols |= client.symbols
+
+            for symbol in symbols:
+                feed = self.feed(symbol)
+                traded = feed.next_tick()
+                full = lite = None
+                for client in data_clients:
+                    if symbol not in client.symbols:
+                        continue
+                    if client.litemode:
+                        lite = lite or feed.message(True)
+                        client.send(lite)
+                    else:
+                        full = full or feed.message(False, traded)
+                        client.send(full)
+                self._match_limit_orders(symbol, feed.ltp)
+
+            self.clients = [client for client in self.clients if client.alive]
+            time.sleep(max(0.0, self.tick_interval - (time.monotonic() - started)))
+
+    # -- orders --------------------------------------------------------------------------------------
+
+    def place_order(self, data):
+        symbol = data.get('symbol')
+        qty = int(data.get('qty') or 0)
+        if not symbol or qty <= 0 or data.get('side') not in (1, -1):
+            return 400, {"s": "error", "code": -50, "message": "Invalid order parameters"}
+
+        with self.lock:
+            order_id = f"SIM{datetime.now(IST).strftime('%y%m%d')}{self.next_order_id:08d}"
+            self.next_order_id += 1
+            order = {
+                "id": order_id, "symbol": symbol, "qty": qty, "filledQty": 0, "remainingQuantity": qty,
+                "side": data.get('side'), "type": int(data.get('type', 2)), "productType": data.get('productType'),
+                "limitPrice": float(data.get('limitPrice') or 0), "stopPrice": float(data.get('stopPrice') or 0),
+                "tradedPrice": 0, "status": 6, "orderTag": data.get('orderTag', ''), "message": "",
+                "orderDateTime": datetime.now(IST).strftime('%d-%b-%Y %H:%M:%S'),
+            }
+            self.orders[order_id] = order
+        self._push_order(order)
+
+        if order['type'] == 2:
+            self._fill(order, self.feed(symbol).ltp)
+        return 200, {"s": "ok", "code": 1101, "message": "Order Submitted Successfully", "id": order_id}
+
+    def modify_order(self, data):
+        with self.lock:
+            order = self.orders.get(str(data.get('id')))
+            if order is None or order['status'] != 6:
+                return 400, {"s": "error", "code": -52, "message": "Order not pending"}
+            for field in ('limitPrice', 'stopPrice'):
+                if field in data:
+                    order[field] = float(data[field])
+            if 'qty' in data and data['qty']:
+                order['qty'] = order['remainingQuantity'] = int(data['qty'])
+            if 'type' in data:
+                order['type'] = int(data['type'])
+            snapshot = dict(order)
+        self._push_order(snapshot)
+        if snapshot['type'] == 2:
+            self._fill(order, self.feed(snapshot['symbol']).ltp)
+        return 200, {"s": "ok", "code": 1102, "message": "Order modified", "id": snapshot['id']}
+
+    def cancel_order(self, data):
+        with self.lock:
+            order = self.orders.get(str(data.get('id')))
+            if order is None or order['status'] != 6:
+                return 400, {"s": "error", "code": -52, "message": "Order not pending"}
+            order['status'] = 1
+            order['message'] = "Cancelled"
+            snapshot = dict(order)
+        self._push_order(snapshot)
+        return 200, {"s": "ok", "code": 1103, "message": "Order cancelled", "id": snapshot['id']}
+
+    def _match_limit_orders(self, symbol, ltp):
+        with self.lock:
+            pending = [order for order in self.orders.values()
+                       if order['status'] == 6 and order['symbol'] == symbol and order['type'] == 1]
+        for order in pending:
+            if (order['side'] == 1 and ltp <= order['limitPrice']) or (order['side'] == -1 and ltp >= order['limitPrice']):
+                self._fill(order, order['limitPrice'])
+
+    def _fill(self, order, price):
+        with self.lock:
+            if order['status'] != 6:
+                return
+            order.update({"status": 2, "filledQty": order['qty'], "remainingQuantity": 0,
+                          "tradedPrice": round(price, 2), "message": "TRADE CONFIRMED"})
+            self.trades.append({"orderNumber": order['id'], "symbol": order['symbol'], "side": order['side'],
+                                "tradedQty": order['qty'], "tradePrice": order['tradedPrice'],
+                                "productType": order['productType'], "orderTag": order['orderTag']})
+            snapshot = dict(order)
+        self._push_order(snapshot)
+
+    def _push_order(self, order):
+        for client in self.clients:
+            if client.channel == "orders" and client.alive and "OnOrders" in client.subscriptions:
+                client.send({"s": "ok", "orders": order})
+
+    def positions(self):
+        net = {}
+        with self.lock:
+            for trade in self.trades:
+                key = (trade['symbol'], trade['productType'])
+                position = net.setdefault(key, {"symbol": trade['symbol'], "productType": trade['productType'],
+                                                "netQty": 0, "buyQty": 0, "sellQty": 0, "buyVal": 0.0, "sellVal": 0.0})
+                value = trade['tradedQty'] * trade['tradePrice']
+                if trade['side'] == 1:
+                    position['buyQty'] += trade['tradedQty']
+                    position['buyVal'] += value
+                else:
+                    position['sellQty'] += trade['tradedQty']
+                    position['sellVal'] += value
+                position['netQty'] = position['buyQty'] - position['sellQty']
+        for position in net.values():
+            ltp = self.feed(position['symbol']).ltp
+            position['ltp'] = ltp
+            position['pl'] = round(position['sellVal'] - position['buyVal'] + position['netQty'] * ltp, 2)
+        return {"s": "ok", "code": 200, "netPositions": list(net.values())}
+
+    # -- request accounting -------------------------------------------------------------------------
+
+    def record(self, route, elapsed, error=False, limited=False):
+        with self.lock:
+            entry = self.stats.setdefault(route, [0, 0, 0, []])
+            entry[0] += 1
+            entry[1] += int(error)
+            entry[2] += int(limited)
+            entry[3].append(elapsed)
+
+    def stats_summary(self):
+        """Per-route request count, errors, rate-limit rejections and service-time percentiles (ms)."""
+        summary = {}
+        with self.lock:
+            for route, (count, errors, limited, times) in self.stats.items():
+                times_ms = np.asarray(times) * 1000
+                summary[route] = {
+                    "requests": count, "errors": errors, "rate_limited": limited,
+                    "p50_ms": float(np.percentile(times_ms, 50)), "p99_ms": float(np.percentile(times_ms, 99)),
+                    "max_ms": float(times_ms.max()),
+                }
+        return summary
+
+
+class SimulatorRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler of FyersSimulator (REST routes and websocket upgrades)."""
+
+    simulator = None
+    protocol_version = "HTTP/1.1"
+
+    # route -> (rate-limit group, handler name)
+    ROUTES = {
+        ("GET", "/api/v3/profile"): ("default", "route_profile"),
+        ("GET", "/api/v3/orders"): ("orders", "route_orderbook"),
+        ("POST", "/api/v3/orders/sync"): ("orders", "route_place_order"),
+        ("PATCH", "/api/v3/orders/sync"): ("orders", "route_modify_order"),
+        ("DELETE", "/api/v3/orders/sync"): ("orders", "route_cancel_order"),
+        ("GET", "/api/v3/positions"): ("default", "route_positions"),
+        ("GET", "/api/v3/tradebook"): ("default", "route_tradebook"),
+        ("POST", "/api/v3/token"): ("default", "route_token"),
+        ("POST", "/api/v3/validate-authcode"): ("default", "route_validate_authcode"),
+        ("GET", "/data/history"): ("data", "route_history"),
+        ("GET", "/data/quotes"): ("data", "route_quotes"),
+        ("POST", "/vagator/v2/send_login_otp_v2"): ("default", "route_login_step"),
+        ("POST", "/vagator/v2/verify_otp"): ("default", "route_login_step"),
+        ("POST", "/vagator/v2/verify_pin_v2"): ("default", "route_verify_pin"),
+    }
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.headers.get('Upgrade', '').lower() == 'websocket':
+            self.handle_websocket()
+        else:
+            self.handle_rest("GET")
+
+    def do_POST(self):
+        self.handle_rest("POST")
+
+    def do_PATCH(self):
+        self.handle_rest("PATCH")
+
+    def do_DELETE(self):
+        self.handle_rest("DELETE")
+
+    # -- REST --------------------------------------------------------------------------------------
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def handle_rest(self, method):
+        simulator = self.simulator
+        started = time.perf_counter()
+        parsed = urlparse(self.path)
+        self.query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            self.body = json.loads(raw) if raw else {}
+        except ValueError:
+            self.body = {}
+
+        if parsed.path == "/sim/stats":
+            self.send_json(200, simulator.stats_summary())
+            return
+
+        route = self.ROUTES.get((method, parsed.path))
+        if route is None:
+            self.send_json(404, {"s": "error", "code": -404, "message": f"No route {method} {parsed.path}"})
+            return
+        group, handler = route
+        route_name = f"{method} {parsed.path}"
+
+        if simulator.latency or simulator.jitter:
+            time.sleep(max(0.0, simulator.rng.gauss(simulator.latency, simulator.jitter)))
+
+        if not simulator.buckets.get(group, simulator.buckets['default']).allow():
+            self.send_json(429, {"s": "error", "code": 429, "message": "request limit reached"})
+            simulator.record(route_name, time.perf_counter() - started, limited=True)
+            return
+        if simulator.error_rate and simulator.rng.random() < simulator.error_rate:
+            self.send_json(500, {"s": "error", "code": -99, "message": "simulated server error"})
+            simulator.record(route_name, time.perf_counter() - started, error=True)
+            return
+
+        try:
+            status, body = getattr(self, handler)()
+        except Exception as e:
+            status, body = 500, {"s": "error", "code": -99, "message": str(e)}
+        self.send_json(status, body)
+        simulator.record(route_name, time.perf_counter() - started, error=status >= 400)
+
+    def route_profile(self):
+        return 200, {"s": "ok", "code": 200, "data": {"fy_id": "SIM0001", "name": "SIMULATOR", "email_id": ""}}
+
+    def route_orderbook(self):
+        with self.simulator.lock:
+            orders = [dict(order) for order in self.simulator.orders.values()]
+        if 'id' in self.query:
+            orders = [order for order in orders if order['id'] == self.query['id']]
+        return 200, {"s": "ok", "code": 200, "orderBook": orders}
+
+    def route_place_order(self):
+        return self.simulator.place_order(self.body)
+
+    def route_modify_order(self):
+        return self.simulator.modify_order(self.body)
+
+    def route_cancel_order(self):
+        return self.simulator.cancel_order(self.body)
+
+    def route_positions(self):
+        return 200, self.simulator.positions()
+
+    def route_tradebook(self):
+        with self.simulator.lock:
+            return 200, {"s": "ok", "code": 200, "tradeBook": list(self.simulator.trades)}
+
+    def route_token(self):
+        redirect = self.body.get('redirect_uri') or "http://127.0.0.1/"
+        return 200, {"s": "ok", "Url": f"{redirect}?{urlencode({'auth_code': 'SIMAUTH', 'state': 'None'})}"}
+
+    def route_validate_authcode(self):
+        return 200, {"s": "ok", "code": 200, "access_token": ACCESS_TOKEN, "refresh_token": ACCESS_TOKEN}
+
+    def route_history(self):
+        return 200, self.simulator.history(self.query)
+
+    def route_quotes(self):
+        return self.simulator.quotes(self.query)
+
+    def route_login_step(self):
+        return 200, {"s": "ok", "request_key": "SIMREQUESTKEY"}
+
+    def route_verify_pin(self):
+        return 200, {"s": "ok", "data": {"access_token": ACCESS_TOKEN}}
+
+    # -- websocket ----------------------------------------------------------------------------------
+
+    def handle_websocket(self):
+        channel = {"/ws/data": "data", "/ws/orders": "orders"}.get(urlparse(self.path).path)
+        key = self.headers.get('Sec-WebSocket-Key')
+        if channel is None or not key:
+            self.send_json(404, {"s": "error", "message": "unknown websocket path"})
+            return
+
+        self.send_response(101, "Switching Protocols")
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", ws_accept_key(key))
+        self.end_headers()
+        self.wfile.flush()
+
+        client = WebSocketClient(self.connection, channel)
+        self.simulator.clients.append(client)
+        try:
+            while client.alive and self.simulator.running.is_set():
+                opcode, payload = ws_read_frame(self.rfile)
+                if opcode is None or opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    with client.lock:
+                        self.connection.sendall(ws_encode_frame(payload, opcode=0xA))
+                    continue
+                if opcode == 0x1:
+                    self.handle_ws_message(client, json.loads(payload.decode() or "{}"))
+        except (OSError, ValueError):
+            pass
+        finally:
+            client.alive = False
+            self.close_connection = True
+
+    def handle_ws_message(self, client, message):
+        action = message.get('action')
+        if client.channel == "data":
+            if action == "subscribe":
+                client.litemode = bool(message.get('litemode', client.litemode))
+                client.symbols.update(message.get('symbols', []))
+            elif action == "unsubscribe":
+                client.symbols.difference_update(message.get('symbols', []))
+        else:
+            data_types = set(str(message.get('data_type', '')).split(','))
+            if action == "subscribe":
+                client.subscriptions |= data_types
+            elif action == "unsubscribe":
+                client.subscriptions -= data_types
+
+
+# ----------------------------------------------------------------------------------------------
+# Client sockets with the FyersDataSocket / FyersOrderSocket interface
+# ----------------------------------------------------------------------------------------------
+
+class SimulatedSocket:
+    """Shared websocket-client plumbing of the simulated data and order sockets."""
+
+    path = ""
+
+    def __init__(self, url, on_connect=None, on_close=None, on_error=None):
+        self.url = url.replace("http://", "ws://").replace("https://", "wss://").rstrip("/") + self.path
+        self.on_connect = on_connect
+        self.on_close = on_close
+        self.on_error = on_error
+        self.ws = None
+        self.opened = threading.Event()
+        self.running = False
+
+    def connect(self):
+        import websocket
+
+        self.ws = websocket.WebSocketApp(
+            self.url,
+            on_open=lambda ws: self._on_open(),
+            on_message=lambda ws, message: self._on_message(json.loads(message)),
+            on_error=lambda ws, error: self.on_error and self.on_error({"s": "error", "message": str(error)}),
+            on_close=lambda ws, code, reason: self._on_close(),
+        )
+        thread = threading.Thread(target=self.ws.run_forever, name=f"sim-socket{self.path}", daemon=True)
+        thread.start()
+        self.opened.wait(5.0)
+
+    def _on_open(self):
+        self.opened.set()
+        if self.on_connect is not None:
+            self.on_connect()
+
+    def _on_close(self):
+        self.opened.clear()
+        if self.on_close is not None:
+            self.on_close({"s": "ok", "message": "connection closed"})
+
+    def _on_message(self, message):
+        raise NotImplementedError
+
+    def send(self, message):
+        if self.ws is not None and self.opened.is_set():
+            self.ws.send(json.dumps(message))
+
+    def keep_running(self):
+        self.running = True
+
+    def is_connected(self):
+        return self.opened.is_set()
+
+    def close_connection(self):
+        self.running = False
+        if self.ws is not None:
+            self.ws.close()
+
+
+class SimulatedDataSocket(SimulatedSocket):
+    """FyersDataSocket look-alike fed by FyersSimulator (same constructor callbacks and methods)."""
+
+    path = "/ws/data"
+
+    def __init__(self, access_token=None, log_path="", litemode=False, write_to_file=False, reconnect=True,
+                 on_connect=None, on_close=None, on_error=None, on_message=None, reconnect_retry=50, url=None):
+        super().__init__(url or os.environ.get("FYERS_SIMULATOR_URL", "http://127.0.0.1:8765"),
+                         on_connect, on_close, on_error)
+        self.litemode = litemode
+        self.on_message = on_message
+
+    def _on_message(self, message):
+        if self.on_message is not None:
+            self.on_message(message)
+
+    def subscribe(self, symbols, data_type="SymbolUpdate", channel=11):
+        self.send({"action": "subscribe", "symbols": list(symbols), "data_type": data_type, "litemode": self.litemode})
+
+    def unsubscribe(self, symbols, data_type="SymbolUpdate", channel=11):
+        self.send({"action": "unsubscribe", "symbols": list(symbols), "data_type": data_type})
+
+
+class SimulatedOrderSocket(SimulatedSocket):
+    """FyersOrderSocket look-alike: order updates of FyersSimulator are passed to on_orders."""
+
+    path = "/ws/orders"
+
+    def __init__(self, access_token=None, write_to_file=False, log_path="", on_connect=None, on_close=None,
+                 on_error=None, on_orders=None, on_trades=None, on_positions=None, on_general=None,
+                 reconnect=True, url=None):
+        super().__init__(url or os.environ.get("FYERS_SIMULATOR_URL", "http://127.0.0.1:8765"),
+                         on_connect, on_close, on_error)
+        self.on_orders = on_orders
+
+    def _on_message(self, message):
+        if self.on_orders is not None and 'orders' in message:
+            self.on_orders(message)
+
+    def subscribe(self, data_type):
+        self.send({"action": "subscribe", "data_type": data_type})
+
+    def unsubscribe(self, data_type):
+        self.send({"action": "unsubscribe", "data_type": data_type})
+
+
+def print_stats(summary):
+    print(f"{'Route':<36} {'Requests':>9} {'Errors':>7} {'429s':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for route, stats in sorted(summary.items()):
+        print(f"{route:<36} {stats['requests']:>9} {stats['errors']:>7} {stats['rate_limited']:>6} "
+              f"{stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['max_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Fyers API simulator (REST + tick/order websockets)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean added latency per REST call (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latency standard deviation (seconds)")
+    parser.add_argument("--order-rate", type=float, default=10, help="order requests per second (0 = unlimited)")
+    parser.add_argument("--data-rate", type=float, default=10, help="history/quotes requests per second (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of REST calls failing with HTTP 500")
+    parser.add_argument("--tick-interval", type=float, default=0.25, help="seconds between ticks per symbol")
+    parser.add_argument("--replay", default=None, help="directory of recorded <SYMBOL>.csv bars (e.g. data)")
+    parser.add_argument("--report-interval", type=float, default=30.0, help="seconds between stats reports")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    simulator = FyersSimulator(
+        host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+        rate_limits={'orders': args.order_rate, 'data': args.data_rate},
+        error_rate=args.error_rate, tick_interval=args.tick_interval, replay_dir=args.replay, seed=args.seed,
+    ).start()
+    print(f"Fyers simulator listening on {simulator.url}")
+    print(f"Add 'simulator_url,{simulator.url}' to FyersCredentials.csv to point the strategy at it")
+
+    try:
+        while True:
+            time.sleep(args.report_interval)
+            print(f"\n[{datetime.now(IST).strftime('%H:%M:%S')}] {len(simulator.clients)} socket client(s)")
+            print_stats(simulator.stats_summary())
+    except KeyboardInterrupt:
+        simulator.stop()
+        print_stats(simulator.stats_summary())
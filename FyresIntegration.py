@@ -3,19 +3,95 @@ from fyers_apiv3.FyersWebsocket import data_ws
 import webbrowser
 from datetime import datetime, timedelta, date
 from time import sleep
+import time
 import os
 import pyotp
 import requests
 import json
+import base64
 import math
 import pytz
+import threading
 from urllib.parse import parse_qs, urlparse
 import warnings
 import pandas as pd
+from TickBuffer import TickRingBuffers
+from CandleBuilder import TickVolume
 access_token=None
 fyers=None
 shared_data = {}
 shared_data_2 = {}
+# Optional queue that receives ("tick", symbol, ltp, receive_time) for every tick (event-driven mode)
+tick_queue = None
+# Callbacks that receive every raw websocket message (e.g. the candle aggregator)
+tick_handlers = []
+# symbol -> time.time() when its latest tick arrived (latency tracking in polling mode)
+last_tick_time = {}
+# Every tick per symbol (exchange time, LTP, volume), for interval high/low and replay
+tick_buffers = TickRingBuffers()
+# Per-tick volume, worked out once per message for every consumer (see handle_tick_message)
+tick_volume = TickVolume()
+# OrderStore fed by the order websocket (see fyres_order_websocket)
+order_store = None
+# Login endpoints used by automated_login (use_api_base points them at a FyersSimulator)
+LOGIN_API = "https://api-t2.fyers.in/vagator/v2"
+TOKEN_API = "https://api-t1.fyers.in/api/v3"
+# Access token cache reused across restarts (see automated_login); readable by the owner only
+TOKEN_CACHE_PATH = ".fyers_token.json"
+# A cached token this close to its expiry is not reused (seconds)
+TOKEN_EXPIRY_MARGIN = 300
+# One pooled HTTPS session for every login request
+login_session = requests.Session()
+# Socket classes used instead of the Fyers websockets (None = FyersDataSocket / FyersOrderSocket)
+data_socket_class = None
+order_socket_class = None
+# Shared data-socket connection (see get_market_data_hub)
+market_data_hub = None
+# Websocket ticks received and REST calls made per FyersModel method (read by StatusServer)
+tick_count = 0
+rest_call_counts = {}
+rest_count_lock = threading.Lock()
+
+class CountingClient:
+    """Wraps a FyersModel so every REST call is counted in rest_call_counts by method name."""
+
+    def __init__(self, client):
+        self.client = client
+        self.wrappers = {}
+
+    def __getattr__(self, name):
+        wrapper = self.wrappers.get(name)
+        if wrapper is not None:
+            return wrapper
+        attribute = getattr(self.client, name)
+        if not callable(attribute):
+            return attribute
+
+        def counted(*args, **kwargs):
+            with rest_count_lock:
+                rest_call_counts[name] = rest_call_counts.get(name, 0) + 1
+            return attribute(*args, **kwargs)
+        self.wrappers[name] = counted
+        return counted
+
+def use_api_base(base_url):
+    """
+    Send every REST call, the login flow and both websockets to a FyersSimulator at base_url
+    (e.g. "http://127.0.0.1:8765") instead of the live Fyers servers.
+    """
+    global LOGIN_API, TOKEN_API, data_socket_class, order_socket_class
+    from functools import partial
+    from FyersSimulator import SimulatedDataSocket, SimulatedOrderSocket
+
+    base_url = base_url.rstrip("/")
+    fyersModel.Config.API = f"{base_url}/api/v3"
+    fyersModel.Config.DATA_API = f"{base_url}/data"
+    LOGIN_API = f"{base_url}/vagator/v2"
+    TOKEN_API = f"{base_url}/api/v3"
+    data_socket_class = partial(SimulatedDataSocket, url=base_url)
+    order_socket_class = partial(SimulatedOrderSocket, url=base_url)
+    print(f"[SIMULATOR] Fyers API calls go to {base_url}")
+
 # Lock to ensure thread-safe access to the shared data
 def apiactivation(client_id, redirect_uri, response_type, state, secret_key, grant_type):
     from fyers_apiv3 import fyersModel
@@ -54,13 +130,86 @@ def apiactivation(client_id, redirect_uri, response_type, state, secret_key, gra
         return None
 
 
-def automated_login(client_id,secret_key,FY_ID,TOTP_KEY,PIN,redirect_uri):
+def token_expiry(token):
+    """
+    Expiry (epoch seconds) of an access token: the JWT 'exp' claim, or the next IST midnight
+    when the token is not a readable JWT.
+    """
+    try:
+        payload = token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return float(claims['exp'])
+    except Exception:
+        now = datetime.now(pytz.timezone('Asia/Kolkata'))
+        return (now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)).timestamp()
+
+def load_cached_token(client_id, path=TOKEN_CACHE_PATH):
+    """Access token from the cache if it belongs to this app and API and is not about to expire, else None."""
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get('client_id') != client_id or cached.get('api') != fyersModel.Config.API:
+        return None
+    if cached.get('expires_at', 0) - time.time() < TOKEN_EXPIRY_MARGIN:
+        return None
+    return cached.get('access_token')
 
-    pd.set_option('display.max_columns', None)
-    warnings.filterwarnings('ignore')
+def save_cached_token(client_id, token, path=TOKEN_CACHE_PATH):
+    """Write the token cache (mode 600, replaced atomically so a crash never leaves half a file)."""
+    record = {'client_id': client_id, 'api': fyersModel.Config.API, 'access_token': token,
+              'expires_at': token_expiry(token), 'created_at': time.time()}
+    temp_path = f"{path}.tmp"
+    try:
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(record, f)
+        os.chmod(temp_path, 0o600)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"[LOGIN] Could not write token cache {path}: {e}")
+
+def use_access_token(client_id, token):
+    """
+    Make `token` the session token and validate it with one profile call.
 
-    import base64
+    Returns:
+        the get_profile() response, or None if the token was rejected
+    """
+    global fyers, access_token
+    client = CountingClient(fyersModel.FyersModel(client_id=client_id, is_async=False, token=token, log_path=os.getcwd()))
+    try:
+        profile = client.get_profile()
+    except Exception as e:
+        print(f"[LOGIN] Profile check failed: {e}")
+        return None
+    if not isinstance(profile, dict) or profile.get('s') != 'ok':
+        return None
+    fyers = client
+    access_token = token
+    return profile
 
+def automated_login(client_id,secret_key,FY_ID,TOTP_KEY,PIN,redirect_uri,use_cache=True):
+    """
+    Log in and set the module's fyers client and access_token.
+
+    A token cached by an earlier run is reused when one profile call accepts it; only
+    otherwise (or with use_cache=False) the full OTP / TOTP / PIN login is run and its
+    token cached for the next start.
+    """
+    if use_cache:
+        token = load_cached_token(client_id)
+        if token:
+            profile = use_access_token(client_id, token)
+            if profile is not None:
+                print(f"[LOGIN] Reusing cached access token (valid until {datetime.fromtimestamp(token_expiry(token))})")
+                print(profile)
+                return
+            print("[LOGIN] Cached access token rejected, logging in again")
+
+    pd.set_option('display.max_columns', None)
+    warnings.filterwarnings('ignore')
 
     def getEncodedString(string):
         string = str(string)
@@ -69,36 +218,34 @@ def automated_login(client_id,secret_key,FY_ID,TOTP_KEY,PIN,redirect_uri):
 
     global fyers,access_token
 
-    URL_SEND_LOGIN_OTP = "https://api-t2.fyers.in/vagator/v2/send_login_otp_v2"
-    response = requests.post(url=URL_SEND_LOGIN_OTP, json={"fy_id": getEncodedString(FY_ID), "app_id": "2"})
+    URL_SEND_LOGIN_OTP = f"{LOGIN_API}/send_login_otp_v2"
+    response = login_session.post(url=URL_SEND_LOGIN_OTP, json={"fy_id": getEncodedString(FY_ID), "app_id": "2"})
     print("Status code:", response.status_code)
     print("Raw text:", response.text)
     res = response.json()
 
     if datetime.now().second % 30 > 27: sleep(5)
-    URL_VERIFY_OTP = "https://api-t2.fyers.in/vagator/v2/verify_otp"
-    res2 = requests.post(url=URL_VERIFY_OTP,
-                         json={"request_key": res["request_key"], "otp": pyotp.TOTP(TOTP_KEY).now()}).json()
+    URL_VERIFY_OTP = f"{LOGIN_API}/verify_otp"
+    res2 = login_session.post(url=URL_VERIFY_OTP,
+                              json={"request_key": res["request_key"], "otp": pyotp.TOTP(TOTP_KEY).now()}).json()
     print(res2)
 
-    ses = requests.Session()
-    URL_VERIFY_OTP2 = "https://api-t2.fyers.in/vagator/v2/verify_pin_v2"
+    URL_VERIFY_OTP2 = f"{LOGIN_API}/verify_pin_v2"
     payload2 = {"request_key": res2["request_key"], "identity_type": "pin", "identifier": getEncodedString(PIN)}
-    res3 = ses.post(url=URL_VERIFY_OTP2, json=payload2).json()
+    res3 = login_session.post(url=URL_VERIFY_OTP2, json=payload2).json()
     print("res3: ",res3)
 
-    ses.headers.update({
-        'authorization': f"Bearer {res3['data']['access_token']}"
-    })
+    # Bearer token of this login only, so it is sent per request instead of kept on the session
+    authorization = {'authorization': f"Bearer {res3['data']['access_token']}"}
 
-    TOKENURL = "https://api-t1.fyers.in/api/v3/token"
+    TOKENURL = f"{TOKEN_API}/token"
     payload3 = {"fyers_id": FY_ID,
                 "app_id": client_id[:-4],
                 "redirect_uri": redirect_uri,
                 "appType": "100", "code_challenge": "",
                 "state": "None", "scope": "", "nonce": "", "response_type": "code", "create_cookie": True}
 
-    res3 = ses.post(url=TOKENURL, json=payload3).json()
+    res3 = login_session.post(url=TOKENURL, json=payload3, headers=authorization).json()
     print("res3: ",res3)
     url = res3['Url']
     parsed = urlparse(url)
@@ -118,16 +265,74 @@ def automated_login(client_id,secret_key,FY_ID,TOTP_KEY,PIN,redirect_uri):
     response = session.generate_token()
     access_token = response['access_token']
     print("access_token: ",access_token)
-    fyers = fyersModel.FyersModel(client_id=client_id, is_async=False, token=access_token, log_path=os.getcwd())
-    print(fyers.get_profile())
+    profile = use_access_token(client_id, access_token)
+    if profile is None:
+        # Keep the client so the caller sees the broker's errors, but do not cache the token
+        fyers = CountingClient(fyersModel.FyersModel(client_id=client_id, is_async=False, token=access_token, log_path=os.getcwd()))
+        print("[LOGIN] New access token failed the profile check")
+        return
+    save_cached_token(client_id, access_token)
+    print(profile)
+
+# Fyers accepts up to 50 comma-separated symbols per quotes request
+QUOTES_MAX_SYMBOLS = 50
+# Seconds a batched quote stays valid
+QUOTES_CACHE_TTL = 1.0
+# symbol -> (fetch_time, quote dict)
+quote_cache = {}
+
+def get_quotes_batch(symbols, ttl=QUOTES_CACHE_TTL):
+    """
+    Get quotes for any number of symbols with one fyers.quotes call per QUOTES_MAX_SYMBOLS symbols.
+    Quotes younger than ttl seconds are served from cache.
 
-def get_ltp(SYMBOL):
+    Args:
+        symbols: iterable of Fyers symbols
+        ttl: cache lifetime in seconds (0 forces a fresh request)
+
+    Returns:
+        dict: {symbol: {'ltp', 'bid', 'ask', 'volume'}}; symbols the API rejected are left out
+    """
     global fyers
-    data={"symbols":f"{SYMBOL}"}
-    res=fyers.quotes(data)
-    if 'd' in res and len(res['d']) > 0:
-        lp = res['d'][0]['v']['lp']
-        return lp
+    now = time.time()
+    quotes = {}
+    to_fetch = []
+    for symbol in dict.fromkeys(symbols):
+        cached = quote_cache.get(symbol)
+        if cached is not None and now - cached[0] < ttl:
+            quotes[symbol] = cached[1]
+        else:
+            to_fetch.append(symbol)
+
+    for i in range(0, len(to_fetch), QUOTES_MAX_SYMBOLS):
+        chunk = to_fetch[i:i + QUOTES_MAX_SYMBOLS]
+        try:
+            response = fyers.quotes(data={"symbols": ",".join(chunk)})
+        except Exception as e:
+            print(f"Error getting quotes for {len(chunk)} symbols: {e}")
+            continue
+
+        fetch_time = time.time()
+        for item in response.get('d') or []:
+            values = item.get('v', {})
+            symbol = item.get('n') or values.get('symbol')
+            if symbol is None or 'lp' not in values:
+                continue
+            quote = {
+                'ltp': values.get('lp'),
+                'bid': values.get('bid'),
+                'ask': values.get('ask'),
+                'volume': values.get('volume'),
+            }
+            quote_cache[symbol] = (fetch_time, quote)
+            quotes[symbol] = quote
+
+    return quotes
+
+def get_ltp(SYMBOL):
+    quote = get_quotes_batch([SYMBOL]).get(SYMBOL)
+    if quote is not None:
+        return quote['ltp']
 
     else:
         print("Last Price (lp) not found in the response.")
@@ -165,9 +370,7 @@ def fetchOHLC_Scanner(symbol):
         "cont_flag": "1"
     }
     response = fyers.history(data=data)
-    cl = ['date', 'open', 'high', 'low', 'close', 'volume']
-    df = pd.DataFrame(response['candles'], columns=cl)
-    df['date']=df['date'].apply(pd.Timestamp,unit='s',tzinfo=pytz.timezone('Asia/Kolkata'))
+    df = candles_to_frame(response['candles'])
     return df.tail(5)
 
 def fetchOHLC_Weekly(symbol):
@@ -283,23 +486,65 @@ def fetchOHLC_Weekly(symbol):
 
 #     return df_weekly  # Return last 20 weeks
 
+# (symbol, resolution) -> cached candle frame, trimmed to a rolling window of OHLC_CACHE_DAYS
+ohlc_cache = {}
+OHLC_CACHE_DAYS = 17
+
+def candles_to_frame(candles):
+    """Convert the 'candles' list of a history response to a frame with IST 'date' timestamps."""
+    cl = ['date', 'open', 'high', 'low', 'close', 'volume']
+    df = pd.DataFrame(candles, columns=cl)
+    df['date'] = pd.to_datetime(df['date'], unit='s', utc=True).dt.tz_convert('Asia/Kolkata')
+    return df
+
 def fetchOHLC(symbol,tf):
+    """
+    Return the last OHLC_CACHE_DAYS of candles for a symbol/timeframe.
+    The first call downloads the full window; later calls only request the bars from the
+    last cached bar onward (that bar may have been forming) and append them to the cache.
+    """
     print("symbol: ",symbol)
-    dat =str(datetime.now().date())
-    dat1 = str((datetime.now() - timedelta(17)).date())
-    data = {
-        "symbol": symbol,
-        "resolution":str(tf),
-        "date_format": "1",
-        "range_from": dat1,
-        "range_to": dat,
-        "cont_flag": "1"
-    }
-    response = fyers.history(data=data)
-    # print("response: ",response)
-    cl = ['date', 'open', 'high', 'low', 'close', 'volume']
-    df = pd.DataFrame(response['candles'], columns=cl)
-    df['date']=df['date'].apply(pd.Timestamp,unit='s',tzinfo=pytz.timezone('Asia/Kolkata'))
+    key = (symbol, str(tf))
+    cached = ohlc_cache.get(key)
+    
+    if cached is None or len(cached) == 0:
+        dat =str(datetime.now().date())
+        dat1 = str((datetime.now() - timedelta(OHLC_CACHE_DAYS)).date())
+        data = {
+            "symbol": symbol,
+            "resolution":str(tf),
+            "date_format": "1",
+            "range_from": dat1,
+            "range_to": dat,
+            "cont_flag": "1"
+        }
+        response = fyers.history(data=data)
+        # print("response: ",response)
+        df = candles_to_frame(response['candles'])
+    else:
+        last_bar_time = int(cached['date'].iloc[-1].timestamp())
+        data = {
+            "symbol": symbol,
+            "resolution": str(tf),
+            "date_format": "0",
+            "range_from": str(last_bar_time),
+            "range_to": str(int(time.time())),
+            "cont_flag": "1"
+        }
+        response = fyers.history(data=data)
+        if 'candles' not in response:
+            print(f"History delta for {symbol} failed, using cached candles: {response}")
+            return cached
+        new_bars = candles_to_frame(response['candles'])
+        if len(new_bars) == 0:
+            return cached
+        # Drop cached bars that the delta re-delivers (the previously forming bar)
+        df = pd.concat([cached[cached['date'] < new_bars['date'].iloc[0]], new_bars], ignore_index=True)
+    
+    # Keep a bounded rolling window
+    window_start = pd.Timestamp((datetime.now() - timedelta(OHLC_CACHE_DAYS)).date()).tz_localize('Asia/Kolkata')
+    df = df[df['date'] >= window_start].reset_index(drop=True)
+    ohlc_cache[key] = df
     return df
 
 
@@ -332,172 +577,87 @@ def fetchOHLC_get_selected_price(symbol, date):
 
 
 
-def fyres_websocket(symbollist):
-    print("symbollist: ",symbollist)
-    from fyers_apiv3.FyersWebsocket import data_ws
-    global access_token
-
-    def onmessage(message):
-        """
-        Callback function to handle incoming messages from the FyersDataSocket WebSocket.
-
-        Parameters:
-            message (dict): The received message from the WebSocket.
-
-        """
-        # print("Response:", message) 
-        if 'symbol' in message and 'ltp' in message:
-            shared_data[message['symbol']] = message['ltp']
-            
-
-
-
-
-    def onerror(message):
-        """
-        Callback function to handle WebSocket errors.
-
-        Parameters:
-            message (dict): The error message received from the WebSocket.
-
-
-        """
-        print("Error:", message)
-
-
-    def onclose(message):
-        """
-        Callback function to handle WebSocket connection close events.
-        """
-        print("Connection closed:", message)
-
-
-    def onopen():
-        """
-        Callback function to subscribe to data type and symbols upon WebSocket connection.
-
-        """
-        # Specify the data type and symbols you want to subscribe to
-        data_type = "SymbolUpdate"
-
-        # Subscribe to the specified symbols and data type
-        symbols = symbollist
-        # ['NSE:LTIM24JULFUT', 'NSE:BHARTIARTL24JULFUT']
-        fyers.subscribe(symbols=symbols, data_type=data_type)
+def set_tick_queue(queue_obj):
+    """
+    Register a queue that receives every websocket tick as ("tick", symbol, ltp, receive_time).
+    Pass None to stop pushing ticks.
+    """
+    global tick_queue
+    tick_queue = queue_obj
 
-        # Keep the socket running to receive real-time data
-        fyers.keep_running()
 
+def add_tick_handler(handler):
+    """
+    Register a callback that is called with every websocket message carrying an LTP.
+    Handlers run on the websocket thread and must be quick.
+    """
+    if handler not in tick_handlers:
+        tick_handlers.append(handler)
 
-    # Replace the sample access token with your actual access token obtained from Fyers
-    # access_token = "XC4XXXXXXM-100:eXXXXXXXXXXXXfZNSBoLo"
 
-    # Create a FyersDataSocket instance with the provided parameters
-    fyers = data_ws.FyersDataSocket(
-        access_token=access_token,  # Access token in the format "appid:accesstoken"
-        log_path="",  # Path to save logs. Leave empty to auto-create logs in the current directory.
-        litemode=False,  # Lite mode disabled. Set to True if you want a lite response.
-        write_to_file=False,  # Save response in a log file instead of printing it.
-        reconnect=True,  # Enable auto-reconnection to WebSocket on disconnection.
-        on_connect=onopen,  # Callback function to subscribe to data upon connection.
-        on_close=onclose,  # Callback function to handle WebSocket connection close events.
-        on_error=onerror,  # Callback function to handle WebSocket errors.
-        on_message=onmessage  # Callback function to handle incoming messages from the WebSocket.
-    )
+def handle_tick_message(message, receive_time=None):
+    """
+    Apply one data-socket message: store the LTP, run the tick handlers and queue the tick.
+    receive_time defaults to now (a shard passes the time its supervisor received the tick).
+    The tick's traded volume is stored in message['tick_volume'] for the handlers.
+    """
+    global tick_count
+    if 'symbol' in message and 'ltp' in message:
+        receive_time = receive_time or time.time()
+        tick_count += 1
+        shared_data[message['symbol']] = message['ltp']
+        last_tick_time[message['symbol']] = receive_time
+        volume = message['tick_volume'] = tick_volume.of(message)
+        tick_buffers.on_message(message, receive_time, volume)
+        for handler in tick_handlers:
+            handler(message)
+        if tick_queue is not None:
+            tick_queue.put(("tick", message['symbol'], message['ltp'], receive_time))
+
+def get_market_data_hub():
+    """The process-wide MarketDataHub (one data-socket connection), created on first use after login."""
+    global market_data_hub
+    if market_data_hub is None:
+        from MarketDataHub import MarketDataHub
+        market_data_hub = MarketDataHub(data_socket_class or data_ws.FyersDataSocket, access_token,
+                                        on_full_tick=handle_tick_message, lite_prices=shared_data_2)
+    return market_data_hub
 
-    # Establish a connection to the Fyers WebSocket
-    fyers.connect()
+def fyres_websocket(symbollist):
+    """Subscribe symbols in full mode on the market-data hub (ticks go through handle_tick_message)."""
+    print("symbollist: ",symbollist)
+    hub = get_market_data_hub()
+    hub.subscribe(symbollist, "full")
+    return hub
+
+def subscribe_symbols(symbols, mode="full"):
+    """Add symbols to the hub at runtime (no-op in a process without a data socket)."""
+    if market_data_hub is None:
+        return []
+    return market_data_hub.subscribe(symbols, mode)
+
+def unsubscribe_symbols(symbols, mode="full"):
+    """Stop the hub's ticks for symbols (no-op in a process without a data socket)."""
+    if market_data_hub is None:
+        return []
+    return market_data_hub.unsubscribe(symbols, mode)
 
 def fyres_quote(symbol):
-    data = {
-        "symbols": f"{symbol}"
-    }
-
-    response = fyers.quotes(data=data)
-    return response
+    """Quote of one symbol ({'ltp', 'bid', 'ask', 'volume'}, see get_quotes_batch), or None."""
+    return get_quotes_batch([symbol]).get(symbol)
 
 
 
 
 
 def fyres_websocket_option(symbollist):
-    from fyers_apiv3.FyersWebsocket import data_ws
-    global access_token
-
-    def onmessage(message):
-        """
-        Callback function to handle incoming messages from the FyersDataSocket WebSocket.
-
-        Parameters:
-            message (dict): The received message from the WebSocket.
-
-        """
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        # print(f"{timestamp} - {message}\n")
-        if 'symbol' in message and 'ltp' in message:
-            shared_data_2[message['symbol']] = message['ltp']
-
-
-
-
-    def onerror(message):
-        """
-        Callback function to handle WebSocket errors.
-
-        Parameters:
-            message (dict): The error message received from the WebSocket.
+    """Subscribe symbols in lite mode on the market-data hub (only their LTP is kept, in shared_data_2)."""
+    hub = get_market_data_hub()
+    hub.subscribe(symbollist, "lite")
+    return hub
 
 
-        """
-        print("Error:", message)
-
-
-    def onclose(message):
-        """
-        Callback function to handle WebSocket connection close events.
-        """
-        print("Connection closed:", message)
-
-
-    def onopen():
-        """
-        Callback function to subscribe to data type and symbols upon WebSocket connection.
-
-        """
-        # Specify the data type and symbols you want to subscribe to
-        data_type = "SymbolUpdate"
-
-        # Subscribe to the specified symbols and data type
-        symbols = symbollist
-        # ['NSE:LTIM24JULFUT', 'NSE:BHARTIARTL24JULFUT']
-        fyers.subscribe(symbols=symbols, data_type=data_type)
-
-        # Keep the socket running to receive real-time data
-        fyers.keep_running()
-
-
-    # Replace the sample access token with your actual access token obtained from Fyers
-    # access_token = "XC4XXXXXXM-100:eXXXXXXXXXXXXfZNSBoLo"
-
-    # Create a FyersDataSocket instance with the provided parameters
-    fyers = data_ws.FyersDataSocket(
-        access_token=access_token,  # Access token in the format "appid:accesstoken"
-        log_path="",  # Path to save logs. Leave empty to auto-create logs in the current directory.
-        litemode=True,  # Lite mode disabled. Set to True if you want a lite response.
-        write_to_file=False,  # Save response in a log file instead of printing it.
-        reconnect=True,  # Enable auto-reconnection to WebSocket on disconnection.
-        on_connect=onopen,  # Callback function to subscribe to data upon connection.
-        on_close=onclose,  # Callback function to handle WebSocket connection close events.
-        on_error=onerror,  # Callback function to handle WebSocket errors.
-        on_message=onmessage  # Callback function to handle incoming messages from the WebSocket.
-    )
-
-    # Establish a connection to the Fyers WebSocket
-    fyers.connect()
-
-
-
-def place_order(symbol,quantity,type,side,price,product_type="INTRADAY"):
+def place_order(symbol,quantity,type,side,price,product_type="INTRADAY",order_tag="tag1"):
     # Set quantity to 1 by default if not provided
     if quantity is None or quantity == 0:
         quantity = 1
@@ -545,7 +705,7 @@ def place_order(symbol,quantity,type,side,price,product_type="INTRADAY"):
         "offlineOrder": False,
         "stopLoss": 0,
         "takeProfit": 0,
-        "orderTag": "tag1"
+        "orderTag": order_tag
     }
     
     print("Order data: ", data)
@@ -553,25 +713,26 @@ def place_order(symbol,quantity,type,side,price,product_type="INTRADAY"):
     print("response: ",response)
     return response
 
+def order_accepted(response):
+    """True if the broker accepted an order: {'s': 'ok', 'id': ...} (a rejection is {'s': 'error', ...})."""
+    return isinstance(response, dict) and response.get('s') == 'ok' and bool(response.get('id'))
+
 def get_quote_ask_bid(symbol):
     """
     Get current ask and bid prices for a symbol.
     Returns (ask, bid) tuple or (None, None) on error.
     """
-    global fyers
     try:
-        data = {"symbols": f"{symbol}"}
-        response = fyers.quotes(data=data)
+        quote = get_quotes_batch([symbol]).get(symbol)
         
-        if 'd' in response and len(response['d']) > 0:
-            quote_data = response['d'][0].get('v', {})
-            ask = quote_data.get('ask', 0)
-            bid = quote_data.get('bid', 0)
+        if quote is not None:
+            ask = quote.get('ask') or 0
+            bid = quote.get('bid') or 0
             # If ask/bid is 0, try to use LTP as fallback
             if ask == 0:
-                ask = quote_data.get('lp', None)
+                ask = quote.get('ltp')
             if bid == 0:
-                bid = quote_data.get('lp', None)
+                bid = quote.get('ltp')
             return ask, bid
         else:
             return None, None
@@ -611,13 +772,23 @@ def modify_order(order_id, order_type, limit_price, qty=None):
 
 def get_order_by_id(order_id):
     """
-    Find an order in the orderbook by order ID.
-    Returns order dict if found, None otherwise.
+    Find an order by order ID.
+    Uses the order store (fed by the order websocket) when one is attached and falls back
+    to scanning the orderbook. Returns order dict if found, None otherwise.
     """
     global fyers
+    if order_store is not None:
+        order = order_store.get(order_id)
+        if order is not None:
+            return order
+    
     try:
         orderbook = fyers.orderbook()
         
+        if order_store is not None:
+            order_store.reconcile(orderbook)
+            return order_store.get(order_id)
+        
         if orderbook and 'orderBook' in orderbook:
             for order in orderbook['orderBook']:
                 # Check both 'id' and 'id_fyers' fields
@@ -629,3 +800,38 @@ def get_order_by_id(order_id):
         print(f"Error fetching orderbook for order {order_id}: {e}")
         return None
 
+
+def fyres_order_websocket(store, socket_class=None):
+    """
+    Connect the Fyers order websocket and feed every order update into the given OrderStore.
+    Pass socket_class=OrderStore.LocalOrderSocket to run without a broker connection.
+    Returns the socket object.
+    """
+    global access_token, order_store
+    order_store = store
+    
+    if socket_class is None:
+        from fyers_apiv3.FyersWebsocket import order_ws
+        socket_class = order_socket_class or order_ws.FyersOrderSocket
+
+    def onerror(message):
+        print("Order socket error:", message)
+
+    def onclose(message):
+        print("Order socket closed:", message)
+
+    def onopen():
+        order_socket.subscribe(data_type="OnOrders")
+        order_socket.keep_running()
+
+    order_socket = socket_class(
+        access_token=access_token,  # Access token in the format "appid:accesstoken"
+        write_to_file=False,
+        log_path="",
+        on_connect=onopen,
+        on_close=onclose,
+        on_error=onerror,
+        on_orders=store.on_order_message,
+    )
+    order_socket.connect()
+    return order_socket
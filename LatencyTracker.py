@@ -0,0 +1,220 @@
+import sys
+import json
+import time
+import threading
+import numpy as np
+
+from LogWriter import BufferedLogWriter
+
+# Stages of a tick-driven order, in order. Each span stores the epoch time of every stage it reached.
+STAGES = ['received', 'applied', 'evaluated', 'submitted', 'sent', 'acknowledged']
+
+# Histogram name -> (from stage, to stage)
+STAGE_PAIRS = {
+    'tick_to_apply': ('received', 'applied'),
+    'apply_to_evaluate': ('applied', 'evaluated'),
+    'evaluate_to_submit': ('evaluated', 'submitted'),
+    'submit_to_send': ('submitted', 'sent'),
+    'broker_response': ('sent', 'acknowledged'),
+    'tick_to_send': ('received', 'sent'),
+    'tick_to_ack': ('received', 'acknowledged'),
+}
+
+TRACE_PATH = 'LatencyTrace.jsonl'
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of latencies in microseconds.
+
+    Values below 2 * 2**sub_bucket_bits are counted exactly; above that every power of two is
+    split into 2**sub_bucket_bits buckets, so percentiles are accurate to about 1/2**sub_bucket_bits
+    (3% with the default 5 bits) from 1 microsecond up to hours, in a fixed 2048-slot array.
+    """
+
+    def __init__(self, sub_bucket_bits=5):
+        self.sub_bits = sub_bucket_bits
+        self.sub_count = 1 << sub_bucket_bits
+        self.counts = np.zeros(64 * self.sub_count, dtype=np.int64)
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+    def bucket_index(self, value):
+        if value < 2 * self.sub_count:
+            return value
+        shift = value.bit_length() - (self.sub_bits + 1)
+        return (shift + 1) * self.sub_count + (value >> shift) - self.sub_count
+
+    def bucket_upper(self, index):
+        """Highest value counted in bucket `index`."""
+        if index < 2 * self.sub_count:
+            return index
+        shift = index // self.sub_count - 1
+        sub = index % self.sub_count + self.sub_count
+        return ((sub + 1) << shift) - 1
+
+    def record(self, value_us):
+        value = max(0, int(value_us))
+        self.counts[self.bucket_index(value)] += 1
+        self.total += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        """Latency (microseconds) at or below which `percent` % of the recorded values fall."""
+        if self.total == 0:
+            return 0
+        rank = max(1, int(np.ceil(self.total * percent / 100.0)))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self.bucket_upper(index), self.max)
+
+    def summary(self):
+        return {
+            'count': self.total,
+            'mean_us': self.sum / self.total if self.total else 0.0,
+            'p50_us': self.percentile(50),
+            'p90_us': self.percentile(90),
+            'p99_us': self.percentile(99),
+            'p999_us': self.percentile(99.9),
+            'max_us': self.max,
+        }
+
+
+class LatencyTracker:
+    """
+    Records when each tick reaches each stage of the trading path and turns order spans into
+    latency histograms.
+
+    The websocket stamps a tick as 'received'; UpdateData / dispatch_tick call tick_applied();
+    monitor_entry_exit calls begin_evaluation() per row; submit_*_order opens a span that the
+    order gateway completes with 'sent' and 'acknowledged'. Finished spans go to the
+    histograms and, one JSON object per line, to the trace file.
+    """
+
+    def __init__(self, trace_path=TRACE_PATH, enabled=True):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {name: LatencyHistogram() for name in list(STAGE_PAIRS) + ['candle_close_to_signal']}
+        # symbol -> (received, applied) of the latest tick applied on the trading thread
+        self.tick_context = {}
+        # (unique_key, symbol, evaluated) of the row monitor_entry_exit is looking at
+        self.evaluation = None
+        self.trace_writer = BufferedLogWriter(trace_path, timestamps=False) if trace_path else None
+        self.next_span_id = 1
+
+    def tick_applied(self, symbol, received, applied=None):
+        if self.enabled:
+            self.tick_context[symbol] = (received, applied or time.time())
+
+    def reset_ticks(self):
+        """Forget applied ticks, so orders from a timer pass are not attributed to an old tick."""
+        self.tick_context.clear()
+
+    def begin_evaluation(self, unique_key, symbol):
+        if self.enabled:
+            self.evaluation = (unique_key, symbol, time.time())
+
+    def start_span(self, symbol, order_tag, side):
+        """Open an order span at submit time, carrying the tick and evaluation stages that led to it."""
+        if not self.enabled:
+            return None
+        span = {'symbol': symbol, 'order_tag': order_tag, 'side': side}
+        received, applied = self.tick_context.get(symbol, (None, None))
+        span['received'] = received
+        span['applied'] = applied
+        if self.evaluation is not None and self.evaluation[1] == symbol:
+            span['unique_key'] = self.evaluation[0]
+            span['evaluated'] = self.evaluation[2]
+        span['submitted'] = time.time()
+        with self.lock:
+            span['span_id'] = self.next_span_id
+            self.next_span_id += 1
+        return span
+
+    def timed_send(self, span, send):
+        """Wrap a gateway send callable so it stamps 'sent' / 'acknowledged' and finishes the span."""
+        if span is None:
+            return send
+
+        def send_and_record():
+            span['sent'] = time.time()
+            response = None
+            try:
+                response = send()
+                return response
+            finally:
+                span['acknowledged'] = time.time()
+                if isinstance(response, dict):
+                    span['order_id'] = response.get('id')
+                    span['status'] = response.get('s')
+                self.finish_span(span)
+        return send_and_record
+
+    def finish_span(self, span):
+        with self.lock:
+            for name, (start, end) in STAGE_PAIRS.items():
+                if span.get(start) is not None and span.get(end) is not None:
+                    self.histograms[name].record((span[end] - span[start]) * 1e6)
+        if self.trace_writer is not None:
+            self.trace_writer.write(json.dumps({'type': 'order', **span}))
+
+    def record_signal(self, symbol, candle_close, detected=None):
+        """Candle close (epoch seconds) -> [SIGNAL DETECTED] latency."""
+        if not self.enabled:
+            return
+        detected = detected or time.time()
+        with self.lock:
+            self.histograms['candle_close_to_signal'].record((detected - candle_close) * 1e6)
+        if self.trace_writer is not None:
+            self.trace_writer.write(json.dumps({'type': 'signal', 'symbol': symbol,
+                                                'candle_close': candle_close, 'detected': detected}))
+
+    def summary(self):
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in self.histograms.items() if histogram.total}
+
+    def close(self):
+        if self.trace_writer is not None:
+            self.trace_writer.close()
+
+
+def histograms_from_trace(path):
+    """Rebuild the stage histograms from a trace file written by LatencyTracker."""
+    tracker = LatencyTracker(trace_path=None)
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('type') == 'order':
+                tracker.finish_span(record)
+            elif record.get('type') == 'signal':
+                tracker.record_signal(record['symbol'], record['candle_close'], record['detected'])
+    return tracker.summary()
+
+
+def print_summary(summary):
+    print(f"{'Stage':<24} {'Count':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'p99.9 ms':>9} {'max ms':>9}")
+    print("-" * 82)
+    for name in list(STAGE_PAIRS) + ['candle_close_to_signal']:
+        stats = summary.get(name)
+        if not stats:
+            continue
+        print(f"{name:<24} {stats['count']:>7} {stats['p50_us'] / 1000:>9.3f} {stats['p90_us'] / 1000:>9.3f} "
+              f"{stats['p99_us'] / 1000:>9.3f} {stats['p999_us'] / 1000:>9.3f} {stats['max_us'] / 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    # Summarise a latency trace: python LatencyTracker.py [LatencyTrace.jsonl]
+    path = sys.argv[1] if len(sys.argv) > 1 else TRACE_PATH
+    try:
+        print_summary(histograms_from_trace(path))
+    except FileNotFoundError:
+        print(f"No latency trace at {path}")
@@ -0,0 +1,112 @@
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+import pytz
+
+
+class BufferedLogWriter:
+    """
+    Append-only log file written by a background thread.
+
+    write() only puts the line on a bounded queue; the writer thread batches queued lines into
+    one write every flush_interval seconds, immediately when a write asks for flush=True
+    (order events), and on close() / interpreter exit.
+    Lines are stamped with the time write() was called, formatted as in OrderLog.txt
+    (timestamps=False writes them as given, e.g. for JSON-lines files).
+    """
+
+    def __init__(self, path, max_queue=10000, flush_interval=1.0, timezone='Asia/Kolkata', timestamps=True):
+        self.path = path
+        self.timestamps = timestamps
+        self.flush_interval = flush_interval
+        self.tz = pytz.timezone(timezone)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.flush_requested = threading.Event()
+        self.flushed = threading.Condition()
+        self.lines_written = 0
+        self.closed = False
+        self.thread = None
+        self.start_lock = threading.Lock()
+        # Timestamp string cache: lines within the same second share one strftime
+        self.last_second = None
+        self.last_stamp = ""
+
+    def start(self):
+        with self.start_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self.thread.start()
+                atexit.register(self.close)
+
+    def write(self, message, flush=False):
+        """
+        Queue one log line.
+
+        Args:
+            message: text of the line ("" writes an empty separator line)
+            flush: write it out now instead of on the next timer tick
+        """
+        if self.thread is None:
+            self.start()
+        # A full queue means the disk has stalled; block rather than lose order-log lines
+        self.queue.put((time.time(), message))
+        if flush:
+            self.flush_requested.set()
+
+    def flush(self, timeout=5.0):
+        """Write out everything queued so far and wait (up to timeout seconds) until it is on disk."""
+        if self.thread is None:
+            return
+        with self.flushed:
+            target = self.lines_written + self.queue.qsize()
+            self.flush_requested.set()
+            self.flushed.wait_for(lambda: self.lines_written >= target, timeout=timeout)
+
+    def close(self):
+        """Flush remaining lines and stop the writer thread."""
+        if self.thread is None or self.closed:
+            return
+        self.closed = True
+        self.flush_requested.set()
+        self.thread.join(timeout=5.0)
+
+    def _format(self, timestamp, message):
+        if message.strip() == "":
+            return '\n'
+        if not self.timestamps:
+            return f"{message}\n"
+        second = int(timestamp)
+        if second != self.last_second:
+            self.last_second = second
+            self.last_stamp = datetime.fromtimestamp(second, self.tz).strftime('%Y-%m-%d %H:%M:%S')
+        return f"[{self.last_stamp}] {message}\n"
+
+    def _run(self):
+        with open(self.path, 'a') as file:
+            while True:
+                self.flush_requested.wait(self.flush_interval)
+                self.flush_requested.clear()
+
+                lines = []
+                while True:
+                    try:
+                        timestamp, message = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    lines.append(self._format(timestamp, message))
+
+                if lines:
+                    try:
+                        file.write(''.join(lines))
+                        file.flush()
+                    except Exception as e:
+                        print(f"Error writing {self.path}: {e}")
+
+                with self.flushed:
+                    self.lines_written += len(lines)
+                    self.flushed.notify_all()
+
+                if self.closed and self.queue.empty():
+                    return
@@ -0,0 +1,135 @@
+import threading
+
+# Per-symbol handling of ticks on the hub
+FULL = 'full'  # FyresIntegration.handle_tick_message: shared_data, tick handlers, tick queue
+LITE = 'lite'  # LTP into the lite price dict (shared_data_2) only
+
+
+class MarketDataHub:
+    """
+    One data-socket connection shared by every market-data consumer of the process.
+
+    Symbols are subscribed and unsubscribed at runtime, each in lite or full mode (a symbol can
+    be in both). Fyers picks lite/full per connection, so the connection runs in full mode and
+    the mode decides what is done with a symbol's ticks here; ticks of symbols nobody wants any
+    more (in flight while unsubscribing) are dropped after one dict lookup.
+
+    Subscriptions made before the socket is open are sent from its on_connect callback, which
+    also re-sends all of them after a reconnect.
+    """
+
+    def __init__(self, socket_class, access_token, on_full_tick, lite_prices):
+        """
+        Args:
+            socket_class: FyersDataSocket or a look-alike (e.g. SimulatedDataSocket)
+            access_token: token the socket authenticates with
+            on_full_tick: callable(message) for ticks of full-mode symbols
+            lite_prices: dict that receives symbol -> LTP for lite-mode symbols
+        """
+        self.socket_class = socket_class
+        self.access_token = access_token
+        self.on_full_tick = on_full_tick
+        self.lite_prices = lite_prices
+        self.lock = threading.Lock()
+        # symbol -> frozenset of modes (replaced, never mutated, so on_message reads without the lock)
+        self.modes = {}
+        self.socket = None
+        self.connected = False
+        self.running = False
+        self.dropped = 0
+
+    def subscribe(self, symbols, mode=FULL):
+        """
+        Start receiving `symbols` in `mode` (connects the socket on first use).
+
+        Returns:
+            list of symbols newly subscribed on the socket
+        """
+        added = []
+        with self.lock:
+            for symbol in symbols:
+                modes = self.modes.get(symbol)
+                if modes is None:
+                    self.modes[symbol] = frozenset((mode,))
+                    added.append(symbol)
+                elif mode not in modes:
+                    self.modes[symbol] = modes | {mode}
+            # Before the socket is open on_open subscribes everything in self.modes
+            send_now = self.connected and added
+        if self.socket is None:
+            self.connect()
+        elif send_now:
+            self.socket.subscribe(symbols=added, data_type="SymbolUpdate")
+        return added
+
+    def unsubscribe(self, symbols, mode=FULL):
+        """
+        Stop receiving `symbols` in `mode`; a symbol left with no mode is unsubscribed on the socket.
+
+        Returns:
+            list of symbols unsubscribed on the socket
+        """
+        removed = []
+        with self.lock:
+            for symbol in symbols:
+                modes = self.modes.get(symbol)
+                if modes is None or mode not in modes:
+                    continue
+                modes = modes - {mode}
+                if modes:
+                    self.modes[symbol] = modes
+                else:
+                    del self.modes[symbol]
+                    removed.append(symbol)
+            send_now = self.connected and removed
+        if send_now:
+            self.socket.unsubscribe(symbols=removed, data_type="SymbolUpdate")
+        return removed
+
+    def subscriptions(self, mode=None):
+        """Subscribed symbols (only those in `mode` when given)."""
+        return [symbol for symbol, modes in list(self.modes.items()) if mode is None or mode in modes]
+
+    def connect(self):
+        self.socket = self.socket_class(
+            access_token=self.access_token,
+            log_path="",
+            litemode=False,
+            write_to_file=False,
+            reconnect=True,
+            on_connect=self.on_open,
+            on_close=self.on_close,
+            on_error=self.on_error,
+            on_message=self.on_message,
+        )
+        self.socket.connect()
+
+    def on_open(self):
+        with self.lock:
+            symbols = list(self.modes)
+            self.connected = True
+        if symbols:
+            self.socket.subscribe(symbols=symbols, data_type="SymbolUpdate")
+        if not self.running:
+            self.running = True
+            self.socket.keep_running()
+
+    def on_close(self, message):
+        self.connected = False
+        print("Connection closed:", message)
+
+    def on_error(self, message):
+        print("Error:", message)
+
+    def on_message(self, message):
+        modes = self.modes.get(message.get('symbol'))
+        if modes is None:
+            if 'ltp' in message:
+                self.dropped += 1
+            return
+        if 'ltp' not in message:
+            return
+        if LITE in modes:
+            self.lite_prices[message['symbol']] = message['ltp']
+        if FULL in modes:
+            self.on_full_tick(message)
@@ -0,0 +1,230 @@
+import os
+import sys
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+import Strategy
+from Backtest import load_candles, prepare_signals, simulate_day, pnl_stats
+
+OPTIMIZER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "optimizer")
+
+# TradeSettings.csv column order (EntryOffset is optional, read by get_user_settings)
+SETTINGS_COLUMNS = [
+    'Symbol', 'Timeframe', 'EntryLots', 'SL1Points', 'Sl2Points', 'Sl3Points', 'Sl4Points',
+    'Tgt1Lots', 'Tgt2Lots', 'Tgt3Lots', 'Tgt4Lots', 'T1Percent', 'T2Percent', 'T3Percent', 'T4Percent',
+    'StartTime', 'StopTime', 'Market', 'EntryOffset',
+]
+
+# Values tried per column. Timeframe/StartTime/StopTime stay fixed per run (signals depend on them).
+DEFAULT_SPACE = {
+    'EntryOffset': [0.15, 0.2, 0.2611, 0.3, 0.35],
+    'T1Percent': [5.0, 8.0, 10.0, 13.6, 16.0, 20.0],
+    'T2Percent': [8.0, 10.0, 13.6, 15.0, 20.0],
+    'T3Percent': [10.0, 13.6, 15.0, 20.0],
+    'T4Percent': [12.0, 16.0, 20.0, 25.0],
+    'SL1Points': [3.0, 5.0, 8.0, 10.0],
+    'Sl2Points': [3.0, 5.0, 8.0],
+    'Sl3Points': [3.0, 5.0, 8.0],
+    'Sl4Points': [3.0, 5.0, 8.0],
+}
+
+# Worker-side state: candle arrays mapped from the parent's shared memory
+worker_candles = None
+worker_signals = None
+worker_base = None
+worker_segments = []
+
+
+def share_candles(candles):
+    """
+    Copy candle arrays into shared memory once, so workers map them read-only instead of
+    receiving a pickled copy each.
+
+    Returns:
+        (segments, spec): SharedMemory objects to close/unlink later, and the spec passed to workers
+    """
+    ts = np.ascontiguousarray(candles['ts'], dtype=np.int64)
+    prices = np.ascontiguousarray(np.vstack([candles[name] for name in ('open', 'high', 'low', 'close', 'volume')]),
+                                  dtype=np.float64)
+    segments = []
+    spec = []
+    for array in (ts, prices):
+        segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+        segments.append(segment)
+        spec.append((segment.name, array.shape, array.dtype.str))
+    return segments, spec
+
+
+def init_worker(spec, base_params):
+    """Process pool initializer: attach the shared candle arrays and precompute the signal days."""
+    global worker_candles, worker_signals, worker_base, worker_segments
+    arrays = []
+    for name, shape, dtype in spec:
+        segment = shared_memory.SharedMemory(name=name)
+        worker_segments.append(segment)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+        array.flags.writeable = False
+        arrays.append(array)
+    ts, prices = arrays
+    worker_candles = {'ts': ts, 'open': prices[0], 'high': prices[1], 'low': prices[2],
+                      'close': prices[3], 'volume': prices[4]}
+    worker_base = base_params
+    worker_signals = prepare_signals(worker_candles, base_params)
+
+
+def evaluate(candles, signals, params):
+    """Backtest one parameter set and return its stats (no trades frame, for speed)."""
+    pnl = []
+    for i, d, day_end, stop_index in signals:
+        trade = simulate_day(candles, i, d, params, day_end, stop_index)
+        if trade['entry_time'] is not None:
+            pnl.append(trade['pnl'])
+    return pnl_stats(np.asarray(pnl, dtype=np.float64), len(signals))
+
+
+def evaluate_batch(combinations):
+    """Worker task: evaluate a list of parameter overrides against the shared candles."""
+    results = []
+    for overrides in combinations:
+        params = dict(worker_base)
+        params.update(overrides)
+        stats = evaluate(worker_candles, worker_signals, params)
+        results.append({**overrides, **stats})
+    return results
+
+
+def grid_combinations(space):
+    """Every combination of the space (cartesian product)."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_combinations(space, count, seed=None):
+    """count random combinations drawn from the space (without repeats when the space is small)."""
+    total = int(np.prod([len(values) for values in space.values()]))
+    if count >= total:
+        return grid_combinations(space)
+    rng = np.random.default_rng(seed)
+    names = list(space)
+    sizes = np.array([len(space[name]) for name in names])
+    flat = rng.choice(total, size=count, replace=False)
+    picks = np.array(np.unravel_index(flat, sizes)).T
+    return [{name: space[name][index] for name, index in zip(names, row)} for row in picks.tolist()]
+
+
+def optimize(candles, base_params, combinations, workers=None, batch_size=64, metric='total_pnl'):
+    """
+    Evaluate parameter combinations in parallel and rank them.
+
+    Args:
+        candles: dict of NumPy arrays from load_candles()
+        base_params: TradeSettings row (result_dict format) providing the fixed columns
+        combinations: list of dicts of column overrides
+        workers: process count (default: all CPU cores)
+        batch_size: combinations per task sent to a worker
+        metric: stats column to rank by (highest first)
+
+    Returns:
+        pandas DataFrame ranked best first
+    """
+    segments, spec = share_candles(candles)
+    try:
+        batches = [combinations[i:i + batch_size] for i in range(0, len(combinations), batch_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=init_worker,
+                                 initargs=(spec, base_params)) as pool:
+            for batch_results in pool.map(evaluate_batch, batches):
+                results.extend(batch_results)
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    ranked = pd.DataFrame(results)
+    if len(ranked):
+        ranked = ranked.sort_values([metric, 'profit_factor'], ascending=False, kind='stable').reset_index(drop=True)
+    return ranked
+
+
+def to_settings_row(base_params, result):
+    """Build a TradeSettings.csv row from the base row and one ranked result."""
+    row = {column: base_params.get(column) for column in SETTINGS_COLUMNS}
+    row['Symbol'] = base_params['Symbol']
+    row.update({column: result[column] for column in SETTINGS_COLUMNS if column in result})
+    return row
+
+
+def write_settings_row(row, base_params, csv_path='TradeSettings.csv'):
+    """
+    Replace the TradeSettings.csv row that base_params was loaded from by row. Adds the
+    EntryOffset column when the file lacks it.
+
+    The row is found by its unique_key ("<Symbol>_<file row index>"), not by Symbol and
+    Timeframe, which other rows may share. The file is replaced atomically, so the running
+    strategy never reads half of it.
+
+    Raises:
+        ValueError: the file no longer has that row (it was edited since it was loaded)
+    """
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    df.columns = df.columns.str.strip()
+    index = int(base_params['unique_key'].rsplit('_', 1)[1])
+    if (index not in df.index or df.at[index, 'Symbol'].strip() != str(base_params['Symbol'])
+            or float(df.at[index, 'Timeframe']) != float(base_params['Timeframe'])):
+        raise ValueError(f"{csv_path}: row {index + 2} is no longer {base_params['Symbol']} "
+                         f"{base_params['Timeframe']} min, not written")
+    if 'EntryOffset' not in df.columns:
+        df['EntryOffset'] = str(Strategy.ENTRY_OFFSET)
+    for column in df.columns:
+        df.loc[index, column] = '' if row.get(column) is None else str(row[column])
+
+    temp_path = f"{csv_path}.tmp"
+    df.to_csv(temp_path, index=False)
+    os.replace(temp_path, csv_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parameter sweep of a TradeSettings.csv row over archived candles")
+    parser.add_argument("symbol", help="Symbol column of the TradeSettings.csv row to optimise")
+    parser.add_argument("--samples", type=int, default=2000, help="random combinations to try (0 = full grid)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--metric", default="total_pnl", help="stats column to rank by")
+    parser.add_argument("--top", type=int, default=20, help="rows of the ranking to print")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--write", action="store_true", help="write the best row back to TradeSettings.csv")
+    args = parser.parse_args()
+
+    Strategy.get_user_settings()
+    rows = [params for params in Strategy.result_dict.values() if params['Symbol'] == args.symbol]
+    if not rows:
+        print(f"{args.symbol} is not in TradeSettings.csv")
+        sys.exit(1)
+    base_params = rows[0]
+
+    candles = load_candles(base_params['Symbol'], base_params['Timeframe'])
+    combinations = (grid_combinations(DEFAULT_SPACE) if args.samples == 0
+                    else random_combinations(DEFAULT_SPACE, args.samples, args.seed))
+
+    started = time.perf_counter()
+    ranked = optimize(candles, base_params, combinations, workers=args.workers, metric=args.metric)
+    elapsed = time.perf_counter() - started
+    print(f"{len(combinations)} combinations over {len(candles['ts'])} bars in {elapsed:.1f} s")
+
+    os.makedirs(OPTIMIZER_DIR, exist_ok=True)
+    out_path = os.path.join(OPTIMIZER_DIR, f"{base_params['Symbol']}-tf{base_params['Timeframe']}.csv")
+    ranked.to_csv(out_path, index=False)
+    print(ranked.head(args.top).to_string())
+    print(f"Full ranking saved to {out_path}")
+
+    if args.write and len(ranked):
+        best = to_settings_row(base_params, ranked.iloc[0].to_dict())
+        try:
+            write_settings_row(best, base_params)
+            print(f"TradeSettings.csv updated with the best {args.symbol} row: {best}")
+        except ValueError as e:
+            print(e)
@@ -0,0 +1,76 @@
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class OrderGateway:
+    """
+    Sends orders on a thread pool so a slow broker call never blocks the trading loop.
+
+    Orders are queued per symbol: orders of the same symbol are sent one after another in
+    submission order, orders of different symbols are sent in parallel.
+    When the broker answers, on_ack(response) is handed to `dispatch` (so the caller can run it
+    on its own thread), or called directly on the worker thread when no dispatch is given.
+    """
+
+    def __init__(self, max_workers=8, dispatch=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="order")
+        self.dispatch = dispatch
+        self.lock = threading.Lock()
+        # symbol -> deque of (send, on_ack) waiting behind the order currently in flight
+        self.lanes = {}
+
+    def submit(self, symbol, send, on_ack=None):
+        """
+        Queue an order.
+
+        Args:
+            symbol: symbol the order is for (orders of one symbol keep their order)
+            send: callable performing the broker call and returning its response
+            on_ack: optional callable(response) run once the broker has answered
+        """
+        with self.lock:
+            lane = self.lanes.get(symbol)
+            if lane is not None:
+                # A worker is already draining this symbol; it will pick the order up
+                lane.append((send, on_ack))
+                return
+            self.lanes[symbol] = deque([(send, on_ack)])
+        self.executor.submit(self._drain_lane, symbol)
+
+    def _drain_lane(self, symbol):
+        while True:
+            with self.lock:
+                lane = self.lanes[symbol]
+                if not lane:
+                    del self.lanes[symbol]
+                    return
+                send, on_ack = lane.popleft()
+
+            try:
+                response = send()
+            except Exception as e:
+                print(f"[ORDER GATEWAY] Order for {symbol} failed: {e}")
+                traceback.print_exc()
+                response = None
+
+            if on_ack is None:
+                continue
+            try:
+                if self.dispatch is not None:
+                    self.dispatch(on_ack, response)
+                else:
+                    on_ack(response)
+            except Exception as e:
+                print(f"[ORDER GATEWAY] Acknowledgement handler for {symbol} failed: {e}")
+                traceback.print_exc()
+
+    def pending_count(self):
+        """Number of orders queued or in flight."""
+        with self.lock:
+            return sum(len(lane) for lane in self.lanes.values()) + len(self.lanes)
+
+    def shutdown(self, wait=True):
+        """Stop accepting work; with wait=True, block until every queued order has been sent."""
+        self.executor.shutdown(wait=wait)
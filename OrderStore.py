@@ -0,0 +1,127 @@
+import threading
+
+# Fyers order status codes
+ORDER_STATUS = {
+    1: "CANCELLED",
+    2: "FILLED",
+    3: "FOR_FUTURE_USE",
+    4: "TRANSIT",
+    5: "REJECTED",
+    6: "PENDING",
+    7: "EXPIRED",
+}
+
+
+class OrderStore:
+    """
+    Local copy of the broker order book, indexed by order id and by order tag.
+
+    Filled by order-update push messages (Fyers order websocket) and reconciled now and then
+    with a full orderbook() snapshot. on_update(order, previous_status) is called whenever an
+    order is first seen or its status changes.
+    """
+
+    def __init__(self, on_update=None):
+        self.lock = threading.Lock()
+        # order id -> order dict
+        self.by_id = {}
+        # order tag -> list of order ids (oldest first)
+        self.by_tag = {}
+        self.on_update = on_update
+
+    def update(self, order):
+        """Insert or merge one order dict (orderbook or websocket format)."""
+        order_id = order.get('id')
+        if order_id is None:
+            return
+        order_id = str(order_id)
+
+        with self.lock:
+            existing = self.by_id.get(order_id)
+            previous_status = existing.get('status') if existing else None
+            if existing:
+                existing.update(order)
+                order = existing
+            else:
+                order = dict(order)
+                self.by_id[order_id] = order
+                tag = order.get('orderTag')
+                if tag:
+                    self.by_tag.setdefault(tag, []).append(order_id)
+            # Listeners get a snapshot so later updates do not change what they see
+            snapshot = dict(order)
+
+        if self.on_update is not None and (existing is None or snapshot.get('status') != previous_status):
+            self.on_update(snapshot, previous_status)
+
+    def on_order_message(self, message):
+        """Order websocket callback: message is {'s': 'ok', 'orders': {...}}."""
+        order = message.get('orders') if isinstance(message, dict) else None
+        if isinstance(order, dict):
+            self.update(order)
+
+    def reconcile(self, orderbook_response):
+        """Merge a fyers.orderbook() snapshot (catches updates missed while the socket was down)."""
+        if not orderbook_response or 'orderBook' not in orderbook_response:
+            return
+        for order in orderbook_response['orderBook']:
+            self.update(order)
+
+    def get(self, order_id):
+        """Return the order with this id (also matched against 'id_fyers'), or None."""
+        order_id = str(order_id)
+        with self.lock:
+            order = self.by_id.get(order_id)
+            if order is None:
+                for candidate in self.by_id.values():
+                    if str(candidate.get('id_fyers', '')) == order_id:
+                        return candidate
+            return order
+
+    def get_by_tag(self, tag):
+        """Return all orders placed with this order tag, oldest first."""
+        with self.lock:
+            return [self.by_id[order_id] for order_id in self.by_tag.get(tag, ())]
+
+
+class LocalOrderSocket:
+    """
+    Stand-in for FyersOrderSocket used for offline testing.
+    Takes the same callbacks; push_order() delivers an order update as the real socket would.
+    """
+
+    def __init__(self, access_token=None, write_to_file=False, log_path="", on_connect=None,
+                 on_close=None, on_error=None, on_orders=None, on_trades=None, on_positions=None,
+                 on_general=None, reconnect=True):
+        self.on_connect = on_connect
+        self.on_close = on_close
+        self.on_orders = on_orders
+        self.connected = False
+        self.subscriptions = set()
+
+    def connect(self):
+        self.connected = True
+        if self.on_connect is not None:
+            self.on_connect()
+
+    def subscribe(self, data_type):
+        self.subscriptions.update(data_type.split(","))
+
+    def unsubscribe(self, data_type):
+        self.subscriptions.difference_update(data_type.split(","))
+
+    def keep_running(self):
+        pass
+
+    def is_connected(self):
+        return self.connected
+
+    def close_connection(self):
+        self.connected = False
+        if self.on_close is not None:
+            self.on_close({"s": "ok", "message": "closed"})
+
+    def push_order(self, order):
+        """Deliver an order update (dict in Fyers order-socket format) to on_orders."""
+        if self.connected and "OnOrders" in self.subscriptions and self.on_orders is not None:
+            self.on_orders({"s": "ok", "orders": order})
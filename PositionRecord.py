@@ -0,0 +1,151 @@
+from array import array
+from enum import Enum
+
+
+class PositionStatus(Enum):
+    """Where a TradeSettings row is in its one-trade-per-day life cycle (values are the log/JSON names)."""
+    NO_SIGNAL = 'no_signal'
+    WAITING_ENTRY = 'waiting_entry'
+    ENTRY_PENDING = 'entry_pending'
+    IN_POSITION = 'in_position'
+    T1_HIT = 't1_hit'
+    T2_HIT = 't2_hit'
+    T3_HIT = 't3_hit'
+    T4_HIT = 't4_hit'
+    EXITED_SL1 = 'exited_sl1'
+    EXITED_SL2 = 'exited_sl2'
+    EXITED_SL3 = 'exited_sl3'
+    EXITED_SL4 = 'exited_sl4'
+    SQUARED_OFF_STOPTIME = 'squared_off_stoptime'
+    EXPIRED_STOPTIME = 'expired_stoptime'
+
+
+# Open-position states, in ladder order: step i trails stop SL(i+1) (InitialSL on step 0) towards T(i+1)
+LADDER_STATES = (PositionStatus.IN_POSITION, PositionStatus.T1_HIT, PositionStatus.T2_HIT, PositionStatus.T3_HIT)
+LADDER_STEP = {state: step for step, state in enumerate(LADDER_STATES)}
+
+# State entered when the stop / target of each ladder step is hit
+STOP_EXIT_STATES = (PositionStatus.EXITED_SL1, PositionStatus.EXITED_SL2, PositionStatus.EXITED_SL3, PositionStatus.EXITED_SL4)
+TARGET_HIT_STATES = (PositionStatus.T1_HIT, PositionStatus.T2_HIT, PositionStatus.T3_HIT, PositionStatus.T4_HIT)
+
+# Done for the day (no further entry or exit checks)
+CLOSED_STATES = frozenset(STOP_EXIT_STATES) | {PositionStatus.T4_HIT, PositionStatus.SQUARED_OFF_STOPTIME,
+                                               PositionStatus.EXPIRED_STOPTIME}
+
+# States reached only after the entry order was confirmed
+ENTERED_STATES = frozenset(LADDER_STATES) | (CLOSED_STATES - {PositionStatus.EXPIRED_STOPTIME})
+
+
+class PositionRecord:
+    """
+    Per-row position state (one per unique_key in positions_state).
+
+    Times are epoch seconds. Levels are kept as two 4-slot ladders: targets[i] is T(i+1)
+    and stops[i] is SL(i+1).
+    """
+
+    __slots__ = ('state', 'direction', 'market_type', 'signal_time', 'signal_candle', 'sch', 'scl',
+                 'entry', 'initial_sl', 'targets', 'stops', 'entry_price', 'entry_time', 'remaining_lots', 'targets_hit',
+                 'last_candle_1', 'last_candle_2', 'first_candle_logged', 'candle_update_error_logged',
+                 'next_check_time')
+
+    def __init__(self):
+        self.state = PositionStatus.NO_SIGNAL
+        self.direction = None
+        self.market_type = None
+        self.signal_time = None
+        self.signal_candle = None
+        self.sch = None
+        self.scl = None
+        self.entry = None
+        self.initial_sl = None
+        self.targets = array('d', (0.0, 0.0, 0.0, 0.0))
+        self.stops = array('d', (0.0, 0.0, 0.0, 0.0))
+        self.entry_price = None
+        self.entry_time = None
+        self.remaining_lots = 0
+        # Targets reached so far (0-4)
+        self.targets_hit = 0
+        # Last two completed candles (dashboard) and once-per-day log flags
+        self.last_candle_1 = None
+        self.last_candle_2 = None
+        self.first_candle_logged = False
+        self.candle_update_error_logged = False
+        # Epoch seconds of the next timeframe signal check
+        self.next_check_time = None
+
+    @property
+    def signal_detected(self):
+        return self.state is not PositionStatus.NO_SIGNAL
+
+    @property
+    def entry_taken(self):
+        return self.state in ENTERED_STATES
+
+    @property
+    def exited_today(self):
+        return self.state in CLOSED_STATES
+
+    def set_levels(self, levels):
+        """Copy a calculate_levels() dict into the ladders."""
+        targets = self.targets
+        stops = self.stops
+        targets[0], targets[1], targets[2], targets[3] = levels['T1'], levels['T2'], levels['T3'], levels['T4']
+        stops[0], stops[1], stops[2], stops[3] = levels['SL1'], levels['SL2'], levels['SL3'], levels['SL4']
+
+    def to_dict(self):
+        """Plain dict of the record (the old positions_state entry layout, times as epoch seconds)."""
+        targets_hit = self.targets_hit
+        return {
+            'position_state': self.state.value,
+            'signal_detected': self.signal_detected,
+            'entry_taken': self.entry_taken,
+            'exited_today': self.exited_today,
+            'squared_off_at_stoptime': self.state is PositionStatus.SQUARED_OFF_STOPTIME,
+            'direction': self.direction,
+            'market_type': self.market_type,
+            'signal_time': self.signal_time,
+            'signal_candle': self.signal_candle,
+            'SCH': self.sch,
+            'SCL': self.scl,
+            'Entry': self.entry,
+            'InitialSL': self.initial_sl,
+            'T1': self.targets[0], 'T2': self.targets[1], 'T3': self.targets[2], 'T4': self.targets[3],
+            'SL1': self.stops[0], 'SL2': self.stops[1], 'SL3': self.stops[2], 'SL4': self.stops[3],
+            't1_hit': targets_hit >= 1, 't2_hit': targets_hit >= 2, 't3_hit': targets_hit >= 3, 't4_hit': targets_hit >= 4,
+            'entry_price': self.entry_price,
+            'entry_time': self.entry_time,
+            'remaining_lots': self.remaining_lots,
+            'last_candle_1': self.last_candle_1,
+            'last_candle_2': self.last_candle_2,
+            'first_candle_logged': self.first_candle_logged,
+            'next_check_time': self.next_check_time,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a record from to_dict() output."""
+        record = cls()
+        record.state = PositionStatus(data.get('position_state', PositionStatus.NO_SIGNAL.value))
+        record.direction = data.get('direction')
+        record.market_type = data.get('market_type')
+        record.signal_time = data.get('signal_time')
+        record.signal_candle = data.get('signal_candle')
+        record.sch = data.get('SCH')
+        record.scl = data.get('SCL')
+        record.entry = data.get('Entry')
+        record.initial_sl = data.get('InitialSL')
+        if data.get('T1') is not None:
+            record.set_levels(data)
+        record.entry_price = data.get('entry_price')
+        record.entry_time = data.get('entry_time')
+        record.remaining_lots = data.get('remaining_lots', 0)
+        record.targets_hit = sum(1 for name in ('t1_hit', 't2_hit', 't3_hit', 't4_hit') if data.get(name))
+        record.last_candle_1 = data.get('last_candle_1')
+        record.last_candle_2 = data.get('last_candle_2')
+        record.first_candle_logged = data.get('first_candle_logged', False)
+        record.next_check_time = data.get('next_check_time')
+        return record
+
+    def __repr__(self):
+        return f"PositionRecord({self.state.value}, {self.direction}, entry={self.entry}, lots={self.remaining_lots})"
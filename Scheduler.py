@@ -0,0 +1,53 @@
+import heapq
+import itertools
+
+
+class EventScheduler:
+    """
+    Timer heap of (due, kind, key) events for the trading thread.
+
+    Each (kind, key) has at most one live timer: scheduling it again replaces the earlier due
+    time (the old heap entry is skipped when it surfaces). Not thread-safe; only the trading
+    thread schedules and pops.
+    """
+
+    def __init__(self):
+        self.heap = []
+        # (kind, key) -> due of the live timer
+        self.pending = {}
+        self.sequence = itertools.count()
+
+    def schedule(self, due, kind, key=None):
+        self.pending[(kind, key)] = due
+        heapq.heappush(self.heap, (due, next(self.sequence), kind, key))
+
+    def cancel(self, kind, key=None):
+        self.pending.pop((kind, key), None)
+
+    def next_due(self):
+        """Due time of the earliest live timer, or None when nothing is scheduled."""
+        heap = self.heap
+        while heap:
+            due, _, kind, key = heap[0]
+            if self.pending.get((kind, key)) == due:
+                return due
+            heapq.heappop(heap)
+        return None
+
+    def pop_due(self, now):
+        """Remove and return [(due, kind, key)] of every live timer due at or before now, earliest first."""
+        due_events = []
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            due, _, kind, key = heapq.heappop(heap)
+            if self.pending.get((kind, key)) == due:
+                del self.pending[(kind, key)]
+                due_events.append((due, kind, key))
+        return due_events
+
+    def clear(self):
+        self.heap.clear()
+        self.pending.clear()
+
+    def __len__(self):
+        return len(self.pending)
@@ -0,0 +1,347 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import itertools
+import threading
+import traceback
+import _thread
+import multiprocessing
+from functools import partial
+
+from fyers_apiv3 import fyersModel
+
+import FyresIntegration
+import Strategy
+from OrderGateway import OrderGateway
+from OrderStore import OrderStore
+from LatencyTracker import LatencyTracker, print_summary
+from Dashboard import DashboardRenderer
+from SharedLtpTable import SharedLtpTable, TABLE_NAME, DEFAULT_CAPACITY, HEARTBEAT_INTERVAL
+from TradingSchedule import compile_schedules
+
+# Seconds a shard waits for the supervisor to answer an order request
+ORDER_REPLY_TIMEOUT = 30.0
+# Seconds between orderbook reconciles run by the supervisor
+RECONCILE_INTERVAL = 60
+
+
+def assign_shards(result_dict, shard_count):
+    """
+    Split TradeSettings rows into shards. All rows of one FyresSymbol go to the same shard
+    (ticks are routed by symbol and candles are built once per symbol); symbols are placed
+    largest first on the shard with the fewest rows.
+
+    Returns:
+        list of shard_count lists of unique_keys, in TradeSettings order within each shard
+    """
+    groups = {}
+    for unique_key, params in result_dict.items():
+        groups.setdefault(params['FyresSymbol'], []).append(unique_key)
+
+    shards = [[] for _ in range(shard_count)]
+    for keys in sorted(groups.values(), key=len, reverse=True):
+        min(shards, key=len).extend(keys)
+    order = {unique_key: index for index, unique_key in enumerate(result_dict)}
+    return [sorted(keys, key=order.get) for keys in shards]
+
+
+def install_rows(rows):
+    """Make `rows` (unique_key -> params) the rows the Strategy module trades in this process."""
+    Strategy.result_dict = rows
+    Strategy.FyerSymbolList = []
+    Strategy.symbol_index = {}
+    for unique_key, params in rows.items():
+        Strategy.FyerSymbolList.append(params['FyresSymbol'])
+        Strategy.symbol_index.setdefault(params['FyresSymbol'], []).append(unique_key)
+    Strategy.schedule_expiry = compile_schedules(rows)
+    Strategy.scheduler.clear()
+
+
+class RemoteOrderClient:
+    """
+    Stands in for FyresIntegration.place_order inside a shard: the order is sent to the
+    supervisor's gateway and the calling (order gateway) thread waits for the broker response.
+    """
+
+    def __init__(self, shard_id, requests):
+        self.shard_id = shard_id
+        self.requests = requests
+        self.lock = threading.Lock()
+        self.sequence = itertools.count()
+        # request id -> [Event, response]
+        self.waiting = {}
+
+    def place_order(self, symbol, quantity, type, side, price, product_type="INTRADAY", order_tag="tag1"):
+        request_id = next(self.sequence)
+        slot = [threading.Event(), None]
+        with self.lock:
+            self.waiting[request_id] = slot
+        self.requests.put(("place_order", self.shard_id, request_id, {
+            'symbol': symbol, 'quantity': quantity, 'type': type, 'side': side, 'price': price,
+            'product_type': product_type, 'order_tag': order_tag}))
+        if not slot[0].wait(ORDER_REPLY_TIMEOUT):
+            print(f"[SHARD {self.shard_id}] No reply from supervisor for order {order_tag} ({symbol})")
+        with self.lock:
+            self.waiting.pop(request_id, None)
+        return slot[1]
+
+    def resolve(self, request_id, response):
+        with self.lock:
+            slot = self.waiting.get(request_id)
+        if slot is not None:
+            slot[1] = response
+            slot[0].set()
+
+
+class ShardDashboardPublisher:
+    """Takes the place of Strategy.dashboard_renderer in a shard: snapshots go to the supervisor."""
+
+    def __init__(self, shard_id, status_queue):
+        self.shard_id = shard_id
+        self.status_queue = status_queue
+
+    def publish(self, snapshot):
+        try:
+            self.status_queue.put_nowait((self.shard_id, snapshot))
+        except queue.Full:
+            # The supervisor is behind; it will get the next one
+            pass
+
+
+def pump_inbox(inbox, orders):
+    """Shard thread: apply order responses and order updates sent by the supervisor."""
+    while True:
+        message = inbox.get()
+        kind = message[0]
+        try:
+            if kind == "order_response":
+                orders.resolve(message[1], message[2])
+            elif kind == "order_update":
+                Strategy.order_store.update(message[1])
+            elif kind == "stop":
+                _thread.interrupt_main()
+                return
+        except Exception as e:
+            print(f"[SHARD] Error handling {kind} from supervisor: {e}")
+            traceback.print_exc()
+
+
+def run_shard(shard_id, rows, login, table_name, inbox, order_requests, status_queue):
+    """
+    Worker process entry point: trade `rows` with the ordinary Strategy engine.
+
+    The shard makes its own REST calls (history, quotes) with the supervisor's access token and
+    keeps its own candles, positions and timers. It has no data socket: ticks of its symbols
+    are read from the supervisor's shared LTP table. Order updates and order responses come
+    from the supervisor through `inbox`; orders go out through `order_requests` and dashboard
+    snapshots through `status_queue`.
+
+    Args:
+        shard_id: index of the shard
+        rows: unique_key -> params of the rows this shard trades
+        login: {'client_id', 'access_token', 'api_base'} from the supervisor's login
+        table_name: shared memory name of the supervisor's SharedLtpTable
+        inbox, order_requests, status_queue: multiprocessing queues (see ShardSupervisor)
+    """
+    if login.get('api_base'):
+        FyresIntegration.use_api_base(login['api_base'])
+    FyresIntegration.access_token = login['access_token']
+    FyresIntegration.fyers = FyresIntegration.CountingClient(fyersModel.FyersModel(
+        client_id=login['client_id'], is_async=False, token=login['access_token'], log_path=os.getcwd()))
+
+    install_rows(rows)
+    Strategy.positions_state = {}
+    Strategy.latency_tracker.close()
+    Strategy.latency_tracker = LatencyTracker(f"LatencyTrace.shard{shard_id}.jsonl")
+    Strategy.dashboard_renderer = ShardDashboardPublisher(shard_id, status_queue)
+    # Ticks are routed by the shard assignment made at startup, so shards do not reload TradeSettings.csv
+    Strategy.SETTINGS_RELOAD = False
+    # The supervisor reconciles the orderbook once for all shards and forwards the updates
+    Strategy.reconcile_order_store = lambda: None
+    orders = RemoteOrderClient(shard_id, order_requests)
+    FyresIntegration.place_order = orders.place_order
+
+    Strategy.seed_candle_aggregator()
+    threading.Thread(target=pump_inbox, args=(inbox, orders), name="shard-inbox", daemon=True).start()
+    ltp_table = SharedLtpTable.attach(table_name)
+    threading.Thread(target=ltp_table.follow, args=(FyresIntegration.handle_tick_message, Strategy.symbol_index),
+                     name="shard-ltp-table", daemon=True).start()
+    print(f"[SHARD {shard_id}] Monitoring {len(rows)} row(s), {len(Strategy.symbol_index)} symbol(s) (pid {os.getpid()})")
+
+    try:
+        if Strategy.EVENT_DRIVEN_MODE:
+            Strategy.run_event_engine()
+        else:
+            while True:
+                Strategy.main_strategy()
+                time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    Strategy.order_gateway.shutdown(wait=True)
+    Strategy.order_log_writer.close()
+    Strategy.latency_tracker.close()
+    print(f"[SHARD {shard_id}] Stopped")
+    print_summary(Strategy.latency_tracker.summary())
+
+
+class ShardSupervisor:
+    """
+    Runs the TradeSettings rows in shard_count worker processes (see run_shard).
+
+    The supervisor owns the broker connections: the data websocket (ticks are published to a
+    SharedLtpTable the shards read), the order websocket (updates are forwarded by order tag),
+    the orderbook reconcile and one OrderGateway that sends every shard's orders. Shards publish
+    dashboard snapshots back, which are merged into one dashboard here.
+    """
+
+    def __init__(self, result_dict, shard_count):
+        self.result_dict = result_dict
+        self.shard_count = max(1, min(shard_count, len(result_dict) or 1))
+        self.shards = assign_shards(result_dict, self.shard_count)
+        # FyresSymbol -> shard and order tag -> shard
+        self.symbol_shard = {}
+        self.tag_shard = {}
+        for shard_id, keys in enumerate(self.shards):
+            for unique_key in keys:
+                self.symbol_shard[result_dict[unique_key]['FyresSymbol']] = shard_id
+                self.tag_shard[Strategy.make_order_tag(unique_key)] = shard_id
+        # One table per supervisor, so a market-data daemon's table is left alone
+        self.ltp_table = SharedLtpTable.create(f"{TABLE_NAME}_{os.getpid()}",
+                                               max(DEFAULT_CAPACITY, len(self.symbol_shard)))
+        for symbol in self.symbol_shard:
+            self.ltp_table.add_symbol(symbol)
+
+        context = multiprocessing.get_context("spawn")
+        self.inboxes = [context.Queue() for _ in self.shards]
+        self.order_requests = context.Queue()
+        self.status_queue = context.Queue(maxsize=8 * self.shard_count)
+        self.context = context
+        self.processes = []
+
+        self.order_gateway = OrderGateway()
+        self.order_store = OrderStore(on_update=self.route_order_update)
+        self.dashboard_renderer = DashboardRenderer()
+        # shard -> latest dashboard snapshot
+        self.snapshots = {}
+        self.stop_event = threading.Event()
+
+    def start(self, login):
+        """Start the shard processes, the supervisor threads and both websockets."""
+        for shard_id, keys in enumerate(self.shards):
+            rows = {unique_key: self.result_dict[unique_key] for unique_key in keys}
+            process = self.context.Process(
+                target=run_shard, name=f"shard-{shard_id}",
+                args=(shard_id, rows, login, self.ltp_table.segment.name, self.inboxes[shard_id],
+                      self.order_requests, self.status_queue))
+            process.start()
+            self.processes.append(process)
+            print(f"[SUPERVISOR] Shard {shard_id}: {len(keys)} row(s) in process {process.pid}")
+
+        threading.Thread(target=self.serve_orders, name="shard-orders", daemon=True).start()
+        threading.Thread(target=self.collect_snapshots, name="shard-snapshots", daemon=True).start()
+
+        FyresIntegration.add_tick_handler(self.ltp_table.on_message)
+        FyresIntegration.fyres_websocket(list(self.symbol_shard))
+        FyresIntegration.fyres_order_websocket(self.order_store)
+        self.reconcile()
+        self.dashboard_renderer.start()
+        return self
+
+    def route_order_update(self, order, previous_status):
+        """OrderStore callback: forward the update to the shard whose row placed the order."""
+        shard_id = self.tag_shard.get(order.get('orderTag'))
+        if shard_id is not None:
+            self.inboxes[shard_id].put(("order_update", order))
+
+    def reconcile(self):
+        self.order_gateway.submit("__orderbook__", lambda: self.order_store.reconcile(FyresIntegration.get_orderbook()))
+
+    def serve_orders(self):
+        """Supervisor thread: send shard order requests through the gateway and return the responses."""
+        while not self.stop_event.is_set():
+            try:
+                kind, shard_id, request_id, order = self.order_requests.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if kind != "place_order":
+                continue
+            self.order_gateway.submit(order['symbol'], partial(FyresIntegration.place_order, **order),
+                                      partial(self.reply, shard_id, request_id))
+
+    def reply(self, shard_id, request_id, response):
+        self.inboxes[shard_id].put(("order_response", request_id, response))
+
+    def collect_snapshots(self):
+        """Supervisor thread: merge the shards' dashboard snapshots into one dashboard."""
+        while not self.stop_event.is_set():
+            try:
+                shard_id, snapshot = self.status_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            self.snapshots[shard_id] = snapshot
+            snapshots = [self.snapshots[index] for index in sorted(self.snapshots)]
+            self.dashboard_renderer.publish((max(taken_at for taken_at, rows in snapshots),
+                                             tuple(row for taken_at, rows in snapshots for row in rows)))
+
+    def run(self):
+        """Block until Ctrl+C, reconciling the orderbook, beating the LTP table heartbeat and reporting shards that exit."""
+        next_reconcile = time.time() + RECONCILE_INTERVAL
+        reported = set()
+        try:
+            while True:
+                time.sleep(HEARTBEAT_INTERVAL)
+                self.ltp_table.beat()
+                if time.time() >= next_reconcile:
+                    next_reconcile = time.time() + RECONCILE_INTERVAL
+                    self.reconcile()
+                for shard_id, process in enumerate(self.processes):
+                    if not process.is_alive() and shard_id not in reported:
+                        reported.add(shard_id)
+                        print(f"[SUPERVISOR] Shard {shard_id} exited with code {process.exitcode}")
+        except KeyboardInterrupt:
+            print("\n[SHUTDOWN] Supervisor stopped by user")
+        self.stop()
+
+    def stop(self, timeout=10.0):
+        """Stop the shards (letting their queued orders go out), then the supervisor threads."""
+        for inbox in self.inboxes:
+            inbox.put(("stop",))
+        deadline = time.time() + timeout
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.time()))
+            if process.is_alive():
+                process.terminate()
+        self.stop_event.set()
+        self.dashboard_renderer.stop()
+        self.order_gateway.shutdown(wait=True)
+        self.ltp_table.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the strategy with TradeSettings rows sharded over worker processes")
+    parser.add_argument("--shards", type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                        help="number of worker processes (default: CPU count - 1)")
+    args = parser.parse_args()
+
+    credentials_dict_fyers = Strategy.get_api_credentials_Fyers()
+    simulator_url = credentials_dict_fyers.get('simulator_url')
+    api_base = simulator_url.strip() if isinstance(simulator_url, str) and simulator_url.strip() else None
+    if api_base:
+        FyresIntegration.use_api_base(api_base)
+    FyresIntegration.automated_login(
+        client_id=credentials_dict_fyers.get('client_id'), redirect_uri=credentials_dict_fyers.get('redirect_uri'),
+        secret_key=credentials_dict_fyers.get('secret_key'), FY_ID=credentials_dict_fyers.get('FY_ID'),
+        PIN=credentials_dict_fyers.get('PIN'), TOTP_KEY=credentials_dict_fyers.get('totpkey'))
+    Strategy.get_user_settings()
+    if not Strategy.result_dict:
+        print("[SUPERVISOR] No rows in TradeSettings.csv")
+        sys.exit(1)
+
+    login = {'client_id': credentials_dict_fyers.get('client_id'), 'access_token': FyresIntegration.access_token,
+             'api_base': api_base}
+    supervisor = ShardSupervisor(Strategy.result_dict, args.shards)
+    print(f"[SUPERVISOR] {len(Strategy.result_dict)} row(s) over {supervisor.shard_count} shard(s)")
+    supervisor.start(login)
+    supervisor.run()
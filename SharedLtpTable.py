@@ -0,0 +1,342 @@
+import os
+import sys
+import time
+import argparse
+from multiprocessing import shared_memory
+import numpy as np
+
+# Shared memory segment the market-data daemon publishes to
+TABLE_NAME = "fyers_ltp_table"
+DEFAULT_CAPACITY = 4096
+# Bytes of a symbol in the directory ('NSE:NIFTY25DEC26000CE' is 21)
+SYMBOL_BYTES = 48
+
+MAGIC = 0x4C545032  # "LTP2"
+# Header: magic, capacity, symbols registered, writer pid, writer heartbeat (epoch seconds)
+HEADER = np.dtype([('magic', '<i8'), ('capacity', '<i8'), ('count', '<i8'), ('writer_pid', '<i8'),
+                   ('heartbeat', '<f8'), ('pad', 'u1', 24)])
+# One 64-byte slot per symbol: seqlock counter and ltp, bid, ask, exchange time of the last tick
+# and the day's traded volume (NaN until known)
+SLOT = np.dtype([('seq', '<u8'), ('values', '<f8', (5,)), ('pad', 'u1', 16)])
+LTP, BID, ASK, TICK_TIME, DAY_VOLUME = range(5)
+# Attempts a reader makes at a slot that is mid-write before giving up on it (a write takes
+# about a microsecond, so only a writer that died while publishing exhausts them)
+READ_SPINS = 10000
+# Seconds between writer heartbeats, and the age after which a reader treats the writer as gone
+HEARTBEAT_INTERVAL = 1.0
+HEARTBEAT_TIMEOUT = 5.0
+# Seconds between a reader's polls in follow() (the most a tick waits in the table)
+POLL_INTERVAL = 0.001
+
+
+def quote_message(symbol, quote):
+    """
+    Data-socket style message of a table quote, for FyresIntegration.handle_tick_message
+    (fields that are not known yet are left out).
+    """
+    ltp, bid, ask, tick_time, day_volume = quote
+    message = {'symbol': symbol, 'ltp': ltp}
+    if bid == bid:
+        message['bid_price'] = bid
+    if ask == ask:
+        message['ask_price'] = ask
+    if tick_time == tick_time:
+        message['exch_feed_time'] = int(tick_time)
+    if day_volume == day_volume:
+        message['vol_traded_today'] = int(day_volume)
+    return message
+
+
+class SharedLtpTable:
+    """
+    Fixed-layout LTP / bid / ask / tick time / day volume table in a multiprocessing.shared_memory
+    segment.
+
+    One writer (the market-data daemon, see __main__, or the ShardSupervisor) owns the broker
+    socket and publishes every tick; any number of local processes attach by name and read the
+    prices in place, or follow() them as ticks, without a socket of their own.
+
+    Layout: a 64-byte header, `capacity` 64-byte slots, then the directory of `capacity`
+    SYMBOL_BYTES-byte symbol names (slot i belongs to directory entry i). The directory is
+    append-only, so a reader only refreshes its symbol -> slot map when it meets an unknown symbol.
+
+    Each slot is guarded by a seqlock: the writer makes seq odd, writes the values and makes it
+    even again; a reader retries while seq is odd or changed during its read, so it never sees a
+    half-written price. Retries are bounded (READ_SPINS): a slot left odd by a writer that died
+    mid-write reads as None instead of spinning forever.
+
+    The writer stamps a heartbeat into the header (beat()); readers check writer_alive() before
+    trusting the prices, which otherwise stay at their last values once the writer is gone.
+    """
+
+    def __init__(self, segment, create):
+        self.segment = segment
+        self.owner = create
+        buffer = segment.buf
+        self.header = np.ndarray((1,), dtype=HEADER, buffer=buffer)[0]
+        if create:
+            capacity = (segment.size - HEADER.itemsize) // (SLOT.itemsize + SYMBOL_BYTES)
+        else:
+            if self.header['magic'] != MAGIC:
+                raise ValueError(f"Shared memory '{segment.name}' is not an LTP table")
+            capacity = int(self.header['capacity'])
+        self.capacity = capacity
+        slots = np.ndarray((capacity,), dtype=SLOT, buffer=buffer, offset=HEADER.itemsize)
+        self.seq = slots['seq']
+        self.values = slots['values']
+        self.directory = np.ndarray((capacity,), dtype=f'S{SYMBOL_BYTES}', buffer=buffer,
+                                    offset=HEADER.itemsize + capacity * SLOT.itemsize)
+        # symbol -> slot, as far as this process has read the directory
+        self.slots = {}
+        # seq of every slot at the last poll_changes()
+        self.seen_seq = np.zeros(capacity, dtype=np.uint64)
+        if create:
+            self.seq[:] = 0
+            self.values[:] = np.nan
+            self.header['capacity'] = capacity
+            self.header['count'] = 0
+            self.header['writer_pid'] = os.getpid()
+            self.header['heartbeat'] = time.time()
+            self.header['magic'] = MAGIC
+
+    @classmethod
+    def create(cls, name=TABLE_NAME, capacity=DEFAULT_CAPACITY):
+        """Create the segment (writer side). A stale segment left by a crashed daemon is replaced."""
+        size = HEADER.itemsize + capacity * (SLOT.itemsize + SYMBOL_BYTES)
+        try:
+            segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        return cls(segment, create=True)
+
+    @classmethod
+    def attach(cls, name=TABLE_NAME):
+        """Open an existing table (reader side)."""
+        try:
+            segment = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13 every attach is tracked, and the tracker would unlink the
+            # daemon's segment when this reader exits
+            segment = shared_memory.SharedMemory(name=name)
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(segment._name, "shared_memory")
+        return cls(segment, create=False)
+
+    def close(self):
+        """Detach; the writer also removes the segment."""
+        # Views must go before the buffer is released
+        self.header = self.seq = self.values = self.directory = None
+        self.segment.close()
+        if self.owner:
+            self.segment.unlink()
+
+    # ---- writer ----
+
+    def beat(self):
+        """Stamp the writer heartbeat (the daemon calls this every HEARTBEAT_INTERVAL)."""
+        self.header['heartbeat'] = time.time()
+
+    def add_symbol(self, symbol):
+        """Slot of a symbol, registering it in the directory if needed (writer only)."""
+        slot = self.slots.get(symbol)
+        if slot is not None:
+            return slot
+        count = int(self.header['count'])
+        if count >= self.capacity:
+            raise ValueError(f"LTP table is full ({self.capacity} symbols)")
+        encoded = symbol.encode()
+        if len(encoded) > SYMBOL_BYTES:
+            raise ValueError(f"Symbol longer than {SYMBOL_BYTES} bytes: {symbol}")
+        self.directory[count] = encoded
+        # Publish the entry before the count that makes it visible
+        self.header['count'] = count + 1
+        self.slots[symbol] = count
+        return count
+
+    def publish(self, slot, ltp, bid=np.nan, ask=np.nan, tick_time=None, day_volume=np.nan):
+        """
+        Write one slot under its seqlock (writer only). tick_time is the tick's exchange time
+        (now when the message has none).
+        """
+        seq = self.seq
+        sequence = int(seq[slot])
+        seq[slot] = sequence + 1
+        self.values[slot] = (ltp, bid, ask, time.time() if tick_time is None else tick_time, day_volume)
+        seq[slot] = sequence + 2
+
+    def on_message(self, message):
+        """Tick handler for FyresIntegration.add_tick_handler (full-mode messages carry bid/ask and volume)."""
+        symbol = message.get('symbol')
+        ltp = message.get('ltp')
+        if symbol is None or ltp is None:
+            return
+        slot = self.slots.get(symbol)
+        if slot is None:
+            slot = self.add_symbol(symbol)
+        bid = message.get('bid_price')
+        ask = message.get('ask_price')
+        day_volume = message.get('vol_traded_today')
+        self.publish(slot, ltp, np.nan if bid is None else bid, np.nan if ask is None else ask,
+                     message.get('exch_feed_time') or message.get('last_traded_time'),
+                     np.nan if day_volume is None else day_volume)
+
+    # ---- readers ----
+
+    def refresh_directory(self):
+        """Map the symbols registered since the last refresh."""
+        count = int(self.header['count'])
+        for slot in range(len(self.slots), count):
+            self.slots[self.directory[slot].decode()] = slot
+
+    def slot_of(self, symbol):
+        """Slot of a symbol, or None if the writer has not registered it."""
+        slot = self.slots.get(symbol)
+        if slot is None:
+            self.refresh_directory()
+            slot = self.slots.get(symbol)
+        return slot
+
+    def writer_alive(self, timeout=HEARTBEAT_TIMEOUT):
+        """True if the writer has stamped its heartbeat within `timeout` seconds."""
+        return time.time() - float(self.header['heartbeat']) <= timeout
+
+    def read_slot(self, slot):
+        """
+        Consistent (ltp, bid, ask, tick_time, day_volume) of a slot (NaN where not known yet), or
+        None if the slot stayed mid-write for READ_SPINS attempts (its writer died while publishing it).
+        """
+        seq = self.seq
+        values = self.values
+        for _ in range(READ_SPINS):
+            before = seq[slot]
+            if before & 1:
+                continue
+            quote = tuple(values[slot].tolist())
+            if seq[slot] == before:
+                return quote
+        return None
+
+    def read(self, symbol):
+        """(ltp, bid, ask, tick_time, day_volume) of a symbol, or None if it is not in the table, has not ticked or is unreadable."""
+        slot = self.slot_of(symbol)
+        if slot is None:
+            return None
+        quote = self.read_slot(slot)
+        return None if quote is None or quote[LTP] != quote[LTP] else quote
+
+    def ltp(self, symbol):
+        quote = self.read(symbol)
+        return None if quote is None else quote[LTP]
+
+    def poll_changes(self):
+        """
+        Symbols published since the previous call, with their quotes, for consumers that want
+        tick-like updates without a socket. Finding the changed slots is one array comparison.
+
+        Returns:
+            dict symbol -> (ltp, bid, ask, tick_time, day_volume) (unreadable slots are left out)
+        """
+        self.refresh_directory()
+        count = len(self.slots)
+        # Copy first, so a slot written during the comparison is still reported next time
+        seq = self.seq[:count].copy()
+        changed = np.flatnonzero(seq != self.seen_seq[:count])
+        if not len(changed):
+            return {}
+        self.seen_seq[:count] = seq
+        names = self.directory
+        changes = {}
+        for slot in changed.tolist():
+            quote = self.read_slot(slot)
+            if quote is not None:
+                changes[names[slot].decode()] = quote
+        return changes
+
+    def snapshot(self):
+        """dict symbol -> (ltp, bid, ask, tick_time, day_volume) of every symbol that has ticked."""
+        self.refresh_directory()
+        quotes = {}
+        for symbol, slot in self.slots.items():
+            quote = self.read_slot(slot)
+            if quote is not None and quote[LTP] == quote[LTP]:
+                quotes[symbol] = quote
+        return quotes
+
+    def follow(self, handler, symbols=None, interval=POLL_INTERVAL, stop_event=None):
+        """
+        Reader loop (run it on its own thread) that takes the place of a data socket: every
+        published change of a symbol in `symbols` (any container; all symbols when None) is
+        passed to handler as a quote_message(), e.g. to FyresIntegration.handle_tick_message.
+        Changes between two polls are coalesced into the latest quote.
+
+        Prints once when the writer's heartbeat stops, and again when it resumes.
+        """
+        writer_up = True
+        while stop_event is None or not stop_event.is_set():
+            for symbol, quote in self.poll_changes().items():
+                if symbols is None or symbol in symbols:
+                    try:
+                        handler(quote_message(symbol, quote))
+                    except Exception as e:
+                        print(f"[LTP TABLE] Error handling {symbol} tick: {e}")
+            if self.writer_alive() != writer_up:
+                writer_up = not writer_up
+                if writer_up:
+                    print(f"[LTP TABLE] Writer of '{self.segment.name}' is back")
+                else:
+                    print(f"[LTP TABLE] No heartbeat from the writer of '{self.segment.name}' for "
+                          f"{HEARTBEAT_TIMEOUT:.0f}s, prices are not updating")
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    # Market-data daemon: one broker socket publishing into the shared table
+    import FyresIntegration
+    import Strategy
+
+    parser = argparse.ArgumentParser(description="Market-data daemon publishing LTPs into shared memory")
+    parser.add_argument("--name", default=TABLE_NAME, help="shared memory segment name")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY, help="maximum number of symbols")
+    parser.add_argument("--symbols", nargs="*", default=None,
+                        help="Fyers symbols to subscribe (default: every FyresSymbol in TradeSettings.csv)")
+    args = parser.parse_args()
+
+    credentials_dict_fyers = Strategy.get_api_credentials_Fyers()
+    simulator_url = credentials_dict_fyers.get('simulator_url')
+    if isinstance(simulator_url, str) and simulator_url.strip():
+        FyresIntegration.use_api_base(simulator_url.strip())
+    FyresIntegration.automated_login(
+        client_id=credentials_dict_fyers.get('client_id'), redirect_uri=credentials_dict_fyers.get('redirect_uri'),
+        secret_key=credentials_dict_fyers.get('secret_key'), FY_ID=credentials_dict_fyers.get('FY_ID'),
+        PIN=credentials_dict_fyers.get('PIN'), TOTP_KEY=credentials_dict_fyers.get('totpkey'))
+    symbols = args.symbols
+    if not symbols:
+        Strategy.get_user_settings()
+        symbols = list(dict.fromkeys(Strategy.FyerSymbolList))
+    if not symbols:
+        print("[LTP TABLE] No symbols to subscribe")
+        sys.exit(1)
+
+    table = SharedLtpTable.create(args.name, args.capacity)
+    for symbol in symbols:
+        table.add_symbol(symbol)
+    FyresIntegration.add_tick_handler(table.on_message)
+    FyresIntegration.fyres_websocket(symbols)
+    print(f"[LTP TABLE] Publishing {len(symbols)} symbol(s) to shared memory '{args.name}' "
+          f"(row \"ltp_table,{args.name}\" in FyersCredentials.csv makes Strategy.py read it)")
+
+    try:
+        last_report = time.time()
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            table.beat()
+            if time.time() - last_report >= 30:
+                last_report = time.time()
+                print(f"[LTP TABLE] {FyresIntegration.tick_count} ticks published, "
+                      f"{len(table.snapshot())}/{len(symbols)} symbol(s) priced")
+    except KeyboardInterrupt:
+        print("\n[SHUTDOWN] Market-data daemon stopped")
+    table.close()
@@ -0,0 +1,176 @@
+import json
+import threading
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import FyresIntegration
+
+STATUS_HOST = "127.0.0.1"
+STATUS_PORT = 8780
+
+
+class StatusServer:
+    """
+    Read-only HTTP view of the running strategy on localhost.
+
+    The trading thread hands over an immutable snapshot with publish(); request threads only
+    read that reference and the plain counters in FyresIntegration, so serving a request never
+    waits on a lock the trading path holds.
+
+    GET /status   everything below in one document
+    GET /ltp      unique_key -> LTP
+    GET /positions  unique_key -> PositionRecord.to_dict()
+    GET /orders   open broker orders and orders queued on the gateway
+    GET /stats    loop, tick, REST and order-latency statistics
+    GET /metrics  Prometheus text format
+    """
+
+    def __init__(self, host=STATUS_HOST, port=STATUS_PORT):
+        self.host = host
+        self.port = port
+        self.snapshot = None
+        self.server = None
+        self.thread = None
+        # (taken_at, tick_count) of the previous snapshot, for ticks/sec
+        self.previous_ticks = None
+
+    def start(self):
+        status_server = self
+
+        class Handler(StatusRequestHandler):
+            server_state = status_server
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name="status-http", daemon=True)
+        self.thread.start()
+        print(f"[STATUS] Serving status on http://{self.host}:{self.port}/status and /metrics")
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    @property
+    def running(self):
+        return self.server is not None
+
+    def publish(self, snapshot):
+        """
+        Replace the served snapshot (called on the trading thread).
+
+        Args:
+            snapshot: dict built by the strategy (see Strategy.publish_status); not modified afterwards
+        """
+        ticks = FyresIntegration.tick_count
+        now = snapshot['taken_at']
+        rate = 0.0
+        if self.previous_ticks is not None and now > self.previous_ticks[0]:
+            rate = (ticks - self.previous_ticks[1]) / (now - self.previous_ticks[0])
+        self.previous_ticks = (now, ticks)
+        snapshot['engine']['ticks_per_second'] = rate
+        self.snapshot = snapshot
+
+    def stats(self, snapshot):
+        return {
+            'taken_at': snapshot['taken_at'],
+            'engine': snapshot['engine'],
+            'ticks_received': FyresIntegration.tick_count,
+            'rest_calls': dict(FyresIntegration.rest_call_counts),
+            'loop_duration_us': snapshot['loop_duration_us'],
+            'order_latency_us': snapshot['order_latency_us'],
+        }
+
+    def metrics(self, snapshot):
+        """Prometheus text exposition of the snapshot and live counters."""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        engine = snapshot['engine']
+        metric("strategy_ticks_received_total", "counter", "Websocket ticks received.",
+               [({}, FyresIntegration.tick_count)])
+        metric("strategy_ticks_per_second", "gauge", "Websocket ticks per second over the last snapshot interval.",
+               [({}, f"{engine['ticks_per_second']:.3f}")])
+        metric("strategy_rest_calls_total", "counter", "Fyers REST calls by API method.",
+               [({'endpoint': name}, count) for name, count in sorted(dict(FyresIntegration.rest_call_counts).items())])
+        metric("strategy_events_total", "counter", "Events handled by the trading thread by kind.",
+               [({'kind': kind}, engine[kind]) for kind in ('ticks', 'order_acks', 'order_updates', 'timers')])
+        metric("strategy_rows", "gauge", "TradeSettings rows loaded.", [({}, engine['rows'])])
+        metric("strategy_positions_open", "gauge", "Rows holding a position.", [({}, engine['positions_open'])])
+        metric("strategy_orders_open", "gauge", "Broker orders pending or in transit.", [({}, len(snapshot['orders']['open']))])
+        metric("strategy_orders_queued", "gauge", "Orders queued or in flight on the order gateway.",
+               [({}, snapshot['orders']['gateway_pending'])])
+
+        loop = snapshot['loop_duration_us']
+        if loop:
+            metric("strategy_loop_duration_seconds", "summary", "Trading-loop work per wake-up.",
+                   [({'quantile': q}, loop[key] / 1e6) for q, key in (("0.5", 'p50_us'), ("0.9", 'p90_us'), ("0.99", 'p99_us'))])
+            lines.append(f"strategy_loop_duration_seconds_sum {loop['mean_us'] * loop['count'] / 1e6}")
+            lines.append(f"strategy_loop_duration_seconds_count {loop['count']}")
+
+        latency_samples = []
+        for stage, stats in sorted(snapshot['order_latency_us'].items()):
+            for q, key in (("0.5", 'p50_us'), ("0.9", 'p90_us'), ("0.99", 'p99_us')):
+                latency_samples.append(({'stage': stage, 'quantile': q}, stats[key] / 1e6))
+        if latency_samples:
+            metric("strategy_order_latency_seconds", "summary", "Tick-to-order stage latencies (see LatencyTracker).",
+                   latency_samples)
+        return "\n".join(lines) + "\n"
+
+
+class StatusRequestHandler(BaseHTTPRequestHandler):
+    """GET-only handler; server_state is the owning StatusServer (set by StatusServer.start)."""
+
+    server_state = None
+
+    ROUTES = {
+        '/status': 'status',
+        '/ltp': 'ltp',
+        '/positions': 'positions',
+        '/orders': 'orders',
+        '/stats': 'stats',
+        '/metrics': 'metrics',
+    }
+
+    def do_GET(self):
+        route = self.ROUTES.get(urlparse(self.path).path.rstrip('/') or '/status')
+        if route is None:
+            self.send_body(404, "application/json", json.dumps({'error': 'not found', 'routes': sorted(self.ROUTES)}))
+            return
+        snapshot = self.server_state.snapshot
+        if snapshot is None:
+            self.send_body(503, "application/json", json.dumps({'error': 'no snapshot published yet'}))
+            return
+
+        if route == 'metrics':
+            self.send_body(200, "text/plain; version=0.0.4", self.server_state.metrics(snapshot))
+            return
+        if route == 'status':
+            body = {'taken_at': snapshot['taken_at'], 'ltp': snapshot['ltp'], 'positions': snapshot['positions'],
+                    'orders': snapshot['orders'], 'stats': self.server_state.stats(snapshot)}
+        elif route == 'stats':
+            body = self.server_state.stats(snapshot)
+        else:
+            body = {'taken_at': snapshot['taken_at'], route: snapshot[route]}
+        # Candle dates are pandas Timestamps; anything not JSON-native is sent as text
+        self.send_body(200, "application/json", json.dumps(body, default=str))
+
+    def send_body(self, status, content_type, text):
+        data = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
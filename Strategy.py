@@ -3,7 +3,7 @@ message="Project validity expiered please contact admin"
 
 
 import pandas as pd
-from datetime import datetime, timedelta, time as dt_time
+from datetime import datetime, timedelta
 import polars as pl
 import polars_talib as plta
 import json
@@ -11,8 +11,49 @@ import time
 import traceback
 import sys
 import os
+import queue
+import threading
+import re
 import pytz
 from FyresIntegration import *
+from CandleBuilder import CandleAggregator
+from OrderGateway import OrderGateway
+from OrderStore import OrderStore, ORDER_STATUS
+from LogWriter import BufferedLogWriter
+from CandleArchive import CandleArchive
+from LatencyTracker import LatencyTracker, LatencyHistogram, print_summary
+from StatusServer import StatusServer, STATUS_PORT
+from Scheduler import EventScheduler
+from Dashboard import DashboardRenderer, build_snapshot
+from SharedLtpTable import SharedLtpTable
+from TradingSchedule import RowSchedule, compile_schedules, next_timeframe_boundary, report_unreadable_times
+from TradeSettings import SETTINGS_PATH, load_trade_settings, settings_signature, diff_settings
+from PositionRecord import PositionRecord, PositionStatus, LADDER_STEP, STOP_EXIT_STATES, TARGET_HIT_STATES, CLOSED_STATES
+
+# Event-driven mode: websocket ticks are pushed onto engine_queue and dispatched
+# immediately. Set to False to fall back to the 1-second polling loop.
+EVENT_DRIVEN_MODE = True
+
+# Inbox of the trading thread: ("tick", symbol, ltp, receive_time) pushed by the websocket
+# in event-driven mode, ("order_ack", callback, response) from the order gateway and
+# ("order_update", order, previous_status) from the order websocket
+engine_queue = queue.Queue()
+
+# In-memory OHLCV bars built from websocket ticks (seeded from REST history at startup)
+candle_aggregator = CandleAggregator()
+
+# Append-only Parquet archive of completed candles (./data/archive)
+candle_archive = CandleArchive()
+
+# Tick -> order stage timestamps, latency histograms and per-order trace (LatencyTrace.jsonl)
+latency_tracker = LatencyTracker()
+
+# Trading-thread counters and work time per loop wake-up (microseconds), shown by the status server
+engine_stats = {'ticks': 0, 'order_acks': 0, 'order_updates': 0, 'timers': 0}
+loop_histogram = LatencyHistogram()
+
+# Localhost JSON / Prometheus status endpoint; fed snapshots by the 'status' timer once started
+status_server = StatusServer()
 
 def normalize_time_to_timeframe(current_time, timeframe_minutes):
     """
@@ -79,102 +120,42 @@ def delete_file_contents(file_name):
 
           
 
-def write_to_order_logs(message):
-    with open('OrderLog.txt', 'a') as file:  # Open the file in append mode
-        # Skip timestamp for empty lines (used as separators)
-        if message.strip() == "":
-            file.write('\n')
-        else:
-            timestamp = datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%Y-%m-%d %H:%M:%S')
-            file.write(f"[{timestamp}] {message}\n")
+# OrderLog.txt is written by a background thread in batches
+order_log_writer = BufferedLogWriter('OrderLog.txt')
+
+def write_to_order_logs(message, flush=False):
+    """Queue a line for OrderLog.txt; flush=True writes it out immediately (order events)."""
+    order_log_writer.write(message, flush=flush)
 
 # State.json removed - intraday mode, fresh start each day
 # No need to save/load state since we start fresh every day
 
-def is_time_between(start_time_str, stop_time_str, current_time=None):
-    """Check if current time is between start_time and stop_time"""
-    if current_time is None:
-        current_time = datetime.now().time()
-    
-    try:
-        # Parse time strings (format: "HH:MM")
-        start_hour, start_min = map(int, start_time_str.split(':'))
-        stop_hour, stop_min = map(int, stop_time_str.split(':'))
-        
-        start = dt_time(start_hour, start_min)
-        stop = dt_time(stop_hour, stop_min)
-        
-        if start <= stop:
-            # Normal case: start < stop (e.g., 9:25 to 15:15)
-            return start <= current_time <= stop
-        else:
-            # Overnight case: start > stop (e.g., 22:00 to 2:00)
-            return current_time >= start or current_time <= stop
-    except Exception as e:
-        print(f"Error parsing time: {e}")
-        return True  # Default to True if parsing fails
-
-
-
 def get_user_settings():
-    global result_dict, instrument_id_list, Equity_instrument_id_list, Future_instrument_id_list, FyerSymbolList, positions_state
-    import pandas as pd
+    global result_dict, instrument_id_list, Equity_instrument_id_list, Future_instrument_id_list, FyerSymbolList, positions_state, symbol_index, schedule_expiry, settings_signature_loaded
 
     # delete_file_contents("OrderLog.txt")
 
     try:
-        csv_path = 'TradeSettings.csv'
-        df = pd.read_csv(csv_path)
-        df.columns = df.columns.str.strip()
-
-        result_dict = {}
+        csv_path = SETTINGS_PATH
+        # Signature first: an edit made while the file is read is picked up by the next reload check
+        settings_signature_loaded = settings_signature(csv_path)
+        # Create a unique key per row to support duplicate symbols (e.g., CE and PE rows for NIFTY);
+        # a row with an unreadable cell is left out with a message, the others still trade
+        result_dict = load_trade_settings(csv_path, entry_offset=ENTRY_OFFSET, skip_invalid=True)
+        
         FyerSymbolList = []
-
-        for index, row in df.iterrows():
-            symbol = row['Symbol']
-            
-            # Skip empty rows
-            if pd.isna(symbol) or str(symbol).strip() == '':
-                continue
-          
-            # Create a unique key per row to support duplicate symbols (e.g., CE and PE rows for NIFTY)
-            # Using index to ensure uniqueness even if symbols are duplicated
-            unique_key = f"{symbol}_{index}"
-            
-            # Store all columns from CSV into symbol_dict
-            symbol_dict = {
-                "Symbol": symbol,
-                "unique_key": unique_key,
-                "Timeframe": int(row['Timeframe']) if pd.notna(row['Timeframe']) else None,
-                "EntryLots": int(row['EntryLots']) if pd.notna(row['EntryLots']) else 0,
-                "SL1Points": float(row['SL1Points']) if pd.notna(row['SL1Points']) else 0,
-                "Sl2Points": float(row['Sl2Points']) if pd.notna(row['Sl2Points']) else 0,
-                "Sl3Points": float(row['Sl3Points']) if pd.notna(row['Sl3Points']) else 0,
-                "Sl4Points": float(row['Sl4Points']) if pd.notna(row['Sl4Points']) else 0,
-                "Tgt1Lots": int(row['Tgt1Lots']) if pd.notna(row['Tgt1Lots']) else 0,
-                "Tgt2Lots": int(row['Tgt2Lots']) if pd.notna(row['Tgt2Lots']) else 0,
-                "Tgt3Lots": int(row['Tgt3Lots']) if pd.notna(row['Tgt3Lots']) else 0,
-                "Tgt4Lots": int(row['Tgt4Lots']) if pd.notna(row['Tgt4Lots']) else 0,
-                "T1Percent": float(row['T1Percent']) if pd.notna(row['T1Percent']) else 1.0,
-                "T2Percent": float(row['T2Percent']) if pd.notna(row['T2Percent']) else 1.0,
-                "T3Percent": float(row['T3Percent']) if pd.notna(row['T3Percent']) else 1.0,
-                "T4Percent": float(row['T4Percent']) if pd.notna(row['T4Percent']) else 1.0,
-                "StartTime": str(row['StartTime']) if pd.notna(row['StartTime']) else None,
-                "StopTime": str(row['StopTime']) if pd.notna(row['StopTime']) else None,
-                "Market": str(row['Market']) if pd.notna(row.get('Market', '')) else None,
-                "FyresLtp":None,
-            }
-            
-            # Create FyresSymbol - assuming NSE format, can be modified based on actual requirements
-            # If Symbol is already in correct format, use it directly
-            if ':' in str(symbol):
-                symbol_dict["FyresSymbol"] = symbol
-            else:
-                # Default to NSE format if not specified
-                symbol_dict["FyresSymbol"] = f"NSE:{symbol}"
-            
-            result_dict[unique_key] = symbol_dict
+        # FyresSymbol -> [unique_key] so one LTP update reaches every row trading that symbol
+        symbol_index = {}
+        for unique_key, symbol_dict in result_dict.items():
             FyerSymbolList.append(symbol_dict["FyresSymbol"])
+            symbol_index.setdefault(symbol_dict["FyresSymbol"], []).append(unique_key)
+        
+        # Session window / first check / square-off instants as epoch seconds for today
+        schedule_expiry = compile_schedules(result_dict)
+        for params in result_dict.values():
+            report_unreadable_times(params)
+        # Timers are rebuilt from the new rows on the next run_due_timers()
+        scheduler.clear()
             
         print("result_dict: ", result_dict)
         print("FyerSymbolList: ", FyerSymbolList)
@@ -182,19 +163,91 @@ def get_user_settings():
        
 
     except Exception as e:
+        # Nothing can trade without the settings (e.g. a missing column): stop here
         print("Error happened in fetching symbol", str(e))
         traceback.print_exc()
+        raise
 
 
+# FyresSymbol -> last LTP copied into result_dict (UpdateData only touches symbols that changed)
+last_applied_ltp = {}
+
 def UpdateData():
     global result_dict
 
-    for symbol, ltp in shared_data.items(): 
-        for key, value in result_dict.items():
-            if value.get('FyresSymbol') == symbol:
-                value['FyresLtp'] = float(ltp)
-                # print(f"Updated {symbol} with LTP: {ltp}")
-                break  # Optional: skip if you assume each symbol is unique
+    # Only symbols that ticked since the last call count as tick-driven for latency tracking
+    latency_tracker.reset_ticks()
+    for symbol, ltp in list(shared_data.items()):
+        # High / low of every tick since the last update, read whenever the symbol ticked (even
+        # back to the same LTP), so a level crossed and left between two polls still triggers
+        interval = tick_buffers.interval_range(symbol)
+        if interval is None and last_applied_ltp.get(symbol) == ltp:
+            continue
+        last_applied_ltp[symbol] = ltp
+        latency_tracker.tick_applied(symbol, last_tick_time.get(symbol))
+        ltp = float(ltp)
+        for unique_key in symbol_index.get(symbol, ()):
+            params = result_dict[unique_key]
+            params['FyresLtp'] = ltp
+            if interval is None:
+                continue
+            # A row with a new signal only takes the ticks that arrived after it
+            since = params.pop('IntervalFrom', None)
+            row_interval = interval if since is None else tick_buffers.range_since(symbol, since)
+            if row_interval is not None:
+                params['IntervalHigh'], params['IntervalLow'] = row_interval[0], row_interval[1]
+
+def refresh_missing_ltps():
+    """
+    Fill LTPs the websocket has not delivered yet (e.g. illiquid strikes) with one
+    batched quote request for all such symbols.
+    
+    Returns:
+        list of unique_keys whose LTP was filled
+    """
+    missing = [symbol for symbol, keys in symbol_index.items() if result_dict[keys[0]].get('FyresLtp') is None]
+    if not missing:
+        return []
+    
+    updated = []
+    quotes = get_quotes_batch(missing)
+    for symbol, quote in quotes.items():
+        if quote.get('ltp') is None:
+            continue
+        for unique_key in symbol_index.get(symbol, ()):
+            result_dict[unique_key]['FyresLtp'] = float(quote['ltp'])
+            updated.append(unique_key)
+    return updated
+
+def seed_candle_aggregator():
+    """
+    Seed the candle aggregator from REST history once at startup (one fetch per symbol/timeframe)
+    and attach it to the websocket so bars are then built from live ticks.
+    """
+    seeded = set()
+    for unique_key, params in result_dict.items():
+        symbol = params["FyresSymbol"]
+        timeframe = params.get("Timeframe")
+        if timeframe is None or (symbol, timeframe) in seeded:
+            continue
+        try:
+            candle_aggregator.seed(symbol, timeframe, fetchOHLC(symbol, timeframe))
+            seeded.add((symbol, timeframe))
+        except Exception as e:
+            # Falls back to REST history for this symbol in get_candles
+            print(f"[CANDLES] Failed to seed {symbol} ({timeframe} min): {e}")
+    
+    add_tick_handler(candle_aggregator.on_message)
+    print(f"[CANDLES] Seeded {len(seeded)} symbol/timeframe pair(s) from history")
+
+def get_candles(symbol, timeframe):
+    """
+    Return candles for a symbol/timeframe, shaped like fetchOHLC().
+    Uses the tick-built bars when available, otherwise REST history.
+    """
+    if candle_aggregator.has_history(symbol, timeframe):
+        return candle_aggregator.get_candles(symbol, timeframe)
+    return fetchOHLC(symbol, timeframe)
 
 def sanitize_symbol_for_filename(symbol):
     """
@@ -210,7 +263,10 @@ def sanitize_symbol_for_filename(symbol):
     sanitized = sanitized.replace(' ', '_').replace(':', '_')
     return sanitized
 
-def calculate_entry_price(signal_candle_value, direction, market_type):
+# Entry / initial SL offset as a fraction of the root of the signal candle price (26.11%)
+ENTRY_OFFSET = 0.2611
+
+def calculate_entry_price(signal_candle_value, direction, market_type, offset=ENTRY_OFFSET):
     """
     Calculate entry price based on signal candle, direction, and market type.
     
@@ -218,6 +274,7 @@ def calculate_entry_price(signal_candle_value, direction, market_type):
         signal_candle_value: SCH value (high for BUY, low for SELL)
         direction: 'BUY' or 'SELL'
         market_type: 'IO' (Index Options) or 'UL' (Underlying/Stock/Futures/Commodity)
+        offset: multiplier of the square/cube root added beyond the signal candle
     
     Returns:
         float: Entry price
@@ -227,19 +284,19 @@ def calculate_entry_price(signal_candle_value, direction, market_type):
     if market_type.upper() == 'IO':
         # Index Options: Use square root
         if direction.upper() == 'BUY':
-            entry = signal_candle_value + (math.sqrt(signal_candle_value) * 0.2611)
+            entry = signal_candle_value + (math.sqrt(signal_candle_value) * offset)
         else:  # SELL
-            entry = signal_candle_value - (math.sqrt(signal_candle_value) * 0.2611)
+            entry = signal_candle_value - (math.sqrt(signal_candle_value) * offset)
     else:  # UL
         # Underlying/Stock/Futures/Commodity: Use cube root
         if direction.upper() == 'BUY':
-            entry = signal_candle_value + (signal_candle_value ** (1/3) * 0.2611)
+            entry = signal_candle_value + (signal_candle_value ** (1/3) * offset)
         else:  # SELL
-            entry = signal_candle_value - (signal_candle_value ** (1/3) * 0.2611)
+            entry = signal_candle_value - (signal_candle_value ** (1/3) * offset)
     
     return entry
 
-def calculate_initial_sl(signal_candle_low, signal_candle_high, direction, market_type):
+def calculate_initial_sl(signal_candle_low, signal_candle_high, direction, market_type, offset=ENTRY_OFFSET):
     """
     Calculate initial stop loss based on signal candle and market type.
     
@@ -248,6 +305,7 @@ def calculate_initial_sl(signal_candle_low, signal_candle_high, direction, marke
         signal_candle_high: SCH (signal candle high)
         direction: 'BUY' or 'SELL'
         market_type: 'IO' (Index Options) or 'UL' (Underlying)
+        offset: multiplier of the square/cube root placed beyond the signal candle
     
     Returns:
         float: Initial stop loss
@@ -257,15 +315,15 @@ def calculate_initial_sl(signal_candle_low, signal_candle_high, direction, marke
     if market_type.upper() == 'IO':
         # Index Options: Use square root
         if direction.upper() == 'BUY':
-            initial_sl = signal_candle_low - (math.sqrt(signal_candle_low) * 0.2611)
+            initial_sl = signal_candle_low - (math.sqrt(signal_candle_low) * offset)
         else:  # SELL
-            initial_sl = signal_candle_high + (math.sqrt(signal_candle_high) * 0.2611)
+            initial_sl = signal_candle_high + (math.sqrt(signal_candle_high) * offset)
     else:  # UL
         # Underlying: Use cube root
         if direction.upper() == 'BUY':
-            initial_sl = signal_candle_low - (signal_candle_low ** (1/3) * 0.2611)
+            initial_sl = signal_candle_low - (signal_candle_low ** (1/3) * offset)
         else:  # SELL
-            initial_sl = signal_candle_high + (signal_candle_high ** (1/3) * 0.2611)
+            initial_sl = signal_candle_high + (signal_candle_high ** (1/3) * offset)
     
     return initial_sl
 
@@ -323,18 +381,16 @@ def update_candle_data_for_dashboard(unique_key, params, positions_state):
     This runs for all symbols regardless of StartTime to keep dashboard updated.
     """
     try:
-        from FyresIntegration import fetchOHLC
-        
         symbol = params["FyresSymbol"]
         timeframe = params["Timeframe"]
         
         # Initialize position state if needed
         if unique_key not in positions_state:
-            positions_state[unique_key] = {}
+            positions_state[unique_key] = PositionRecord()
         pos_state = positions_state[unique_key]
         
-        # Fetch historical data
-        df = fetchOHLC(symbol, timeframe)
+        # Candles from the in-memory aggregator (REST only if not seeded)
+        df = get_candles(symbol, timeframe)
         
         if len(df) < 2:
             return
@@ -375,11 +431,11 @@ def update_candle_data_for_dashboard(unique_key, params, positions_state):
                 'close': float(candle_row['close'])
             }
         
-        pos_state['last_candle_1'] = get_candle_info(current_candle)  # Most recent
-        pos_state['last_candle_2'] = get_candle_info(prev_candle)      # Previous
+        pos_state.last_candle_1 = get_candle_info(current_candle)  # Most recent
+        pos_state.last_candle_2 = get_candle_info(prev_candle)      # Previous
         
         # Log FIRST CANDLE if not logged yet (for dashboard updates)
-        if not pos_state.get('first_candle_logged', False):
+        if not pos_state.first_candle_logged:
             candle_color = 'GREEN' if current_candle['close'] > current_candle['open'] else 'RED'
             candle_date_str = str(current_candle['date'])
             if hasattr(current_candle['date'], 'strftime'):
@@ -388,13 +444,46 @@ def update_candle_data_for_dashboard(unique_key, params, positions_state):
             first_candle_log = f"[FIRST CANDLE] {params.get('Symbol', 'unknown')} - Color: {candle_color} | Date: {candle_date_str} | O:{current_candle['open']:.2f} H:{current_candle['high']:.2f} L:{current_candle['low']:.2f} C:{current_candle['close']:.2f}"
             print(first_candle_log)
             write_to_order_logs(first_candle_log)
-            pos_state['first_candle_logged'] = True
+            pos_state.first_candle_logged = True
         
     except Exception as e:
         # Log error but don't spam - only log once per symbol
-        if not pos_state.get('candle_update_error_logged', False):
+        if not pos_state.candle_update_error_logged:
             print(f"[CANDLE UPDATE ERROR] {params.get('Symbol', 'unknown')}: {str(e)}")
-            pos_state['candle_update_error_logged'] = True
+            pos_state.candle_update_error_logged = True
+
+def set_signal_levels(pos_state, params):
+    """
+    Entry, initial SL and the T/SL ladder of a detected signal (pos_state.signal_candle and
+    direction) from the row's current settings.
+    
+    Returns:
+        dict: calculate_levels() result
+    """
+    direction = pos_state.direction
+    candle = pos_state.signal_candle
+    # SCH is the signal candle high for BUY, its low for SELL
+    signal_candle_value = candle['high'] if direction == 'BUY' else candle['low']
+    market_type = params.get('Market', 'IO')  # Default to IO if not specified
+    entry_offset = params.get('EntryOffset', ENTRY_OFFSET)
+    
+    pos_state.market_type = market_type
+    pos_state.entry = calculate_entry_price(signal_candle_value, direction, market_type, entry_offset)
+    pos_state.initial_sl = calculate_initial_sl(candle['low'], candle['high'], direction, market_type, entry_offset)
+    levels = calculate_levels(
+        pos_state.entry,
+        direction,
+        params.get('T1Percent', 1.0),
+        params.get('T2Percent', 1.0),
+        params.get('T3Percent', 1.0),
+        params.get('T4Percent', 1.0),
+        params.get('SL1Points', 0),
+        params.get('Sl2Points', 0),
+        params.get('Sl3Points', 0),
+        params.get('Sl4Points', 0)
+    )
+    pos_state.set_levels(levels)
+    return levels
 
 def check_signal_for_symbol(unique_key, params, positions_state):
     """
@@ -402,32 +491,28 @@ def check_signal_for_symbol(unique_key, params, positions_state):
     Returns True if signal detected, False otherwise.
     """
     try:
-        from FyresIntegration import fetchOHLC
-        
         symbol = params["FyresSymbol"]
         timeframe = params["Timeframe"]
-        start_time = params["StartTime"]
-        stop_time = params["StopTime"]
         
         # Initialize position state
         if unique_key not in positions_state:
-            positions_state[unique_key] = {}
+            positions_state[unique_key] = PositionRecord()
         pos_state = positions_state[unique_key]
         
         # Check if we're within trading hours
-        if not is_time_between(start_time, stop_time):
+        if not params['Schedule'].in_window(time.time()):
             return False
         
         # Check if already in position or signal already detected today (one trade per day)
-        if pos_state.get('signal_detected') or pos_state.get('entry_taken') or pos_state.get('exited_today'):
+        if pos_state.state is not PositionStatus.NO_SIGNAL:
             return False
         
-        # Fetch historical data
+        # Get candles (tick-built, REST history as fallback)
         check_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        print(f"\n[{symbol}] Fetching historical data at {check_timestamp}")
-        df = fetchOHLC(symbol, timeframe)
+        print(f"\n[{symbol}] Reading candles at {check_timestamp}")
+        df = get_candles(symbol, timeframe)
         
-        # Save historical data to CSV file inside ./data folder
+        # Archive newly completed candles (append-only Parquet under ./data/archive)
         # Use the actual symbol name from params (not FyresSymbol which has NSE: prefix)
         try:
             actual_symbol = params.get('Symbol', symbol)
@@ -435,15 +520,12 @@ def check_signal_for_symbol(unique_key, params, positions_state):
             if ':' in actual_symbol:
                 actual_symbol = actual_symbol.split(':')[-1]
             
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            data_dir = os.path.join(base_dir, "data")
-            os.makedirs(data_dir, exist_ok=True)
-            csv_filename = os.path.join(data_dir, f"{actual_symbol}.csv")
-            # Using overwrite mode to keep latest snapshot of historical data
-            df.to_csv(csv_filename, index=False)
-            print(f"[{symbol}] Historical data saved to {csv_filename}")
+            forming_candle_time = normalize_time_to_timeframe(datetime.now(pytz.timezone('Asia/Kolkata')), timeframe)
+            archived = candle_archive.append(actual_symbol, timeframe, df, before=forming_candle_time)
+            if archived:
+                print(f"[{symbol}] Archived {archived} new candle(s)")
         except Exception as e:
-            print(f"[{symbol}] Warning: Failed to save historical data to CSV: {e}")
+            print(f"[{symbol}] Warning: Failed to archive candles: {e}")
         
         if len(df) < 2:
             print(f"[{symbol}] Not enough candles in historical data")
@@ -491,11 +573,11 @@ def check_signal_for_symbol(unique_key, params, positions_state):
                 'close': float(candle_row['close'])
             }
         
-        pos_state['last_candle_1'] = get_candle_info(current_candle)  # Most recent (e.g., 9:25)
-        pos_state['last_candle_2'] = get_candle_info(prev_candle)      # Previous (e.g., 9:20)
+        pos_state.last_candle_1 = get_candle_info(current_candle)  # Most recent (e.g., 9:25)
+        pos_state.last_candle_2 = get_candle_info(prev_candle)      # Previous (e.g., 9:20)
         
         # Log FIRST CANDLE (current candle being checked) - only once per symbol per day
-        if not pos_state.get('first_candle_logged', False):
+        if not pos_state.first_candle_logged:
             # Determine candle color
             candle_color = 'GREEN' if current_candle['close'] > current_candle['open'] else 'RED'
             candle_date_str = str(current_candle['date'])
@@ -505,7 +587,7 @@ def check_signal_for_symbol(unique_key, params, positions_state):
             first_candle_log = f"[FIRST CANDLE] {params['Symbol']} - Color: {candle_color} | Date: {candle_date_str} | O:{current_candle['open']:.2f} H:{current_candle['high']:.2f} L:{current_candle['low']:.2f} C:{current_candle['close']:.2f}"
             print(first_candle_log)
             write_to_order_logs(first_candle_log)
-            pos_state['first_candle_logged'] = True
+            pos_state.first_candle_logged = True
         
         # Print the two candles being checked (OHLC)
         print(f"[{symbol}] Checking previous 2 completed candles (checked at {check_timestamp}, excluding forming candle at {current_normalized_time.strftime('%H:%M:%S')}):")
@@ -570,62 +652,23 @@ def check_signal_for_symbol(unique_key, params, positions_state):
         if direction is None:
             return False
         
-        # Get market type from params
-        market_type = params.get('Market', 'IO')  # Default to IO if not specified
-        
-        # Calculate entry price
-        entry_price = calculate_entry_price(signal_candle_value, direction, market_type)
-        
-        # Calculate initial stop loss
-        initial_sl = calculate_initial_sl(
-            signal_candle_data['low'],
-            signal_candle_data['high'],
-            direction,
-            market_type
-        )
-        
-        # Calculate all levels
-        levels = calculate_levels(
-            entry_price,
-            direction,
-            params.get('T1Percent', 1.0),
-            params.get('T2Percent', 1.0),
-            params.get('T3Percent', 1.0),
-            params.get('T4Percent', 1.0),
-            params.get('SL1Points', 0),
-            params.get('Sl2Points', 0),
-            params.get('Sl3Points', 0),
-            params.get('Sl4Points', 0)
-        )
-        
-        # Store signal state
-        positions_state[unique_key] = {
-            'signal_detected': True,
-            'signal_time': datetime.now().isoformat(),
-            'direction': direction,
-            'SCH': signal_candle_value,
-            'SCL': signal_candle_data['low'] if direction == 'BUY' else signal_candle_data['high'],
-            'signal_candle': signal_candle_data,
-            'Entry': entry_price,
-            'InitialSL': initial_sl,
-            'T1': levels['T1'],
-            'T2': levels['T2'],
-            'T3': levels['T3'],
-            'T4': levels['T4'],
-            'SL1': levels['SL1'],
-            'SL2': levels['SL2'],
-            'SL3': levels['SL3'],
-            'SL4': levels['SL4'],
-            'entry_taken': False,
-            'position_state': 'waiting_entry',
-            'remaining_lots': params.get('EntryLots', 0),
-            't1_hit': False,
-            't2_hit': False,
-            't3_hit': False,
-            't4_hit': False,
-            'exited_today': False,
-            'market_type': market_type
-        }
+        # Store signal state (candle info and check time on the record are kept)
+        pos_state.state = PositionStatus.WAITING_ENTRY
+        pos_state.signal_time = time.time()
+        pos_state.direction = direction
+        pos_state.sch = signal_candle_value
+        pos_state.scl = signal_candle_data['low'] if direction == 'BUY' else signal_candle_data['high']
+        pos_state.signal_candle = signal_candle_data
+        pos_state.remaining_lots = params.get('EntryLots', 0)
+        pos_state.targets_hit = 0
+        levels = set_signal_levels(pos_state, params)
+        entry_price = pos_state.entry
+        initial_sl = pos_state.initial_sl
+        # Breakouts count from the signal on: drop the tick range gathered before it, and let the
+        # row's next range start at the next tick (see UpdateData)
+        params.pop('IntervalHigh', None)
+        params.pop('IntervalLow', None)
+        params['IntervalFrom'] = tick_buffers.cursor(symbol)
         
         # Log signal details in exact format as OrderLog.txt
         signal_date_str = str(signal_candle_data['date'])
@@ -633,6 +676,8 @@ def check_signal_for_symbol(unique_key, params, positions_state):
             signal_date_str = signal_candle_data['date'].strftime('%Y-%m-%d %H:%M:%S')
         
         message = f"[SIGNAL DETECTED] {params['Symbol']} at {datetime.now()}"
+        if hasattr(signal_candle_data['date'], 'timestamp'):
+            latency_tracker.record_signal(symbol, signal_candle_data['date'].timestamp() + timeframe * 60)
         write_to_order_logs(message)
         write_to_order_logs(f"  Signal Candle High (SCH): {signal_candle_data['high']:.2f}")
         write_to_order_logs(f"  Signal Candle Low (SCL): {signal_candle_data['low']:.2f}")
@@ -667,116 +712,137 @@ def check_signal_for_symbol(unique_key, params, positions_state):
         traceback.print_exc()
         return False
 
-def place_buy_order(symbol, quantity, price, product_type="INTRADAY"):
+def place_buy_order(symbol, quantity, price, product_type="INTRADAY", order_tag="tag1"):
     """Place a buy order (Market order)"""
     try:
         from FyresIntegration import place_order
-        response = place_order(symbol=symbol, quantity=quantity, type=2, side=1, price=price, product_type=product_type)
+        response = place_order(symbol=symbol, quantity=quantity, type=2, side=1, price=price, product_type=product_type, order_tag=order_tag)
         message = f"[BUY ORDER] {datetime.now()} - Symbol: {symbol}, Qty: {quantity}, Price: {price}, ProductType: {product_type}, Response: {response}"
         print(message)
-        write_to_order_logs(message)
+        write_to_order_logs(message, flush=True)
         return response
     except Exception as e:
         error_msg = f"[BUY ORDER ERROR] {datetime.now()} - Symbol: {symbol}, Error: {str(e)}"
         print(error_msg)
-        write_to_order_logs(error_msg)
+        write_to_order_logs(error_msg, flush=True)
         return None
 
-def place_sell_order(symbol, quantity, price, product_type="INTRADAY"):
+def place_sell_order(symbol, quantity, price, product_type="INTRADAY", order_tag="tag1"):
     """Place a sell order (Market order)"""
     try:
         from FyresIntegration import place_order
-        response = place_order(symbol=symbol, quantity=quantity, type=2, side=-1, price=price, product_type=product_type)
+        response = place_order(symbol=symbol, quantity=quantity, type=2, side=-1, price=price, product_type=product_type, order_tag=order_tag)
         message = f"[SELL ORDER] {datetime.now()} - Symbol: {symbol}, Qty: {quantity}, Price: {price}, ProductType: {product_type}, Response: {response}"
         print(message)
-        write_to_order_logs(message)
+        write_to_order_logs(message, flush=True)
         return response
     except Exception as e:
         error_msg = f"[SELL ORDER ERROR] {datetime.now()} - Symbol: {symbol}, Error: {str(e)}"
         print(error_msg)
-        write_to_order_logs(error_msg)
+        write_to_order_logs(error_msg, flush=True)
         return None
 
-def print_dashboard(result_dict, positions_state):
+def post_order_ack(on_ack, response):
+    """Hand a broker acknowledgement back to the trading thread (called on a gateway worker)."""
+    engine_queue.put(("order_ack", on_ack, response))
+
+# Orders are sent on worker threads, one lane per symbol; acks come back through engine_queue
+order_gateway = OrderGateway(dispatch=post_order_ack)
+
+def submit_buy_order(symbol, quantity, price, product_type="INTRADAY", on_ack=None, order_tag="tag1"):
+    """Queue a buy order on the order gateway without waiting for the broker."""
+    span = latency_tracker.start_span(symbol, order_tag, "BUY")
+    send = latency_tracker.timed_send(span, lambda: place_buy_order(symbol, quantity, price, product_type, order_tag))
+    order_gateway.submit(symbol, send, on_ack)
+
+def submit_sell_order(symbol, quantity, price, product_type="INTRADAY", on_ack=None, order_tag="tag1"):
+    """Queue a sell order on the order gateway without waiting for the broker."""
+    span = latency_tracker.start_span(symbol, order_tag, "SELL")
+    send = latency_tracker.timed_send(span, lambda: place_sell_order(symbol, quantity, price, product_type, order_tag))
+    order_gateway.submit(symbol, send, on_ack)
+
+def make_order_tag(unique_key):
+    """Order tag for a TradeSettings row (Fyers tags are alphanumeric, max 30 characters)."""
+    return re.sub(r'[^A-Za-z0-9]', '', unique_key)[-30:]
+
+def post_order_update(order, previous_status):
+    """OrderStore callback (websocket thread): hand the order update to the trading thread."""
+    engine_queue.put(("order_update", order, previous_status))
+
+# Broker orders still pending / in transit, by id (kept on the trading thread for the status server)
+open_orders = {}
+
+def handle_order_update(order, previous_status):
+    """Log fills and rejections pushed by the order websocket."""
+    status = ORDER_STATUS.get(order.get('status'), order.get('status'))
+    if status in ("PENDING", "TRANSIT"):
+        open_orders[order.get('id')] = order
+    else:
+        open_orders.pop(order.get('id'), None)
+    if status not in ("FILLED", "REJECTED", "CANCELLED"):
+        return
+    message = f"[ORDER {status}] {order.get('symbol')} - Id: {order.get('id')}, Tag: {order.get('orderTag')}, Qty: {order.get('qty')}, Traded Price: {order.get('tradedPrice')}, Message: {order.get('message', '')}"
+    print(message)
+    write_to_order_logs(message, flush=True)
+
+# Broker orders indexed by id and tag, fed by the order websocket
+order_store = OrderStore(on_update=post_order_update)
+
+def reconcile_order_store():
+    """Refresh the order store from a full orderbook snapshot (runs on the order gateway)."""
+    order_gateway.submit("__orderbook__", lambda: order_store.reconcile(get_orderbook()))
+
+def submit_row_exit(unique_key, params, pos_state, submit_exit_order, lots, ltp, exit_state):
     """
-    Print a compact dashboard showing status of all symbols being monitored.
+    Send an exit order for `lots` of a row and move the row to `exit_state` straight away, so
+    the exit is not sent twice while the broker answers.
+    
+    If the broker does not accept the order the lots are still open: they are put back on the
+    row, which returns to the state it was in (also when a later exit has closed the rest in
+    the meantime), so the ladder keeps managing them.
     """
-    try:
-        import os
-        os.system('cls' if os.name == 'nt' else 'clear')  # Clear screen
-        
-        current_time = datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%H:%M:%S')
-        print(f"\n{'='*85}")
-        print(f"TRADING DASHBOARD - {current_time}")
-        print(f"{'='*85}")
-        
-        # Compact header
-        print(f"{'Symbol':<18} {'Status':<20} {'LTP':<10} {'C1':<8} {'C2':<8}")
-        print(f"{'-'*85}")
-        
-        for unique_key, params in result_dict.items():
-            symbol = params.get('Symbol', 'N/A')
-            # Truncate long symbol names
-            if len(symbol) > 17:
-                symbol = symbol[:14] + "..."
-            
-            ltp = params.get('FyresLtp')
-            ltp_str = f"{ltp:.2f}" if ltp else "N/A"
-            
-            # Get position state
-            pos_state = positions_state.get(unique_key, {})
-            
-            # Determine status (compact)
-            if pos_state.get('exited_today'):
-                status = "EXITED"
-            elif pos_state.get('entry_taken'):
-                direction = pos_state.get('direction', 'BUY')
-                remaining_lots = pos_state.get('remaining_lots', 0)
-                entry_price = pos_state.get('entry_price', pos_state.get('Entry', 0))
-                pnl = (ltp - entry_price) * remaining_lots if ltp and entry_price else 0
-                if pnl != 0:
-                    status = f"{direction} {remaining_lots}L P&L:{pnl:+.0f}"
-                else:
-                    status = f"{direction} {remaining_lots}L"
-            elif pos_state.get('signal_detected'):
-                direction = pos_state.get('direction', 'BUY')
-                entry_price = pos_state.get('Entry', 0)
-                status = f"WAIT {direction}@{entry_price:.1f}"
-            else:
-                status = "NO SIGNAL"
-            
-            # Truncate status if too long
-            if len(status) > 19:
-                status = status[:16] + "..."
-            
-            # Get last 2 candles info (compact: just time and G/R)
-            candle1_info = "N/A"
-            candle2_info = "N/A"
-            
-            candle1 = pos_state.get('last_candle_1')
-            candle2 = pos_state.get('last_candle_2')
-            
-            if candle1:
-                time_str = candle1.get('date_str', 'N/A')
-                if hasattr(candle1.get('date'), 'strftime'):
-                    time_str = candle1['date'].strftime('%H:%M')
-                color = 'G' if candle1.get('color') == 'GREEN' else 'R' if candle1.get('color') == 'RED' else '?'
-                candle1_info = f"{time_str} {color}"
-            
-            if candle2:
-                time_str = candle2.get('date_str', 'N/A')
-                if hasattr(candle2.get('date'), 'strftime'):
-                    time_str = candle2['date'].strftime('%H:%M')
-                color = 'G' if candle2.get('color') == 'GREEN' else 'R' if candle2.get('color') == 'RED' else '?'
-                candle2_info = f"{time_str} {color}"
-            
-            print(f"{symbol:<18} {status:<20} {ltp_str:<10} {candle1_info:<8} {candle2_info:<8}")
-        
-        print(f"{'-'*85}\n")
-        
-    except Exception as e:
-        print(f"Error printing dashboard: {e}")
-        traceback.print_exc()
+    previous_state = pos_state.state
+    previous_targets_hit = pos_state.targets_hit
+    
+    def on_exit_ack(response):
+        if order_accepted(response):
+            return
+        pos_state.remaining_lots += lots
+        if pos_state.state is exit_state or pos_state.state in CLOSED_STATES:
+            pos_state.state = previous_state
+            pos_state.targets_hit = previous_targets_hit
+        message = f"[EXIT NOT ACCEPTED] {params['Symbol']} - {lots} lots still open, back to {pos_state.state.value}, Response: {response}"
+        print(message)
+        write_to_order_logs(message, flush=True)
+    
+    submit_exit_order(params["FyresSymbol"], lots, ltp, "INTRADAY", on_ack=on_exit_ack, order_tag=make_order_tag(unique_key))
+    pos_state.state = exit_state
+    pos_state.remaining_lots -= lots
+
+# TradeSettings column with the lots booked at T1..T3 (T4 closes whatever is left)
+TARGET_LOTS_COLUMNS = ('Tgt1Lots', 'Tgt2Lots', 'Tgt3Lots')
+
+# Dashboard drawn on its own thread from snapshots published by the trading thread
+dashboard_renderer = DashboardRenderer()
+
+def publish_dashboard():
+    """Hand the renderer a fresh snapshot (the only dashboard work on the trading thread)."""
+    dashboard_renderer.publish(build_snapshot(result_dict, positions_state))
+
+def publish_status():
+    """Hand the status server a fresh snapshot of LTPs, positions, orders and loop statistics."""
+    if not status_server.running:
+        return
+    status_server.publish({
+        'taken_at': time.time(),
+        'ltp': {unique_key: params.get('FyresLtp') for unique_key, params in result_dict.items()},
+        'positions': {unique_key: pos_state.to_dict() for unique_key, pos_state in positions_state.items()},
+        'orders': {'open': list(open_orders.values()), 'gateway_pending': order_gateway.pending_count()},
+        'engine': dict(engine_stats, rows=len(result_dict),
+                       positions_open=sum(1 for pos_state in positions_state.values() if pos_state.state in LADDER_STEP)),
+        'loop_duration_us': loop_histogram.summary() if loop_histogram.total else {},
+        'order_latency_us': latency_tracker.summary(),
+    })
 
 def monitor_entry_exit(unique_key, params, positions_state):
     """
@@ -784,107 +850,95 @@ def monitor_entry_exit(unique_key, params, positions_state):
     Also handles StopTime-based position closing.
     """
     try:
-        if unique_key not in positions_state:
-            return
+        # Tick range since the previous poll (UpdateData); consumed here so it is never reused
+        interval_high = params.pop('IntervalHigh', None)
+        interval_low = params.pop('IntervalLow', None)
         
-        pos_state = positions_state[unique_key]
-        
-        # Skip if already exited today
-        if pos_state.get('exited_today'):
+        pos_state = positions_state.get(unique_key)
+        if pos_state is None:
             return
         
-        # Skip if no signal detected
-        if not pos_state.get('signal_detected'):
+        # Skip if no signal detected or already exited today
+        state = pos_state.state
+        if state is PositionStatus.NO_SIGNAL or state in CLOSED_STATES:
             return
         
         ltp = params.get('FyresLtp')
         if ltp is None:
             return
+        # Triggers compare against the highest / lowest price seen since the last evaluation
+        # (just the LTP when every tick is evaluated, as in event-driven mode)
+        high = ltp if interval_high is None else max(interval_high, ltp)
+        low = ltp if interval_low is None else min(interval_low, ltp)
+        
+        latency_tracker.begin_evaluation(unique_key, params["FyresSymbol"])
+        schedule = params['Schedule']
+        now = time.time()
         
-        start_time = params.get("StartTime")
-        stop_time = params.get("StopTime")
-        current_time = datetime.now(pytz.timezone('Asia/Kolkata'))
-        current_time_obj = current_time.time()
+        direction = pos_state.direction or 'BUY'
+        is_buy = direction == 'BUY'
+        # Opposite side closes the position
+        submit_exit_order = submit_sell_order if is_buy else submit_buy_order
         
         # Check if current time has reached or passed StopTime
         # In intraday mode, close all open positions at StopTime
-        if stop_time:
-            try:
-                stop_hour, stop_min = map(int, stop_time.split(':'))
-                stop_time_obj = dt_time(stop_hour, stop_min)
-                
-                # If current time >= StopTime
-                if current_time_obj >= stop_time_obj:
-                    # If position is open (entry taken), close it
-                    if pos_state.get('entry_taken') and not pos_state.get('squared_off_at_stoptime', False):
-                        remaining_lots = pos_state.get('remaining_lots', 0)
-                        if remaining_lots > 0:
-                            direction = pos_state.get('direction', 'BUY')
-                            # Place opposite order to close position
-                            if direction == 'BUY':
-                                place_sell_order(params["FyresSymbol"], remaining_lots, ltp, "INTRADAY")
-                            else:  # SELL
-                                place_buy_order(params["FyresSymbol"], remaining_lots, ltp, "INTRADAY")
-                            
-                            pos_state['exited_today'] = True
-                            pos_state['position_state'] = 'squared_off_stoptime'
-                            pos_state['squared_off_at_stoptime'] = True
-                            pos_state['remaining_lots'] = 0
-                            message = f"[SQUARE OFF - StopTime] {params['Symbol']} at {ltp:.2f}, Lots: {remaining_lots} (Intraday)"
-                            print(message)
-                            write_to_order_logs(message)
-                            return
-                    # If signal detected but entry not taken, mark as expired at StopTime
-                    elif pos_state.get('signal_detected') and not pos_state.get('entry_taken') and not pos_state.get('exited_today'):
-                        pos_state['exited_today'] = True
-                        pos_state['position_state'] = 'expired_stoptime'
-                        message = f"[SIGNAL EXPIRED - StopTime] {params['Symbol']} - Signal detected but entry not taken. Marked as expired at StopTime."
-                        print(message)
-                        write_to_order_logs(message)
-                        return
-            except Exception as e:
-                print(f"Error checking StopTime for {params.get('Symbol', 'unknown')}: {e}")
+        square_off = schedule.square_off
+        if square_off is not None and now >= square_off:
+            # If position is open (entry taken), close it
+            if state in LADDER_STEP:
+                remaining_lots = pos_state.remaining_lots
+                if remaining_lots > 0:
+                    submit_row_exit(unique_key, params, pos_state, submit_exit_order, remaining_lots, ltp,
+                                    PositionStatus.SQUARED_OFF_STOPTIME)
+                    message = f"[SQUARE OFF - StopTime] {params['Symbol']} at {ltp:.2f}, Lots: {remaining_lots} (Intraday)"
+                    print(message)
+                    write_to_order_logs(message)
+                    return
+            # If signal detected but entry not taken, mark as expired at StopTime
+            # (an entry order still waiting for its acknowledgement is squared off once it is confirmed)
+            elif state is PositionStatus.WAITING_ENTRY:
+                pos_state.state = PositionStatus.EXPIRED_STOPTIME
+                message = f"[SIGNAL EXPIRED - StopTime] {params['Symbol']} - Signal detected but entry not taken. Marked as expired at StopTime."
+                print(message)
+                write_to_order_logs(message)
+                return
         
         # Check if we're within trading hours
-        if not is_time_between(start_time, stop_time):
+        if not schedule.in_window(now):
             return
         
-        entry_price = pos_state.get('Entry')
+        entry_price = pos_state.entry
         if entry_price is None:
             return
         
-        position_state = pos_state.get('position_state', 'waiting_entry')
-        direction = pos_state.get('direction', 'BUY')
-        
         # Entry Logic
-        if position_state == 'waiting_entry':
-            entry_triggered = False
-            
-            if direction == 'BUY' and ltp >= entry_price:
-                entry_triggered = True
-            elif direction == 'SELL' and ltp <= entry_price:
-                entry_triggered = True
+        if state is PositionStatus.WAITING_ENTRY:
+            entry_triggered = high >= entry_price if is_buy else low <= entry_price
             
             if entry_triggered:
-                # Take entry
+                # Take entry (order is sent on the gateway; state is applied when the broker answers)
                 entry_lots = params.get("EntryLots", 0)
                 if entry_lots > 0:
-                    if direction == 'BUY':
-                        response = place_buy_order(params["FyresSymbol"], entry_lots, ltp, "INTRADAY")
-                    else:  # SELL
-                        response = place_sell_order(params["FyresSymbol"], entry_lots, ltp, "INTRADAY")
+                    pos_state.state = PositionStatus.ENTRY_PENDING
                     
-                    if response:
-                        pos_state['entry_taken'] = True
-                        pos_state['position_state'] = 'in_position'
-                        pos_state['entry_price'] = ltp
-                        pos_state['entry_time'] = datetime.now().isoformat()
-                        pos_state['remaining_lots'] = entry_lots
-                        pos_state['Entry'] = ltp
+                    def on_entry_ack(response, fill_price=ltp):
+                        if not order_accepted(response):
+                            # Order failed or rejected: go back to waiting for the entry price
+                            pos_state.state = PositionStatus.WAITING_ENTRY
+                            message = f"[ENTRY NOT ACCEPTED] {params['Symbol']} - {direction}, Response: {response}"
+                            print(message)
+                            write_to_order_logs(message, flush=True)
+                            return
+                        
+                        pos_state.state = PositionStatus.IN_POSITION
+                        pos_state.entry_price = fill_price
+                        pos_state.entry_time = time.time()
+                        pos_state.remaining_lots = entry_lots
+                        pos_state.entry = fill_price
                         
                         # Recalculate levels with actual entry price
                         levels = calculate_levels(
-                            ltp,  # Actual entry price
+                            fill_price,  # Actual entry price
                             direction,
                             params.get('T1Percent', 1.0),
                             params.get('T2Percent', 1.0),
@@ -895,183 +949,407 @@ def monitor_entry_exit(unique_key, params, positions_state):
                             params.get('Sl3Points', 0),
                             params.get('Sl4Points', 0)
                         )
-                        
-                        pos_state['T1'] = levels['T1']
-                        pos_state['SL1'] = levels['SL1']
-                        pos_state['T2'] = levels['T2']
-                        pos_state['SL2'] = levels['SL2']
-                        pos_state['T3'] = levels['T3']
-                        pos_state['SL3'] = levels['SL3']
-                        pos_state['T4'] = levels['T4']
-                        pos_state['SL4'] = levels['SL4']
+                        pos_state.set_levels(levels)
                         
                         # Log entry taken
                         message = f"[ENTRY PRICE REACHED] {params['Symbol']} - {direction} at {datetime.now()}"
                         write_to_order_logs(message)
-                        write_to_order_logs(f"  Entry Price: {ltp:.2f}")
+                        write_to_order_logs(f"  Entry Price: {fill_price:.2f}")
                         write_to_order_logs(f"  Taking {direction} position with {entry_lots} lots")
                         write_to_order_logs("")
                         
-                        print(f"[ENTRY TAKEN] {params['Symbol']} - {direction} at {ltp:.2f}, Lots: {entry_lots}")
-        
-        # Exit Logic (only if entry is taken)
-        if not pos_state.get('entry_taken'):
+                        print(f"[ENTRY TAKEN] {params['Symbol']} - {direction} at {fill_price:.2f}, Lots: {entry_lots}")
+
+                        # Confirmed after StopTime (its timer has already fired): square off now
+                        if schedule.square_off is not None and time.time() >= schedule.square_off:
+                            monitor_entry_exit(unique_key, params, positions_state)
+                    
+                    submit_entry_order = submit_buy_order if is_buy else submit_sell_order
+                    submit_entry_order(params["FyresSymbol"], entry_lots, ltp, "INTRADAY", on_ack=on_entry_ack, order_tag=make_order_tag(unique_key))
             return
         
-        # Get all levels
-        t1 = pos_state.get('T1', 0)
-        sl1 = pos_state.get('SL1', 0)
-        t2 = pos_state.get('T2', 0)
-        sl2 = pos_state.get('SL2', 0)
-        t3 = pos_state.get('T3', 0)
-        sl3 = pos_state.get('SL3', 0)
-        t4 = pos_state.get('T4', 0)
-        sl4 = pos_state.get('SL4', 0)
-        remaining_lots = pos_state.get('remaining_lots', 0)
+        # Exit Logic (only if entry is taken): ladder step 0 is in_position, 1-3 are t1_hit..t3_hit
+        step = LADDER_STEP.get(state)
+        if step is None:
+            return
         
+        remaining_lots = pos_state.remaining_lots
         if remaining_lots <= 0:
             return
         
-        # Get Initial SL
-        initial_sl = pos_state.get('InitialSL', 0)
+        # Step 0 is protected by the Initial SL, later steps by SL2..SL4
+        stop = pos_state.initial_sl if step == 0 else pos_state.stops[step]
+        target = pos_state.targets[step]
         
-        # State machine for exits
-        if position_state == 'in_position':
-            # Check Initial SL
-            if (direction == 'BUY' and ltp <= initial_sl) or (direction == 'SELL' and ltp >= initial_sl):
-                # Exit all remaining lots
-                if remaining_lots > 0:
-                    if direction == 'BUY':
-                        place_sell_order(params["FyresSymbol"], remaining_lots, ltp, "INTRADAY")
-                    else:  # SELL
-                        place_buy_order(params["FyresSymbol"], remaining_lots, ltp, "INTRADAY")
-                    
-                    pos_state['exited_today'] = True
-                    pos_state['position_state'] = 'exited_sl1'
-                    pos_state['remaining_lots'] = 0
-                    message = f"[EXIT - SL1] {params['Symbol']} at {ltp:.2f}, Lots: {remaining_lots}. All positions closed."
-                    print(message)
-                    write_to_order_logs(message)
-                    return
-            
-            # Check T1
-            if (direction == 'BUY' and ltp >= t1) or (direction == 'SELL' and ltp <= t1):
-                tgt1_lots = params.get("Tgt1Lots", 0)
-                if tgt1_lots > 0 and remaining_lots >= tgt1_lots:
-                    if direction == 'BUY':
-                        place_sell_order(params["FyresSymbol"], tgt1_lots, ltp, "INTRADAY")
-                    else:  # SELL
-                        place_buy_order(params["FyresSymbol"], tgt1_lots, ltp, "INTRADAY")
-                    
-                    pos_state['remaining_lots'] -= tgt1_lots
-                    pos_state['t1_hit'] = True
-                    pos_state['position_state'] = 't1_hit'
-                    message = f"[T1 HIT] {params['Symbol']} at {ltp:.2f}, Exited: {tgt1_lots} lots, Remaining: {pos_state['remaining_lots']}"
-                    print(message)
-                    write_to_order_logs(message)
-
-        elif position_state == 't1_hit':
-            # Check SL2 or T2
-            if (direction == 'BUY' and ltp <= sl2) or (direction == 'SELL' and ltp >= sl2):
-                # Exit all remaining lots
-                if remaining_lots > 0:
-                    if direction == 'BUY':
-                        place_sell_order(params["FyresSymbol"], remaining_lots, ltp, "INTRADAY")
-                    else:  # SELL
-                        place_buy_order(params["FyresSymbol"], remaining_lots, ltp, "INTRADAY")
-                    
-                    pos_state['exited_today'] = True
-                    pos_state['position_state'] = 'exited_sl2'
-                    pos_state['remaining_lots'] = 0
-                    message = f"[EXIT - SL2] {params['Symbol']} at {ltp:.2f}, Lots: {remaining_lots}. All positions closed."
-                    print(message)
-                    write_to_order_logs(message)
-                    return
-            elif (direction == 'BUY' and ltp >= t2) or (direction == 'SELL' and ltp <= t2):
-                tgt2_lots = params.get("Tgt2Lots", 0)
-                if tgt2_lots > 0 and remaining_lots >= tgt2_lots:
-                    if direction == 'BUY':
-                        place_sell_order(params["FyresSymbol"], tgt2_lots, ltp, "INTRADAY")
-                    else:  # SELL
-                        place_buy_order(params["FyresSymbol"], tgt2_lots, ltp, "INTRADAY")
-                    
-                    pos_state['remaining_lots'] -= tgt2_lots
-                    pos_state['t2_hit'] = True
-                    pos_state['position_state'] = 't2_hit'
-                    message = f"[T2 HIT] {params['Symbol']} at {ltp:.2f}, Exited: {tgt2_lots} lots, Remaining: {pos_state['remaining_lots']}"
-                    print(message)
-                    write_to_order_logs(message)
-
-        elif position_state == 't2_hit':
-            # Check SL3 or T3
-            if (direction == 'BUY' and ltp <= sl3) or (direction == 'SELL' and ltp >= sl3):
-                # Exit all remaining lots
-                if remaining_lots > 0:
-                    if direction == 'BUY':
-                        place_sell_order(params["FyresSymbol"], remaining_lots, ltp, "INTRADAY")
-                    else:  # SELL
-                        place_buy_order(params["FyresSymbol"], remaining_lots, ltp, "INTRADAY")
-                    
-                    pos_state['exited_today'] = True
-                    pos_state['position_state'] = 'exited_sl3'
-                    pos_state['remaining_lots'] = 0
-                    message = f"[EXIT - SL3] {params['Symbol']} at {ltp:.2f}, Lots: {remaining_lots}. All positions closed."
-                    print(message)
-                    write_to_order_logs(message)
-                    return
-            elif (direction == 'BUY' and ltp >= t3) or (direction == 'SELL' and ltp <= t3):
-                tgt3_lots = params.get("Tgt3Lots", 0)
-                if tgt3_lots > 0 and remaining_lots >= tgt3_lots:
-                    if direction == 'BUY':
-                        place_sell_order(params["FyresSymbol"], tgt3_lots, ltp, "INTRADAY")
-                    else:  # SELL
-                        place_buy_order(params["FyresSymbol"], tgt3_lots, ltp, "INTRADAY")
-                    
-                    pos_state['remaining_lots'] -= tgt3_lots
-                    pos_state['t3_hit'] = True
-                    pos_state['position_state'] = 't3_hit'
-                    message = f"[T3 HIT] {params['Symbol']} at {ltp:.2f}, Exited: {tgt3_lots} lots, Remaining: {pos_state['remaining_lots']}"
-                    print(message)
-                    write_to_order_logs(message)
-
-        elif position_state == 't3_hit':
-            # Check SL4 or T4
-            if (direction == 'BUY' and ltp <= sl4) or (direction == 'SELL' and ltp >= sl4):
-                # Exit all remaining lots
-                if remaining_lots > 0:
-                    if direction == 'BUY':
-                        place_sell_order(params["FyresSymbol"], remaining_lots, ltp, "INTRADAY")
-                    else:  # SELL
-                        place_buy_order(params["FyresSymbol"], remaining_lots, ltp, "INTRADAY")
-                    
-                    pos_state['exited_today'] = True
-                    pos_state['position_state'] = 'exited_sl4'
-                    pos_state['remaining_lots'] = 0
-                    message = f"[EXIT - SL4] {params['Symbol']} at {ltp:.2f}, Lots: {remaining_lots}. All positions closed."
-                    print(message)
-                    write_to_order_logs(message)
-                    return
-            elif (direction == 'BUY' and ltp >= t4) or (direction == 'SELL' and ltp <= t4):
+        if low <= stop if is_buy else high >= stop:
+            # Exit all remaining lots
+            submit_row_exit(unique_key, params, pos_state, submit_exit_order, remaining_lots, ltp, STOP_EXIT_STATES[step])
+            message = f"[EXIT - SL{step + 1}] {params['Symbol']} at {ltp:.2f}, Lots: {remaining_lots}. All positions closed."
+            print(message)
+            write_to_order_logs(message)
+            return
+        
+        if high >= target if is_buy else low <= target:
+            if step == 3:
                 # T4 hit - exit ALL remaining lots
-                if remaining_lots > 0:
-                    if direction == 'BUY':
-                        place_sell_order(params["FyresSymbol"], remaining_lots, ltp, "INTRADAY")
-                    else:  # SELL
-                        place_buy_order(params["FyresSymbol"], remaining_lots, ltp, "INTRADAY")
-                    
-                    pos_state['remaining_lots'] = 0
-                    pos_state['t4_hit'] = True
-                    pos_state['position_state'] = 't4_hit'
-                    pos_state['exited_today'] = True
-                    message = f"[T4 HIT] {params['Symbol']} at {ltp:.2f}, Exited ALL {remaining_lots} lots. All positions closed."
-                    print(message)
-                    write_to_order_logs(message)
-                    return
+                submit_row_exit(unique_key, params, pos_state, submit_exit_order, remaining_lots, ltp, PositionStatus.T4_HIT)
+                pos_state.targets_hit = 4
+                message = f"[T4 HIT] {params['Symbol']} at {ltp:.2f}, Exited ALL {remaining_lots} lots. All positions closed."
+                print(message)
+                write_to_order_logs(message)
+                return
+            
+            tgt_lots = params.get(TARGET_LOTS_COLUMNS[step], 0)
+            if tgt_lots > 0 and remaining_lots >= tgt_lots:
+                submit_row_exit(unique_key, params, pos_state, submit_exit_order, tgt_lots, ltp, TARGET_HIT_STATES[step])
+                pos_state.targets_hit = step + 1
+                message = f"[T{step + 1} HIT] {params['Symbol']} at {ltp:.2f}, Exited: {tgt_lots} lots, Remaining: {pos_state.remaining_lots}"
+                print(message)
+                write_to_order_logs(message)
     
     except Exception as e:
         print(f"Error monitoring entry/exit for {params.get('Symbol', 'unknown')}: {e}")
         traceback.print_exc()
 
+# Row and housekeeping timers: candle checks, StartTime refresh, StopTime square-off,
+# dashboard / candle refresh / orderbook reconcile and the daily schedule rollover
+scheduler = EventScheduler()
+
+# Housekeeping timer -> interval in seconds
+PERIODIC_TASKS = {
+    'candle_refresh': 10,  # dashboard candle data for all symbols
+    'reconcile': 60,       # order store vs full orderbook
+    'missing_ltps': 5,     # REST quotes for symbols the websocket has not delivered
+    'dashboard': 1,        # snapshot for the dashboard thread
+    'status': 1,           # snapshot for the status server
+    'subscriptions': 5,    # unsubscribe symbols whose rows are done for the day
+    'settings': 2,         # reload TradeSettings.csv when it changes
+}
+
+# FyresSymbols unsubscribed from the market-data hub because all their rows are done for the day
+released_symbols = set()
+
+def release_finished_symbols():
+    """Unsubscribe symbols whose rows have all exited today, so their ticks stop arriving."""
+    finished = []
+    for symbol, keys in symbol_index.items():
+        if symbol in released_symbols:
+            continue
+        if all(unique_key in positions_state and positions_state[unique_key].exited_today for unique_key in keys):
+            finished.append(symbol)
+    if not finished:
+        return
+    released_symbols.update(finished)
+    unsubscribe_symbols(finished)
+    message = f"[SUBSCRIPTIONS] Unsubscribed {len(finished)} finished symbol(s): {', '.join(finished)}"
+    print(message)
+    write_to_order_logs(message)
+
+# TradeSettings.csv is watched and reloaded while running (off in shard processes)
+SETTINGS_RELOAD = True
+# settings_signature() of the file result_dict was loaded from
+settings_signature_loaded = None
+# Signature of a change seen by the previous check (reloaded once it is seen twice in a row)
+settings_signature_pending = None
+# True while a reload is being read on its background thread
+settings_reload_running = False
+# Rows removed from TradeSettings.csv that have traded today; kept (and their positions managed)
+# until the day rolls over, so putting one back does not trade it again
+retired_rows = set()
+# Columns that change the levels of a signal waiting for entry
+LEVEL_COLUMNS = ('Market', 'EntryOffset', 'T1Percent', 'T2Percent', 'T3Percent', 'T4Percent',
+                 'SL1Points', 'Sl2Points', 'Sl3Points', 'Sl4Points')
+
+def holds_position(pos_state):
+    """True once an entry order is sent until the position is closed (settings of the row are then frozen)."""
+    return pos_state is not None and (pos_state.state is PositionStatus.ENTRY_PENDING or pos_state.state in LADDER_STEP)
+
+def has_traded_today(pos_state):
+    """True once the row has sent an order today (its record must outlive a reload that drops the row)."""
+    return pos_state is not None and pos_state.state not in (
+        PositionStatus.NO_SIGNAL, PositionStatus.WAITING_ENTRY, PositionStatus.EXPIRED_STOPTIME)
+
+def check_settings_file():
+    """
+    Settings timer: start a background reload when TradeSettings.csv has changed and then
+    stayed unchanged for one more check, so a file still being written is not read.
+    """
+    global settings_signature_loaded, settings_signature_pending, settings_reload_running
+    if not SETTINGS_RELOAD or settings_reload_running:
+        return
+    signature = settings_signature(SETTINGS_PATH)
+    if signature is None or signature == settings_signature_loaded:
+        settings_signature_pending = None
+        return
+    if signature != settings_signature_pending:
+        settings_signature_pending = signature
+        return
+    settings_signature_loaded = signature
+    settings_signature_pending = None
+    settings_reload_running = True
+    threading.Thread(target=load_settings_in_background, args=(signature,), name="settings-reload", daemon=True).start()
+
+def load_settings_in_background(signature):
+    """
+    Parse TradeSettings.csv and seed candles of new symbol/timeframe pairs off the trading
+    thread, then hand the rows to it as a ("settings", rows) event (rows is None on failure).
+    A file that changed while it was read is not applied; the next checks reload it.
+    """
+    loaded = None
+    try:
+        loaded = load_trade_settings(SETTINGS_PATH, entry_offset=ENTRY_OFFSET)
+        if settings_signature(SETTINGS_PATH) != signature:
+            raise ValueError("the file changed while it was read")
+        for params in loaded.values():
+            symbol, timeframe = params['FyresSymbol'], params['Timeframe']
+            if timeframe is None or candle_aggregator.has_history(symbol, timeframe):
+                continue
+            try:
+                candle_aggregator.seed(symbol, timeframe, fetchOHLC(symbol, timeframe))
+            except Exception as e:
+                print(f"[CANDLES] Failed to seed {symbol} ({timeframe} min): {e}")
+    except Exception as e:
+        loaded = None
+        message = f"[SETTINGS] {SETTINGS_PATH} not reloaded, keeping the current settings: {e}"
+        print(message)
+        write_to_order_logs(message)
+    engine_queue.put(("settings", loaded))
+
+def add_row(params, now_epoch):
+    """Start trading a row added to TradeSettings.csv."""
+    unique_key = params['unique_key']
+    suffix = 1
+    while unique_key in result_dict:
+        unique_key = f"{params['unique_key']}_{suffix}"
+        suffix += 1
+    params['unique_key'] = unique_key
+    params['Schedule'] = RowSchedule(params.get('StartTime'), params.get('StopTime'), now_epoch)
+    report_unreadable_times(params)
+    result_dict[unique_key] = params
+    
+    symbol = params['FyresSymbol']
+    FyerSymbolList.append(symbol)
+    keys = symbol_index.setdefault(symbol, [])
+    keys.append(unique_key)
+    if len(keys) == 1 or symbol in released_symbols:
+        released_symbols.discard(symbol)
+        subscribe_symbols([symbol])
+    if symbol in last_applied_ltp:
+        params['FyresLtp'] = float(last_applied_ltp[symbol])
+    schedule_row_events(unique_key, params, now_epoch)
+
+def remove_row(unique_key):
+    """Stop trading a row: drop its state and timers, unsubscribing its symbol if no row is left."""
+    params = result_dict.pop(unique_key)
+    positions_state.pop(unique_key, None)
+    retired_rows.discard(unique_key)
+    for kind in ('candle_check', 'session_start', 'stop_time'):
+        scheduler.cancel(kind, unique_key)
+    
+    symbol = params['FyresSymbol']
+    FyerSymbolList.remove(symbol)
+    keys = symbol_index[symbol]
+    keys.remove(unique_key)
+    if not keys:
+        del symbol_index[symbol]
+        released_symbols.discard(symbol)
+        unsubscribe_symbols([symbol])
+
+def update_row(unique_key, new_params, columns, now_epoch):
+    """Apply changed columns to a row that does not hold a position."""
+    params = result_dict[unique_key]
+    for column in columns:
+        params[column] = new_params[column]
+    pos_state = positions_state.get(unique_key)
+    
+    if 'StartTime' in columns or 'StopTime' in columns or 'Timeframe' in columns:
+        params['Schedule'] = RowSchedule(params.get('StartTime'), params.get('StopTime'), now_epoch)
+        report_unreadable_times(params)
+        if pos_state is not None:
+            pos_state.next_check_time = None
+        for kind in ('candle_check', 'session_start', 'stop_time'):
+            scheduler.cancel(kind, unique_key)
+        schedule_row_events(unique_key, params, now_epoch)
+    
+    # A signal waiting for entry takes the new lots and levels straight away
+    if pos_state is not None and pos_state.state is PositionStatus.WAITING_ENTRY:
+        if 'EntryLots' in columns:
+            pos_state.remaining_lots = params.get('EntryLots', 0)
+        if any(column in LEVEL_COLUMNS for column in columns):
+            set_signal_levels(pos_state, params)
+            message = f"[SETTINGS] {params['Symbol']} waiting signal re-levelled: Entry {pos_state.entry:.2f}, Initial SL {pos_state.initial_sl:.2f}"
+            print(message)
+            write_to_order_logs(message)
+
+def apply_settings(loaded):
+    """
+    Apply a reloaded TradeSettings.csv on the trading thread (see load_settings_in_background).
+    
+    Rows are matched by content (see diff_settings): new rows are subscribed and scheduled,
+    removed rows are dropped (or retired until the day rolls over if they have traded today),
+    and changed rows take the new values unless they hold a position.
+    """
+    global settings_reload_running
+    settings_reload_running = False
+    if loaded is None:
+        return
+    
+    now_epoch = time.time()
+    # Retired rows take part too: a row put back in the file is matched with the retired row
+    # still managing its position, rather than added as a new row that could open a second one
+    added, removed, changed = diff_settings(result_dict, loaded)
+    returned = retired_rows - set(removed)
+    retired_rows.difference_update(returned)
+    skipped = []
+    for unique_key in removed:
+        if has_traded_today(positions_state.get(unique_key)):
+            retired_rows.add(unique_key)
+        else:
+            remove_row(unique_key)
+    for params in added:
+        add_row(params, now_epoch)
+    for unique_key, new_params, columns in changed:
+        if holds_position(positions_state.get(unique_key)):
+            skipped.append(unique_key)
+            continue
+        update_row(unique_key, new_params, columns, now_epoch)
+    
+    if not (added or removed or changed or returned):
+        return
+    message = (f"[SETTINGS] Reloaded {SETTINGS_PATH}: {len(added)} added, {len(removed)} removed"
+               f" ({len(retired_rows)} kept for the day), {len(changed) - len(skipped)} updated")
+    if returned:
+        message += f", back in the file: {', '.join(sorted(returned))}"
+    if skipped:
+        message += f", not applied to rows in a position: {', '.join(skipped)}"
+    print(message)
+    write_to_order_logs(message)
+
+def drop_retired_rows():
+    """Day rollover: drop the rows removed from TradeSettings.csv whose position is closed."""
+    for unique_key in list(retired_rows):
+        if not holds_position(positions_state.get(unique_key)):
+            remove_row(unique_key)
+
+def schedule_row_events(unique_key, params, now_epoch):
+    """Put a row's next candle check and today's StartTime / StopTime instants on the timer heap."""
+    schedule = params['Schedule']
+    timeframe = params.get("Timeframe")
+    
+    if timeframe is not None:
+        pos_state = positions_state.get(unique_key)
+        if pos_state is None:
+            pos_state = positions_state[unique_key] = PositionRecord()
+        
+        # First check at StartTime + 1 second (e.g., 9:30:01), or the next timeframe
+        # interval if that has already passed today
+        if pos_state.next_check_time is None:
+            first_check_time = schedule.first_check
+            if first_check_time is not None and now_epoch < first_check_time:
+                pos_state.next_check_time = first_check_time
+            else:
+                pos_state.next_check_time = next_timeframe_boundary(now_epoch, timeframe)
+        scheduler.schedule(pos_state.next_check_time, 'candle_check', unique_key)
+    
+    # Refresh candle data for the dashboard as soon as StartTime is reached
+    if schedule.start is not None and schedule.start >= now_epoch:
+        scheduler.schedule(schedule.start, 'session_start', unique_key)
+    
+    # Square off / expire at StopTime even if the symbol does not tick
+    if schedule.square_off is not None:
+        scheduler.schedule(max(schedule.square_off, now_epoch), 'stop_time', unique_key)
+
+def schedule_all_events(now_epoch):
+    """(Re)build the timer heap for every row plus the housekeeping timers."""
+    scheduler.clear()
+    for unique_key, params in result_dict.items():
+        schedule_row_events(unique_key, params, now_epoch)
+    
+    # Candle data and dashboard right away; the others after their first interval
+    scheduler.schedule(now_epoch, 'candle_refresh')
+    scheduler.schedule(now_epoch, 'dashboard')
+    scheduler.schedule(now_epoch, 'status')
+    scheduler.schedule(now_epoch + PERIODIC_TASKS['reconcile'], 'reconcile')
+    scheduler.schedule(now_epoch + PERIODIC_TASKS['missing_ltps'], 'missing_ltps')
+    scheduler.schedule(now_epoch + PERIODIC_TASKS['subscriptions'], 'subscriptions')
+    scheduler.schedule(now_epoch + PERIODIC_TASKS['settings'], 'settings')
+    scheduler.schedule(schedule_expiry, 'day_rollover')
+
+def run_candle_check(unique_key, params, now_epoch):
+    """Timeframe-boundary check of one row, then schedule its next boundary."""
+    timeframe = params["Timeframe"]
+    
+    # Only check signals during trading hours
+    if params['Schedule'].in_window(now_epoch):
+        # Check for signal (this also updates candle data); a new signal is checked
+        # against the current LTP straight away instead of waiting for the next tick
+        if check_signal_for_symbol(unique_key, params, positions_state):
+            monitor_entry_exit(unique_key, params, positions_state)
+    else:
+        # Even if not in trading hours, update candle data for dashboard
+        update_candle_data_for_dashboard(unique_key, params, positions_state)
+    
+    # Update next check time to next timeframe interval
+    pos_state = positions_state[unique_key]
+    pos_state.next_check_time = next_timeframe_boundary(now_epoch, timeframe)
+    scheduler.schedule(pos_state.next_check_time, 'candle_check', unique_key)
+
+def run_timer(kind, key, now_epoch):
+    """Run one timer popped from the scheduler."""
+    global schedule_expiry
+    if key is not None:
+        params = result_dict.get(key)
+        if params is None:
+            return
+        if kind == 'candle_check':
+            run_candle_check(key, params, now_epoch)
+        elif kind == 'session_start':
+            update_candle_data_for_dashboard(key, params, positions_state)
+            # An overnight session that opens now is squared off at tomorrow's StopTime
+            if params['Schedule'].roll_square_off(now_epoch):
+                scheduler.schedule(params['Schedule'].square_off, 'stop_time', key)
+        elif kind == 'stop_time':
+            monitor_entry_exit(key, params, positions_state)
+        return
+    
+    if kind == 'candle_refresh':
+        for unique_key, params in result_dict.items():
+            update_candle_data_for_dashboard(unique_key, params, positions_state)
+    elif kind == 'reconcile':
+        reconcile_order_store()
+    elif kind == 'missing_ltps':
+        # Rows whose LTP only arrives by REST never tick, so run their checks here
+        for unique_key in refresh_missing_ltps():
+            monitor_entry_exit(unique_key, result_dict[unique_key], positions_state)
+    elif kind == 'dashboard':
+        publish_dashboard()
+    elif kind == 'status':
+        publish_status()
+    elif kind == 'subscriptions':
+        release_finished_symbols()
+    elif kind == 'settings':
+        check_settings_file()
+    elif kind == 'day_rollover':
+        # New IST day: recompile the schedules and put today's StartTime / StopTime on the heap
+        drop_retired_rows()
+        schedule_expiry = compile_schedules(result_dict, now_epoch)
+        for unique_key, params in result_dict.items():
+            schedule_row_events(unique_key, params, now_epoch)
+        scheduler.schedule(schedule_expiry, 'day_rollover')
+        return
+    
+    if kind in PERIODIC_TASKS:
+        scheduler.schedule(now_epoch + PERIODIC_TASKS[kind], kind)
+
+def run_due_timers(now_epoch=None):
+    """Run every timer due at or before now_epoch (builds the heap on first use)."""
+    now_epoch = time.time() if now_epoch is None else now_epoch
+    if not scheduler:
+        schedule_all_events(now_epoch)
+    for due, kind, key in scheduler.pop_due(now_epoch):
+        engine_stats['timers'] += 1
+        run_timer(kind, key, now_epoch)
+
 def main_strategy():
     """
     Main strategy function that handles signal detection.
@@ -1079,119 +1357,110 @@ def main_strategy():
     """
     try:
         global result_dict, positions_state
+        started = time.perf_counter()
+        
+        # Apply order acknowledgements from the gateway
+        process_pending_events()
         
         # Update LTP data
         UpdateData()
         
-        now = datetime.now(pytz.timezone('Asia/Kolkata'))
-        
-        # Loop through each symbol and check for signals at timeframe intervals
-        for unique_key, params in result_dict.items():
-            timeframe = params.get("Timeframe")
-            if timeframe is None:
-                continue
-            
-            # Get or initialize next_check_time for this symbol
-            if unique_key not in positions_state:
-                positions_state[unique_key] = {}
-            
-            pos_state = positions_state[unique_key]
-            next_check_time = pos_state.get('next_check_time')
-            
-            # Initialize next_check_time if not set
-            if next_check_time is None:
-                # Set first check time to StartTime + 1 second (e.g., 9:30:01)
-                start_time_str = params.get("StartTime")
-                if start_time_str:
-                    try:
-                        start_hour, start_min = map(int, start_time_str.split(':'))
-                        # Create datetime for today at StartTime + 1 second
-                        today = now.date()
-                        first_check_time = pytz.timezone('Asia/Kolkata').localize(datetime.combine(today, dt_time(start_hour, start_min, 1)))
-                        # If StartTime has already passed today, set to next timeframe interval
-                        if now >= first_check_time:
-                            normalized_time = normalize_time_to_timeframe(now, timeframe)
-                            next_check_time = normalized_time + timedelta(minutes=timeframe)
-                        else:
-                            next_check_time = first_check_time
-                    except Exception as e:
-                        print(f"Error parsing StartTime for {params.get('Symbol', 'unknown')}: {e}")
-                        # Fallback to normalized time logic
-                        normalized_time = normalize_time_to_timeframe(now, timeframe)
-                        next_check_time = normalized_time + timedelta(minutes=timeframe)
-                else:
-                    # No StartTime specified, use normalized time logic
-                    normalized_time = normalize_time_to_timeframe(now, timeframe)
-                    next_check_time = normalized_time + timedelta(minutes=timeframe)
-                
-                pos_state['next_check_time'] = next_check_time.isoformat()
-            
-            # Convert string back to datetime
-            if isinstance(next_check_time, str):
-                next_check_time = datetime.fromisoformat(next_check_time)
-                # Ensure timezone-aware (in case it was saved as naive)
-                if next_check_time.tzinfo is None:
-                    next_check_time = pytz.timezone('Asia/Kolkata').localize(next_check_time)
-            
-            # Check if it's time to check for signal (every timeframe minutes)
-            if now >= next_check_time:
-                # Only check signals during trading hours
-                start_time = params.get("StartTime")
-                stop_time = params.get("StopTime")
-                if is_time_between(start_time, stop_time):
-                    # Check for signal (this also updates candle data)
-                    signal_detected = check_signal_for_symbol(unique_key, params, positions_state)
-                else:
-                    # Even if not in trading hours, update candle data for dashboard
-                    update_candle_data_for_dashboard(unique_key, params, positions_state)
-                
-                # Update next check time to next timeframe interval
-                normalized_time = normalize_time_to_timeframe(now, timeframe)
-                next_check_time = normalized_time + timedelta(minutes=timeframe)
-                pos_state['next_check_time'] = next_check_time.isoformat()
-            
-            # Also update candle data immediately when StartTime is reached (even if not time for signal check yet)
-            start_time = params.get("StartTime")
-            if start_time:
-                try:
-                    start_hour, start_min = map(int, start_time.split(':'))
-                    today = now.date()
-                    start_datetime = pytz.timezone('Asia/Kolkata').localize(datetime.combine(today, dt_time(start_hour, start_min)))
-                    # If StartTime was just reached (within last 5 seconds), update candle data
-                    time_since_start = (now - start_datetime).total_seconds()
-                    if 0 <= time_since_start <= 5:
-                        update_candle_data_for_dashboard(unique_key, params, positions_state)
-                except:
-                    pass
+        # Candle checks, StartTime / StopTime events and housekeeping that are due
+        run_due_timers()
         
         # Phase 2: Monitor entry/exit for all symbols (runs every second)
         # This includes checking StopTime for position closing
         for unique_key, params in result_dict.items():
             monitor_entry_exit(unique_key, params, positions_state)
         
-        # Update candle data for dashboard every 10 seconds (for all symbols)
-        if not hasattr(main_strategy, 'last_candle_update_time'):
-            main_strategy.last_candle_update_time = now - timedelta(seconds=11)  # Force immediate update on first run
-        
-        time_since_last_candle_update = (now - main_strategy.last_candle_update_time).total_seconds()
-        if time_since_last_candle_update >= 10:  # Update candle data every 10 seconds
-            for unique_key, params in result_dict.items():
-                update_candle_data_for_dashboard(unique_key, params, positions_state)
-            main_strategy.last_candle_update_time = now
-        
-        # Print dashboard every 5 seconds
-        if not hasattr(main_strategy, 'last_dashboard_time'):
-            main_strategy.last_dashboard_time = now
-        
-        time_since_last_dashboard = (now - main_strategy.last_dashboard_time).total_seconds()
-        if time_since_last_dashboard >= 5:  # Update dashboard every 5 seconds
-            print_dashboard(result_dict, positions_state)
-            main_strategy.last_dashboard_time = now
+        loop_histogram.record((time.perf_counter() - started) * 1e6)
                
     except Exception as e:
         print("Error in main strategy:", str(e))
         traceback.print_exc()
 
+def handle_event(event):
+    """Run one event taken from engine_queue on the trading thread."""
+    if event[0] == "tick":
+        engine_stats['ticks'] += 1
+        dispatch_tick(event[1], event[2], event[3])
+    elif event[0] == "order_ack":
+        engine_stats['order_acks'] += 1
+        event[1](event[2])
+    elif event[0] == "order_update":
+        engine_stats['order_updates'] += 1
+        handle_order_update(event[1], event[2])
+    elif event[0] == "settings":
+        apply_settings(event[1])
+
+def process_pending_events():
+    """Handle every event already waiting in engine_queue (used by the polling loop)."""
+    while True:
+        try:
+            event = engine_queue.get_nowait()
+        except queue.Empty:
+            return
+        handle_event(event)
+
+def dispatch_tick(symbol, ltp, receive_time=None):
+    """
+    Apply a single websocket tick to every row trading this symbol and run
+    the entry/exit state machine for those rows only.
+    """
+    latency_tracker.tick_applied(symbol, receive_time)
+    ltp = float(ltp)
+    for unique_key in symbol_index.get(symbol, ()):
+        params = result_dict[unique_key]
+        params['FyresLtp'] = ltp
+        monitor_entry_exit(unique_key, params, positions_state)
+
+def run_event_engine():
+    """
+    Event-driven main loop.
+    Every tick pushed by the websocket is dispatched as soon as it arrives (no tick is
+    coalesced, so a price that crosses a level and comes back is still seen), as are
+    order acknowledgements from the order gateway.
+    Between events the loop sleeps until the earliest timer on the scheduler (candle
+    boundaries, StartTime / StopTime, dashboard), so an idle engine does no work.
+    """
+    set_tick_queue(engine_queue)
+    # Seed LTPs that arrived before the queue was attached
+    UpdateData()
+    run_due_timers()
+    
+    while True:
+        try:
+            next_due = scheduler.next_due()
+            timeout = 1.0 if next_due is None else max(0.0, next_due - time.time())
+            started = None
+            try:
+                event = engine_queue.get(timeout=timeout)
+                started = time.perf_counter()
+                handle_event(event)
+                
+                # Drain whatever else arrived meanwhile before looking at the timers
+                while True:
+                    handle_event(engine_queue.get_nowait())
+            except queue.Empty:
+                pass
+            
+            now_epoch = time.time()
+            next_due = scheduler.next_due()
+            if next_due is not None and now_epoch >= next_due:
+                started = started or time.perf_counter()
+                # Orders placed by timers are not attributed to the last tick
+                latency_tracker.reset_ticks()
+                run_due_timers(now_epoch)
+            
+            if started is not None:
+                loop_histogram.record((time.perf_counter() - started) * 1e6)
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            print(f"[ERROR] Unexpected error in event engine: {e}")
+            traceback.print_exc()
+            time.sleep(1)
+
 
 
 if __name__ == "__main__":
@@ -1207,6 +1476,10 @@ if __name__ == "__main__":
     TOTP_KEY = credentials_dict_fyers.get('totpkey')
     FY_ID = credentials_dict_fyers.get('FY_ID')
     PIN = credentials_dict_fyers.get('PIN')
+    # Optional: run against a local FyersSimulator (row "simulator_url,http://127.0.0.1:8765")
+    simulator_url = credentials_dict_fyers.get('simulator_url')
+    if isinstance(simulator_url, str) and simulator_url.strip():
+        use_api_base(simulator_url.strip())
         # Automated login and initialization steps
     automated_login(client_id=client_id, redirect_uri=redirect_uri, secret_key=secret_key, FY_ID=FY_ID,
                                         PIN=PIN, TOTP_KEY=TOTP_KEY)
@@ -1246,23 +1519,69 @@ if __name__ == "__main__":
     write_to_order_logs("[STATE] Starting fresh - no previous state loaded")
     write_to_order_logs("[STATE] Will wait for StartTime and check patterns from there")
     
-    # Initialize Market Data API
-    fyres_websocket(FyerSymbolList)
+    # Seed in-memory candles from history, then build them from websocket ticks
+    seed_candle_aggregator()
+    
+    # Initialize Market Data API: our own data socket, or the LTP table of a running market-data
+    # daemon (row "ltp_table,fyers_ltp_table" in FyersCredentials.csv; python SharedLtpTable.py).
+    # Symbols the daemon does not publish get their LTP from REST quotes (see refresh_missing_ltps)
+    ltp_table_name = credentials_dict_fyers.get('ltp_table')
+    if isinstance(ltp_table_name, str) and ltp_table_name.strip():
+        ltp_table = SharedLtpTable.attach(ltp_table_name.strip())
+        threading.Thread(target=ltp_table.follow, args=(handle_tick_message, symbol_index),
+                         name="ltp-table", daemon=True).start()
+        print(f"[STARTUP] Reading LTPs from shared memory '{ltp_table_name.strip()}'")
+    else:
+        fyres_websocket(FyerSymbolList)
+    
+    # Order updates are pushed by the order websocket; the orderbook is only used to reconcile
+    fyres_order_websocket(order_store)
+    reconcile_order_store()
     time.sleep(5)
     
     print(f"[STARTUP] Strategy initialized at {datetime.now()}")
     print(f"[STARTUP] Monitoring {len(result_dict)} symbols")
     
-    while True:
+    dashboard_renderer.start()
+    
+    # Read-only status / metrics endpoint on localhost (row "status_port,0" in FyersCredentials.csv turns it off)
+    status_port = credentials_dict_fyers.get('status_port', STATUS_PORT)
+    try:
+        if int(float(status_port)) > 0:
+            status_server.port = int(float(status_port))
+            status_server.start()
+    except Exception as e:
+        print(f"[STATUS] Status server not started: {e}")
+    
+    if EVENT_DRIVEN_MODE:
+        print("[STARTUP] Event-driven mode: dispatching ticks as they arrive")
         try:
-            main_strategy()
-            time.sleep(1)
+            run_event_engine()
         except KeyboardInterrupt:
             print("\n[SHUTDOWN] Strategy stopped by user")
-            break
-        except Exception as e:
-            print(f"[ERROR] Unexpected error in main loop: {e}")
-            traceback.print_exc()
-            time.sleep(1)
+            dashboard_renderer.stop()
+            status_server.stop()
+            order_gateway.shutdown(wait=True)
+            order_log_writer.close()
+            latency_tracker.close()
+            print_summary(latency_tracker.summary())
+    else:
+        while True:
+            try:
+                main_strategy()
+                time.sleep(1)
+            except KeyboardInterrupt:
+                print("\n[SHUTDOWN] Strategy stopped by user")
+                dashboard_renderer.stop()
+                status_server.stop()
+                order_gateway.shutdown(wait=True)
+                order_log_writer.close()
+                latency_tracker.close()
+                print_summary(latency_tracker.summary())
+                break
+            except Exception as e:
+                print(f"[ERROR] Unexpected error in main loop: {e}")
+                traceback.print_exc()
+                time.sleep(1)
          
     
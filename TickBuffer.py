@@ -0,0 +1,119 @@
+import time
+import numpy as np
+
+# Ticks kept per symbol
+RING_CAPACITY = 4096
+
+
+class TickRing:
+    """
+    Preallocated ring of the latest ticks of one symbol: (exchange_ts, ltp, volume) columns.
+
+    Single writer (the thread applying socket messages) and single range reader (the trading
+    thread). The writer fills the slot and only then advances `written`, so a reader never
+    looks at a slot being written; interval_range() keeps its own cursor, so reading never
+    writes anything the writer uses.
+    """
+
+    __slots__ = ('capacity', 'exchange_ts', 'ltp', 'volume', 'written', 'read_upto')
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self.exchange_ts = np.zeros(capacity, dtype=np.float64)
+        self.ltp = np.zeros(capacity, dtype=np.float64)
+        self.volume = np.zeros(capacity, dtype=np.float64)
+        # Ticks appended so far (slot of tick n is n % capacity)
+        self.written = 0
+        # `written` at the last interval_range()
+        self.read_upto = 0
+
+    def append(self, exchange_ts, ltp, volume=0.0):
+        slot = self.written % self.capacity
+        self.exchange_ts[slot] = exchange_ts
+        self.ltp[slot] = ltp
+        self.volume[slot] = volume
+        self.written += 1
+
+    def window(self, start, end):
+        """Slot index array of ticks start..end-1 (oldest first); the caller keeps end - start <= capacity."""
+        return np.arange(start, end) % self.capacity
+
+    def interval_range(self):
+        """
+        (high, low, count) of the LTPs appended since the previous call, or None if none were.
+        Ticks overwritten before being read (more than capacity in one interval) are not included.
+        """
+        start = self.read_upto
+        self.read_upto = self.written
+        return self.range(start, self.read_upto)
+
+    def range(self, start, end):
+        """(high, low, count) of the LTPs of ticks start..end-1 still buffered, or None if there are none."""
+        start = max(start, end - self.capacity)
+        if end <= start:
+            return None
+        first = start % self.capacity
+        if end - start == 1:
+            price = float(self.ltp[first])
+            return price, price, 1
+        last = (end - 1) % self.capacity
+        if first <= last:
+            prices = self.ltp[first:last + 1]
+        else:
+            prices = self.ltp[self.window(start, end)]
+        return float(prices.max()), float(prices.min()), end - start
+
+    def ticks(self, count=None):
+        """(exchange_ts, ltp, volume) arrays of the latest `count` ticks (all buffered by default), oldest first."""
+        end = self.written
+        available = min(end, self.capacity)
+        count = available if count is None else min(count, available)
+        index = self.window(end - count, end)
+        return self.exchange_ts[index], self.ltp[index], self.volume[index]
+
+
+class TickRingBuffers:
+    """TickRing per symbol, filled from data-socket messages."""
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self.rings = {}
+
+    def ring(self, symbol):
+        ring = self.rings.get(symbol)
+        if ring is None:
+            ring = self.rings[symbol] = TickRing(self.capacity)
+        return ring
+
+    def on_message(self, message, receive_time=None, volume=0):
+        """
+        Append one data-socket message (exchange time when the message carries it, else receive
+        time) with the tick's volume as worked out by CandleBuilder.TickVolume.
+        """
+        symbol = message['symbol']
+        tick_time = message.get('exch_feed_time') or message.get('last_traded_time') or receive_time or time.time()
+        ring = self.rings.get(symbol) or self.ring(symbol)
+        ring.append(tick_time, message['ltp'], volume)
+
+    def interval_range(self, symbol):
+        """(high, low, count) of the symbol's ticks since the previous call, or None."""
+        ring = self.rings.get(symbol)
+        return None if ring is None else ring.interval_range()
+
+    def cursor(self, symbol):
+        """Number of ticks of the symbol appended so far (the index its next tick gets)."""
+        ring = self.rings.get(symbol)
+        return 0 if ring is None else ring.written
+
+    def range_since(self, symbol, start):
+        """
+        (high, low, count) of the symbol's ticks from cursor() value `start` up to the last
+        interval_range() call, or None.
+        """
+        ring = self.rings.get(symbol)
+        return None if ring is None else ring.range(start, ring.read_upto)
+
+    def ticks(self, symbol, count=None):
+        """Buffered (exchange_ts, ltp, volume) arrays of a symbol, or None if it has not ticked."""
+        ring = self.rings.get(symbol)
+        return None if ring is None else ring.ticks(count)
@@ -0,0 +1,185 @@
+import os
+import numpy as np
+import pandas as pd
+
+from TradingSchedule import parse_hhmm
+
+SETTINGS_PATH = 'TradeSettings.csv'
+
+# Column -> (kind, default when the cell is empty); columns without a default must be present
+SCHEMA = {
+    'Symbol': ('str', None),
+    'Timeframe': ('int', None),
+    'EntryLots': ('int', 0),
+    'SL1Points': ('float', 0),
+    'Sl2Points': ('float', 0),
+    'Sl3Points': ('float', 0),
+    'Sl4Points': ('float', 0),
+    'Tgt1Lots': ('int', 0),
+    'Tgt2Lots': ('int', 0),
+    'Tgt3Lots': ('int', 0),
+    'Tgt4Lots': ('int', 0),
+    'T1Percent': ('float', 1.0),
+    'T2Percent': ('float', 1.0),
+    'T3Percent': ('float', 1.0),
+    'T4Percent': ('float', 1.0),
+    'StartTime': ('time', None),
+    'StopTime': ('time', None),
+    'Market': ('str', None),
+    'EntryOffset': ('float', None),
+}
+# Columns a file may leave out (Market is optional, EntryOffset is written by Optimizer.py)
+OPTIONAL_COLUMNS = ('Market', 'EntryOffset')
+
+
+def is_valid_time(value):
+    try:
+        parse_hhmm(value)
+        return True
+    except Exception:
+        return False
+
+
+def load_trade_settings(csv_path=SETTINGS_PATH, entry_offset=None, skip_invalid=False):
+    """
+    Read TradeSettings.csv into result_dict rows, converting and validating whole columns at once.
+
+    Rows with an empty Symbol are skipped; empty cells get the SCHEMA default. Row keys are
+    "<Symbol>_<file row index>" and FyresSymbol is the Symbol with "NSE:" added when it has no exchange.
+
+    Args:
+        csv_path: settings file
+        entry_offset: EntryOffset of rows that leave it empty
+        skip_invalid: leave out rows with an unreadable cell (printing why) instead of failing
+
+    Returns:
+        dict unique_key -> params (file order)
+
+    Raises:
+        ValueError: listing every missing column, and every unreadable cell unless skip_invalid
+            (nothing is loaded)
+    """
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    df.columns = df.columns.str.strip()
+    problems = [f"missing column {column}" for column in SCHEMA if column not in df.columns and column not in OPTIONAL_COLUMNS]
+    if problems:
+        raise ValueError(f"{csv_path}: " + "; ".join(problems))
+
+    symbols = df['Symbol']
+    df = df[symbols.str.strip() != '']
+    # File row index (blank rows included) keeps unique_keys identical to earlier versions
+    index = df.index
+
+    columns = {}
+    invalid_rows = set()
+    for column, (kind, default) in SCHEMA.items():
+        raw = df[column] if column in df.columns else pd.Series('', index=index)
+        stripped = raw.str.strip()
+        empty = stripped == ''
+        if kind in ('int', 'float'):
+            numbers = pd.to_numeric(stripped.where(~empty), errors='coerce')
+            bad = numbers.isna() & ~empty
+            if column == 'EntryOffset' and default is None:
+                default = entry_offset
+            present = numbers.notna().to_numpy()
+            numbers = numbers.to_numpy(dtype=np.float64)
+            # Empty cells get the default (None stays None); ints are truncated like int()
+            values = np.full(len(index), default, dtype=object)
+            values[present] = (numbers[present].astype(np.int64) if kind == 'int' else numbers[present]).tolist()
+            values = pd.Series(values, index=index, dtype=object)
+        elif kind == 'time':
+            bad = ~empty & ~stripped.map(is_valid_time)
+            values = raw.astype(object).where(~empty, default)
+        else:
+            bad = pd.Series(False, index=index)
+            values = raw.astype(object).where(~empty, default)
+        for row in index[bad.to_numpy()]:
+            invalid_rows.add(row)
+            problems.append(f"row {row + 2}: {column}={raw[row]!r} is not a valid {kind}")
+        columns[column] = values
+    if problems and not skip_invalid:
+        raise ValueError(f"{csv_path}: " + "; ".join(problems))
+    for problem in problems:
+        print(f"[SETTINGS] {csv_path} {problem}, row skipped")
+
+    frame = pd.DataFrame(columns, index=index)
+    if invalid_rows:
+        frame = frame.drop(index=sorted(invalid_rows))
+        index = frame.index
+    frame['unique_key'] = symbols[index] + '_' + index.astype(str)
+    frame['FyresSymbol'] = symbols[index].where(symbols[index].str.contains(':', regex=False), 'NSE:' + symbols[index])
+
+    result_dict = {}
+    for params in frame.to_dict('records'):
+        params['FyresLtp'] = None
+        result_dict[params['unique_key']] = params
+    return result_dict
+
+
+def settings_signature(csv_path=SETTINGS_PATH):
+    """(mtime_ns, size) of the settings file, or None if it cannot be read."""
+    try:
+        stat = os.stat(csv_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def row_signature(params):
+    """Everything a row trades with: two rows with the same signature are the same row."""
+    return (params['FyresSymbol'],) + tuple(params.get(column) for column in SCHEMA)
+
+
+def changed_columns(old_params, new_params):
+    return [column for column in SCHEMA if old_params.get(column) != new_params.get(column)]
+
+
+def diff_settings(current, loaded):
+    """
+    Compare the rows being traded with a fresh load_trade_settings() result.
+
+    Rows are matched by content, not by position in the file, so inserting, deleting or
+    reordering rows leaves every other row (and the position it holds) untouched:
+    rows with identical settings are matched first; each row left over is then matched with
+    the left-over row of the same symbol that differs in the fewest columns (an edited row).
+
+    Returns:
+        (added, removed, changed): added is a list of new params, removed a list of current
+        unique_keys, changed a list of (current unique_key, new params, names of changed columns)
+    """
+    unmatched = {}
+    for unique_key, params in current.items():
+        unmatched.setdefault(row_signature(params), []).append(unique_key)
+    left_over = {}
+    for position, params in enumerate(loaded.values()):
+        keys = unmatched.get(row_signature(params))
+        if keys:
+            keys.pop(0)
+        else:
+            left_over.setdefault(params['FyresSymbol'], []).append((position, params))
+
+    # Pair the left-over rows of each symbol, closest first (ties in file order)
+    order = {unique_key: position for position, unique_key in enumerate(current)}
+    pairs = []
+    for keys in unmatched.values():
+        for unique_key in keys:
+            for position, params in left_over.get(current[unique_key]['FyresSymbol'], ()):
+                columns = changed_columns(current[unique_key], params)
+                pairs.append((len(columns), order[unique_key], position, unique_key, params, columns))
+    pairs.sort(key=lambda pair: pair[:3])
+
+    changed = []
+    paired_keys = set()
+    paired_rows = set()
+    for _, _, position, unique_key, params, columns in pairs:
+        if unique_key in paired_keys or position in paired_rows:
+            continue
+        paired_keys.add(unique_key)
+        paired_rows.add(position)
+        changed.append((unique_key, params, columns))
+    changed.sort(key=lambda change: order[change[0]])
+    left_over_keys = {unique_key for keys in unmatched.values() for unique_key in keys}
+    removed = [unique_key for unique_key in current if unique_key in left_over_keys and unique_key not in paired_keys]
+    added = sorted((position, params) for rows in left_over.values() for position, params in rows
+                   if position not in paired_rows)
+    return [params for _, params in added], removed, changed
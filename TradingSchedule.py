@@ -0,0 +1,97 @@
+import time
+
+from CandleBuilder import IST_OFFSET_SECONDS
+
+
+def parse_hhmm(value):
+    """'HH:MM' -> seconds after midnight."""
+    hour, minute = map(int, str(value).split(':'))
+    return hour * 3600 + minute * 60
+
+
+def ist_day_start(epoch_seconds):
+    """Epoch seconds of IST midnight on the day of epoch_seconds."""
+    return (int(epoch_seconds) + IST_OFFSET_SECONDS) // 86400 * 86400 - IST_OFFSET_SECONDS
+
+
+def next_timeframe_boundary(epoch_seconds, timeframe_minutes):
+    """
+    Epoch seconds of the next candle-check instant, matching normalize_time_to_timeframe()
+    (minutes are floored to the timeframe within the hour) plus one timeframe.
+    """
+    hour_start = int(epoch_seconds) - (int(epoch_seconds) + IST_OFFSET_SECONDS) % 3600
+    minute = (int(epoch_seconds) - hour_start) // 60
+    return hour_start + (minute // timeframe_minutes * timeframe_minutes + timeframe_minutes) * 60
+
+
+class RowSchedule:
+    """
+    One TradeSettings row's trading day as epoch seconds, compiled once per IST day.
+
+    The window is StartTime..StopTime inclusive (minute precision); a StopTime before StartTime
+    is an overnight window, open after StartTime or until StopTime on the same day, and squared
+    off at the next StopTime after it opens.
+    A row whose times are missing or unreadable trades all day and is never squared off.
+    """
+
+    __slots__ = ('day_start', 'start', 'stop', 'overnight', 'always_open', 'first_check', 'square_off')
+
+    def __init__(self, start_time, stop_time, now=None):
+        now = time.time() if now is None else now
+        self.day_start = ist_day_start(now)
+        self.start = self.time_today(start_time)
+        self.stop = self.time_today(stop_time)
+        self.always_open = self.start is None or self.stop is None
+        self.overnight = not self.always_open and self.start > self.stop
+        # First signal check one second after StartTime (e.g. 9:30:01)
+        self.first_check = self.start + 1 if self.start is not None else None
+        # StopTime square-off / signal expiry instant (tomorrow's once today's has passed overnight)
+        self.square_off = self.stop
+        self.roll_square_off(now)
+
+    def time_today(self, value):
+        try:
+            return self.day_start + parse_hhmm(value)
+        except Exception:
+            return None
+
+    def roll_square_off(self, now):
+        """
+        Move an overnight row's square-off to the next StopTime after `now` (when its evening
+        session opens, the StopTime that closes it is tomorrow's).
+
+        Returns:
+            bool: True if the square-off instant moved
+        """
+        if not self.overnight or self.square_off >= now:
+            return False
+        self.square_off = self.stop + 86400
+        return True
+
+    def in_window(self, now):
+        """True if epoch second `now` is inside StartTime..StopTime."""
+        if self.always_open:
+            return True
+        if self.overnight:
+            return now >= self.start or now <= self.stop
+        return self.start <= now <= self.stop
+
+
+def report_unreadable_times(params):
+    """Print a row whose StartTime / StopTime cannot be read (it trades all day); once, when it loads."""
+    if params['Schedule'].always_open:
+        print(f"Error parsing time: {params.get('Symbol')} StartTime={params.get('StartTime')!r}, "
+              f"StopTime={params.get('StopTime')!r} (trading all day)")
+
+
+def compile_schedules(result_dict, now=None):
+    """
+    Compile a RowSchedule for every row into params['Schedule'].
+
+    Returns:
+        float: epoch seconds at which the schedules expire (next IST midnight)
+    """
+    now = time.time() if now is None else now
+    for params in result_dict.values():
+        params['Schedule'] = RowSchedule(params.get('StartTime'), params.get('StopTime'), now)
+    return ist_day_start(now) + 86400
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from Backtest import find_signals
+from TradingSchedule import RowSchedule
+
+# 2026-01-05 00:00 IST
+DAY_START = 1767551400
+
+
+def at(hhmm):
+    hour, minute = map(int, hhmm.split(':'))
+    return DAY_START + hour * 3600 + minute * 60
+
+
+def candles():
+    """5-minute bars from 09:15; the 09:20 bar is a BUY signal candle, checked at 09:25."""
+    return {
+        'ts': np.array([at('09:15'), at('09:20'), at('09:25')], dtype=np.int64),
+        'open': np.array([100.0, 92.0, 104.0]),
+        'high': np.array([110.0, 105.0, 104.0]),
+        'low': np.array([95.0, 90.0, 104.0]),
+        'close': np.array([98.0, 104.0, 104.0]),
+    }
+
+
+@pytest.mark.parametrize("stop_time", ["09:24", "09:25", "09:26"])
+def test_backtest_and_live_agree_at_stop_time(stop_time):
+    signal_index, direction = find_signals(candles(), 5, "09:00", stop_time)
+    live = RowSchedule("09:00", stop_time, at('08:00')).in_window(at('09:25'))
+    assert (len(signal_index) == 1) == live
+    assert live == (stop_time != "09:24")
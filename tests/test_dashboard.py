@@ -0,0 +1,71 @@
+import io
+import sys
+
+from Dashboard import DashboardRenderer, format_dashboard
+from PositionRecord import PositionStatus
+
+
+def snapshot(ltp, taken_at=0.0):
+    return (taken_at, (("SBIN-EQ", ltp, PositionStatus.NO_SIGNAL, None, 0, None, None, None, None),))
+
+
+def test_only_changed_lines_are_rewritten():
+    stream = io.StringIO()
+    renderer = DashboardRenderer(stream=stream, capture_output=False)
+    renderer.publish(snapshot(800.0))
+    renderer.render()
+    assert "\x1b[2J" in stream.getvalue()
+
+    stream.truncate(0)
+    stream.seek(0)
+    renderer.publish(snapshot(801.0))
+    renderer.render()
+    written = stream.getvalue()
+    assert "801.00" in written
+    assert "TRADING DASHBOARD" not in written
+    # Nothing new: nothing is drawn
+    stream.truncate(0)
+    stream.seek(0)
+    renderer.render()
+    assert stream.getvalue() == ""
+
+
+def test_prints_while_running_are_drawn_below_the_dashboard(tmp_path):
+    stream = io.StringIO()
+    log_path = str(tmp_path / "Console.log")
+    original = sys.stdout, sys.stderr
+    renderer = DashboardRenderer(refresh_interval=3600, stream=stream, console_log_path=log_path)
+    renderer.start()
+    try:
+        renderer.publish(snapshot(800.0))
+        print("symbol:  NSE:SBIN-EQ")
+        sys.stderr.write("Traceback line\n")
+        renderer.render()
+    finally:
+        renderer.stop()
+    assert (sys.stdout, sys.stderr) == original
+
+    written = stream.getvalue()
+    dashboard_rows = len(format_dashboard(snapshot(800.0)))
+    # The captured lines are positioned right below the dashboard, never printed in between
+    assert f"\x1b[{dashboard_rows + 2};1Hsymbol:  NSE:SBIN-EQ" in written
+    assert f"\x1b[{dashboard_rows + 3};1HTraceback line" in written
+    with open(log_path) as file:
+        logged = file.read()
+    assert "symbol:  NSE:SBIN-EQ" in logged and "Traceback line" in logged
+
+
+def test_new_output_alone_triggers_a_redraw(tmp_path):
+    stream = io.StringIO()
+    renderer = DashboardRenderer(refresh_interval=3600, stream=stream, console_log_path=str(tmp_path / "Console.log"))
+    renderer.start()
+    try:
+        renderer.publish(snapshot(800.0))
+        renderer.render()
+        stream.truncate(0)
+        stream.seek(0)
+        print("[ORDER FILLED] NSE:SBIN-EQ")
+        renderer.render()
+    finally:
+        renderer.stop()
+    assert "[ORDER FILLED] NSE:SBIN-EQ" in stream.getvalue()
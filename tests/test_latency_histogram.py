@@ -0,0 +1,49 @@
+import numpy as np
+
+from LatencyTracker import LatencyHistogram
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for value in range(64):
+        assert histogram.bucket_index(value) == value
+        assert histogram.bucket_upper(value) == value
+
+
+def test_every_value_falls_inside_its_bucket():
+    histogram = LatencyHistogram()
+    previous_upper = 63
+    for index in range(64, 700):
+        upper = histogram.bucket_upper(index)
+        assert upper > previous_upper
+        # The bucket starts right after the previous one ends and holds every value up to upper
+        assert histogram.bucket_index(previous_upper + 1) == index
+        assert histogram.bucket_index(upper) == index
+        previous_upper = upper
+
+
+def test_bucket_width_stays_within_resolution():
+    histogram = LatencyHistogram()
+    for value in (100, 1000, 12345, 10 ** 6, 3600 * 10 ** 6):
+        upper = histogram.bucket_upper(histogram.bucket_index(value))
+        assert value <= upper <= value * (1 + 1 / 32)
+
+
+def test_percentiles_and_summary():
+    histogram = LatencyHistogram()
+    values = np.arange(1, 1001)
+    for value in values:
+        histogram.record(value)
+    assert abs(histogram.percentile(50) - 500) <= 500 / 32
+    assert abs(histogram.percentile(99) - 990) <= 990 / 32
+    assert histogram.percentile(100) == 1000
+    summary = histogram.summary()
+    assert summary['count'] == 1000
+    assert summary['max_us'] == 1000
+    assert summary['mean_us'] == 500.5
+
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(99) == 0
+    assert histogram.summary()['mean_us'] == 0.0
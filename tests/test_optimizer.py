@@ -0,0 +1,50 @@
+import pytest
+
+import Strategy
+from Optimizer import write_settings_row, to_settings_row
+
+HEADER = ("Symbol,Timeframe,EntryLots,SL1Points,Sl2Points,Sl3Points,Sl4Points,Tgt1Lots,Tgt2Lots,"
+          "Tgt3Lots,Tgt4Lots,T1Percent,T2Percent,T3Percent,T4Percent,StartTime,StopTime,Market")
+
+
+def settings_row(symbol, start="09:25", stop="15:15"):
+    return f"{symbol},5,4,5,5,5,5,1,1,1,1,2,3,4,5,{start},{stop},UL"
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    """Write TradeSettings.csv rows; returns (csv_path, Strategy.result_dict loaded from it)."""
+    monkeypatch.chdir(tmp_path)
+
+    def write(rows):
+        (tmp_path / "TradeSettings.csv").write_text("\n".join([HEADER] + rows) + "\n")
+        Strategy.get_user_settings()
+        return "TradeSettings.csv", Strategy.result_dict
+    return write
+
+
+def read_rows(csv_path):
+    return open(csv_path).read().splitlines()[1:]
+
+
+def test_only_the_optimised_row_is_replaced(settings):
+    # Two rows share Symbol and Timeframe; only the second was optimised
+    csv_path, rows = settings([settings_row("SBIN-EQ"), settings_row("SBIN-EQ", start="11:00", stop="14:00")])
+    base_params = rows["SBIN-EQ_1"]
+    write_settings_row(to_settings_row(base_params, {'T1Percent': 9.0}), base_params, csv_path)
+
+    first, second = read_rows(csv_path)
+    assert first == settings_row("SBIN-EQ") + f",{Strategy.ENTRY_OFFSET}"
+    assert second.split(",")[11] == "9.0"
+    assert second.split(",")[15:17] == ["11:00", "14:00"]
+
+
+def test_row_edited_since_loading_is_not_written(settings, tmp_path):
+    csv_path, rows = settings([settings_row("SBIN-EQ"), settings_row("TCS-EQ")])
+    base_params = rows["TCS-EQ_1"]
+    # The row above was deleted meanwhile, so row 1 is gone
+    (tmp_path / csv_path).write_text("\n".join([HEADER, settings_row("TCS-EQ")]) + "\n")
+    with pytest.raises(ValueError, match="no longer TCS-EQ"):
+        write_settings_row(to_settings_row(base_params, {'T1Percent': 9.0}), base_params, csv_path)
+    assert read_rows(csv_path) == [settings_row("TCS-EQ")]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["TradeSettings.csv"]
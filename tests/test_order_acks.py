@@ -0,0 +1,109 @@
+import pytest
+
+import Strategy
+from PositionRecord import PositionRecord, PositionStatus
+
+KEY = "TEST-EQ_0"
+ACCEPTED = {'s': 'ok', 'code': 1101, 'id': 'ORDER1', 'message': 'Order submitted'}
+REJECTED = {'s': 'error', 'code': -50, 'message': 'Invalid order parameters'}
+
+
+class OpenSchedule:
+    """Trading window that is always open, with no StopTime square-off."""
+    square_off = None
+
+    def in_window(self, now):
+        return True
+
+
+@pytest.fixture
+def orders(monkeypatch):
+    """Capture (side, lots, on_ack) of every order the strategy submits instead of sending it."""
+    sent = []
+
+    def submit(side):
+        return lambda symbol, quantity, price, product_type="INTRADAY", on_ack=None, order_tag="tag1": \
+            sent.append((side, quantity, on_ack))
+
+    monkeypatch.setattr(Strategy, 'submit_buy_order', submit('BUY'))
+    monkeypatch.setattr(Strategy, 'submit_sell_order', submit('SELL'))
+    monkeypatch.setattr(Strategy, 'write_to_order_logs', lambda message, flush=False: None)
+    return sent
+
+
+def make_row(state):
+    params = {'Symbol': 'TEST-EQ', 'FyresSymbol': 'NSE:TEST-EQ', 'FyresLtp': 100.0, 'EntryLots': 4,
+              'Tgt1Lots': 1, 'Tgt2Lots': 1, 'Tgt3Lots': 1, 'T1Percent': 1.0, 'T2Percent': 2.0,
+              'T3Percent': 3.0, 'T4Percent': 4.0, 'SL1Points': 5, 'Sl2Points': 5, 'Sl3Points': 5,
+              'Sl4Points': 5, 'Schedule': OpenSchedule()}
+    record = PositionRecord()
+    record.state = state
+    record.direction = 'BUY'
+    record.entry = 100.0
+    record.initial_sl = 90.0
+    record.set_levels({'T1': 110.0, 'T2': 120.0, 'T3': 130.0, 'T4': 140.0,
+                       'SL1': 90.0, 'SL2': 100.0, 'SL3': 110.0, 'SL4': 120.0})
+    record.remaining_lots = 4
+    return params, {KEY: record}
+
+
+def test_rejected_entry_goes_back_to_waiting(orders):
+    params, positions_state = make_row(PositionStatus.WAITING_ENTRY)
+    Strategy.monitor_entry_exit(KEY, params, positions_state)
+    assert positions_state[KEY].state is PositionStatus.ENTRY_PENDING
+
+    side, lots, on_ack = orders[0]
+    on_ack(REJECTED)
+    assert positions_state[KEY].state is PositionStatus.WAITING_ENTRY
+
+
+def test_entry_without_order_id_is_not_a_position(orders):
+    params, positions_state = make_row(PositionStatus.WAITING_ENTRY)
+    Strategy.monitor_entry_exit(KEY, params, positions_state)
+    orders[0][2]({'s': 'ok'})
+    assert positions_state[KEY].state is PositionStatus.WAITING_ENTRY
+
+
+def test_accepted_entry_starts_the_ladder(orders):
+    params, positions_state = make_row(PositionStatus.WAITING_ENTRY)
+    Strategy.monitor_entry_exit(KEY, params, positions_state)
+    orders[0][2](ACCEPTED)
+    assert positions_state[KEY].state is PositionStatus.IN_POSITION
+    assert positions_state[KEY].remaining_lots == 4
+
+
+def test_rejected_target_exit_puts_the_lots_back(orders):
+    params, positions_state = make_row(PositionStatus.IN_POSITION)
+    params['FyresLtp'] = 111.0
+    Strategy.monitor_entry_exit(KEY, params, positions_state)
+    record = positions_state[KEY]
+    assert (record.state, record.remaining_lots, record.targets_hit) == (PositionStatus.T1_HIT, 3, 1)
+
+    side, lots, on_ack = orders[0]
+    assert (side, lots) == ('SELL', 1)
+    on_ack(REJECTED)
+    assert (record.state, record.remaining_lots, record.targets_hit) == (PositionStatus.IN_POSITION, 4, 0)
+
+
+def test_rejected_exit_reopens_a_position_closed_meanwhile(orders):
+    params, positions_state = make_row(PositionStatus.IN_POSITION)
+    params['FyresLtp'] = 111.0
+    Strategy.monitor_entry_exit(KEY, params, positions_state)
+    # Back below SL2 before the T1 exit is answered: the other 3 lots are sold
+    params['FyresLtp'] = 99.0
+    Strategy.monitor_entry_exit(KEY, params, positions_state)
+    record = positions_state[KEY]
+    assert (record.state, record.remaining_lots) == (PositionStatus.EXITED_SL2, 0)
+
+    orders[0][2](REJECTED)
+    orders[1][2](ACCEPTED)
+    assert (record.state, record.remaining_lots) == (PositionStatus.IN_POSITION, 1)
+
+
+def test_accepted_stop_exit_closes_the_position(orders):
+    params, positions_state = make_row(PositionStatus.IN_POSITION)
+    params['FyresLtp'] = 89.0
+    Strategy.monitor_entry_exit(KEY, params, positions_state)
+    orders[0][2](ACCEPTED)
+    record = positions_state[KEY]
+    assert (record.state, record.remaining_lots) == (PositionStatus.EXITED_SL1, 0)
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from OrderGateway import OrderGateway
+
+
+@pytest.fixture
+def gateway():
+    gateway = OrderGateway(max_workers=4)
+    yield gateway
+    gateway.shutdown(wait=True)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_orders_of_one_symbol_are_sent_in_submission_order(gateway):
+    sent = []
+
+    def send(n):
+        def call():
+            # Later orders are quicker, so only the lane keeps them in order
+            time.sleep(0.002 * (5 - n % 5))
+            sent.append(n)
+            return {'s': 'ok', 'id': n}
+        return call
+
+    acks = []
+    for n in range(20):
+        gateway.submit("NSE:SBIN-EQ", send(n), lambda response: acks.append(response['id']))
+    gateway.shutdown(wait=True)
+    assert sent == list(range(20))
+    assert acks == list(range(20))
+    assert gateway.pending_count() == 0
+
+
+def test_symbols_do_not_wait_for_each_other(gateway):
+    release = threading.Event()
+    sent = []
+    gateway.submit("NSE:SLOW-EQ", lambda: release.wait(5))
+    gateway.submit("NSE:FAST-EQ", lambda: sent.append("fast"))
+    wait_for(lambda: sent == ["fast"])
+    # Only the slow order is still in flight
+    wait_for(lambda: gateway.pending_count() == 1)
+    release.set()
+
+
+def test_failed_send_acknowledges_none_and_keeps_the_lane_going(gateway):
+    acks = []
+
+    def fail():
+        raise ConnectionError("broker down")
+
+    gateway.submit("NSE:SBIN-EQ", fail, acks.append)
+    gateway.submit("NSE:SBIN-EQ", lambda: {'s': 'ok', 'id': 'ORDER2'}, acks.append)
+    gateway.shutdown(wait=True)
+    assert acks == [None, {'s': 'ok', 'id': 'ORDER2'}]
+
+
+def test_failing_ack_handler_does_not_stop_later_orders(gateway):
+    sent = []
+
+    def broken_ack(response):
+        raise RuntimeError("handler bug")
+
+    gateway.submit("NSE:SBIN-EQ", lambda: sent.append(1), broken_ack)
+    gateway.submit("NSE:SBIN-EQ", lambda: sent.append(2))
+    gateway.shutdown(wait=True)
+    assert sent == [1, 2]
+
+
+def test_acks_go_through_dispatch():
+    dispatched = []
+    gateway = OrderGateway(max_workers=2, dispatch=lambda on_ack, response: dispatched.append((on_ack, response)))
+    on_ack = lambda response: None
+    gateway.submit("NSE:SBIN-EQ", lambda: {'s': 'ok', 'id': 'ORDER1'}, on_ack)
+    gateway.shutdown(wait=True)
+    assert dispatched == [(on_ack, {'s': 'ok', 'id': 'ORDER1'})]
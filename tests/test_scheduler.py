@@ -0,0 +1,50 @@
+from Scheduler import EventScheduler
+
+
+def test_due_timers_pop_earliest_first():
+    scheduler = EventScheduler()
+    scheduler.schedule(30, 'candle_check', 'B')
+    scheduler.schedule(10, 'candle_check', 'A')
+    scheduler.schedule(20, 'dashboard')
+    assert scheduler.next_due() == 10
+    assert scheduler.pop_due(25) == [(10, 'candle_check', 'A'), (20, 'dashboard', None)]
+    assert scheduler.next_due() == 30
+    assert len(scheduler) == 1
+
+
+def test_rescheduled_timer_fires_once_at_its_new_time():
+    scheduler = EventScheduler()
+    scheduler.schedule(10, 'candle_check', 'A')
+    scheduler.schedule(40, 'candle_check', 'A')
+    # The old heap entry is skipped lazily
+    assert scheduler.next_due() == 40
+    assert scheduler.pop_due(20) == []
+    assert scheduler.pop_due(40) == [(40, 'candle_check', 'A')]
+    assert scheduler.next_due() is None
+
+
+def test_timer_moved_earlier_fires_once():
+    scheduler = EventScheduler()
+    scheduler.schedule(40, 'stop_time', 'A')
+    scheduler.schedule(10, 'stop_time', 'A')
+    assert scheduler.pop_due(50) == [(10, 'stop_time', 'A')]
+    assert len(scheduler) == 0
+
+
+def test_rescheduled_to_the_same_time_fires_once():
+    scheduler = EventScheduler()
+    scheduler.schedule(10, 'candle_check', 'A')
+    scheduler.schedule(10, 'candle_check', 'A')
+    assert scheduler.pop_due(10) == [(10, 'candle_check', 'A')]
+
+
+def test_cancelled_timer_never_fires():
+    scheduler = EventScheduler()
+    scheduler.schedule(10, 'candle_check', 'A')
+    scheduler.schedule(20, 'candle_check', 'B')
+    scheduler.cancel('candle_check', 'A')
+    assert scheduler.next_due() == 20
+    assert scheduler.pop_due(30) == [(20, 'candle_check', 'B')]
+    # Cancelling an unknown timer is harmless
+    scheduler.cancel('candle_check', 'C')
+    assert scheduler.next_due() is None
@@ -0,0 +1,87 @@
+import os
+import time
+import threading
+
+import pytest
+
+from SharedLtpTable import SharedLtpTable, quote_message
+
+NAN = float('nan')
+
+
+@pytest.fixture
+def table():
+    writer = SharedLtpTable.create(f"ltp_test_{os.getpid()}", capacity=16)
+    yield writer
+    writer.close()
+
+
+def test_reader_sees_published_prices(table):
+    slot = table.add_symbol("NSE:SBIN-EQ")
+    table.add_symbol("NSE:TCS-EQ")
+    table.publish(slot, 800.5, 800.4, 800.6, tick_time=1.0, day_volume=2500.0)
+    reader = SharedLtpTable.attach(table.segment.name)
+    try:
+        assert reader.read("NSE:SBIN-EQ") == (800.5, 800.4, 800.6, 1.0, 2500.0)
+        # Registered but not ticked yet
+        assert reader.read("NSE:TCS-EQ") is None
+        assert reader.ltp("NSE:INFY-EQ") is None
+        assert reader.poll_changes() == {"NSE:SBIN-EQ": (800.5, 800.4, 800.6, 1.0, 2500.0)}
+        assert reader.poll_changes() == {}
+    finally:
+        reader.close()
+
+
+def test_slot_left_mid_write_does_not_hang_readers(table):
+    slot = table.add_symbol("NSE:SBIN-EQ")
+    other = table.add_symbol("NSE:TCS-EQ")
+    table.publish(slot, 800.0)
+    table.publish(other, 3500.0)
+    # Writer died between making seq odd and making it even again
+    table.seq[slot] += 1
+
+    started = time.time()
+    assert table.read_slot(slot) is None
+    assert table.read("NSE:SBIN-EQ") is None
+    assert time.time() - started < 1.0
+    assert table.ltp("NSE:TCS-EQ") == 3500.0
+    assert set(table.snapshot()) == {"NSE:TCS-EQ"}
+
+
+def test_writer_heartbeat(table):
+    assert table.writer_alive()
+    table.header['heartbeat'] = time.time() - 60
+    assert not table.writer_alive()
+    table.beat()
+    assert table.writer_alive()
+
+
+def test_tick_keeps_its_exchange_time(table):
+    table.on_message({'symbol': "NSE:SBIN-EQ", 'ltp': 800.0, 'exch_feed_time': 1767600000,
+                      'vol_traded_today': 1200})
+    ltp, bid, ask, tick_time, day_volume = table.read("NSE:SBIN-EQ")
+    assert (ltp, tick_time, day_volume) == (800.0, 1767600000.0, 1200.0)
+
+
+def test_quote_message_leaves_out_unknown_fields():
+    assert quote_message("NSE:SBIN-EQ", (800.0, NAN, NAN, 1767600000.0, 1200.0)) == {
+        'symbol': "NSE:SBIN-EQ", 'ltp': 800.0, 'exch_feed_time': 1767600000, 'vol_traded_today': 1200}
+
+
+def test_follow_delivers_ticks_of_wanted_symbols(table):
+    table.on_message({'symbol': "NSE:SBIN-EQ", 'ltp': 800.0, 'exch_feed_time': 1767600000})
+    table.on_message({'symbol': "NSE:TCS-EQ", 'ltp': 3500.0})
+    reader = SharedLtpTable.attach(table.segment.name)
+    received = []
+    stop = threading.Event()
+
+    def handler(message):
+        received.append(message)
+        stop.set()
+
+    follower = threading.Thread(target=reader.follow, args=(handler, {"NSE:SBIN-EQ"}),
+                                kwargs={'stop_event': stop}, daemon=True)
+    follower.start()
+    follower.join(5)
+    reader.close()
+    assert received == [{'symbol': "NSE:SBIN-EQ", 'ltp': 800.0, 'exch_feed_time': 1767600000}]
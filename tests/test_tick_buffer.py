@@ -0,0 +1,67 @@
+from TickBuffer import TickRing, TickRingBuffers
+
+
+def test_interval_range_reads_each_tick_once():
+    ring = TickRing(capacity=8)
+    assert ring.interval_range() is None
+    ring.append(1.0, 100.0)
+    assert ring.interval_range() == (100.0, 100.0, 1)
+    for n, price in enumerate((105.0, 98.0, 101.0)):
+        ring.append(2.0 + n, price)
+    assert ring.interval_range() == (105.0, 98.0, 3)
+    assert ring.interval_range() is None
+
+
+def test_interval_range_across_the_wrap():
+    ring = TickRing(capacity=4)
+    for n in range(3):
+        ring.append(n, 100.0 + n)
+    ring.interval_range()
+    for n, price in enumerate((90.0, 120.0, 95.0)):
+        ring.append(10 + n, price)
+    assert ring.interval_range() == (120.0, 90.0, 3)
+
+
+def test_overwritten_ticks_are_left_out():
+    ring = TickRing(capacity=4)
+    for n in range(10):
+        ring.append(n, 200.0 if n == 0 else 100.0 + n)
+    # Only the last 4 ticks are still buffered; the 200.0 was overwritten
+    assert ring.interval_range() == (109.0, 106.0, 4)
+
+
+def test_range_since_a_cursor():
+    buffers = TickRingBuffers(capacity=8)
+    assert buffers.cursor("NSE:SBIN-EQ") == 0
+    for price in (100.0, 130.0):
+        buffers.on_message({'symbol': "NSE:SBIN-EQ", 'ltp': price}, 1.0)
+    cursor = buffers.cursor("NSE:SBIN-EQ")
+    buffers.on_message({'symbol': "NSE:SBIN-EQ", 'ltp': 101.0}, 2.0)
+    assert buffers.interval_range("NSE:SBIN-EQ") == (130.0, 100.0, 3)
+    assert buffers.range_since("NSE:SBIN-EQ", cursor) == (101.0, 101.0, 1)
+    assert buffers.range_since("NSE:SBIN-EQ", buffers.cursor("NSE:SBIN-EQ")) is None
+
+
+def test_ticks_are_oldest_first():
+    ring = TickRing(capacity=4)
+    for n in range(6):
+        ring.append(float(n), 100.0 + n, n)
+    times, prices, volumes = ring.ticks()
+    assert times.tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert prices.tolist() == [102.0, 103.0, 104.0, 105.0]
+    assert ring.ticks(2)[1].tolist() == [104.0, 105.0]
+
+
+def test_buffers_per_symbol():
+    buffers = TickRingBuffers(capacity=8)
+    buffers.on_message({'symbol': 'NSE:SBIN-EQ', 'ltp': 800.0, 'exch_feed_time': 1}, volume=0)
+    buffers.on_message({'symbol': 'NSE:SBIN-EQ', 'ltp': 801.0, 'exch_feed_time': 2}, volume=250)
+    buffers.on_message({'symbol': 'NSE:TCS-EQ', 'ltp': 3500.0}, receive_time=5.0)
+    times, prices, volumes = buffers.ticks('NSE:SBIN-EQ')
+    assert times.tolist() == [1.0, 2.0]
+    assert prices.tolist() == [800.0, 801.0]
+    assert volumes.tolist() == [0.0, 250.0]
+    assert buffers.ticks('NSE:TCS-EQ')[0].tolist() == [5.0]
+    assert buffers.interval_range('NSE:TCS-EQ') == (3500.0, 3500.0, 1)
+    assert buffers.interval_range('NSE:INFY-EQ') is None
+    assert buffers.ticks('NSE:INFY-EQ') is None
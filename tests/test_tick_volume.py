@@ -0,0 +1,59 @@
+import pytest
+
+import FyresIntegration
+from CandleBuilder import CandleAggregator, TickVolume
+from TickBuffer import TickRingBuffers
+
+SYMBOL = "NSE:SBIN-EQ"
+
+
+def message(ltp, day_volume=None, exch_feed_time=1767600000, **fields):
+    fields.update({'symbol': SYMBOL, 'ltp': ltp, 'exch_feed_time': exch_feed_time})
+    if day_volume is not None:
+        fields['vol_traded_today'] = day_volume
+    return fields
+
+
+def test_volume_is_the_day_volume_increase():
+    tick_volume = TickVolume()
+    assert tick_volume.of(message(800.0, 1000)) == 0
+    assert tick_volume.of(message(800.5, 1250)) == 250
+    assert tick_volume.of(message(801.0, 1250)) == 0
+
+
+def test_day_volume_reset_restarts_the_count():
+    tick_volume = TickVolume()
+    tick_volume.of(message(800.0, 5000))
+    # New session (or a reconnect snapshot) reports less than before
+    assert tick_volume.of(message(800.0, 100)) == 0
+    assert tick_volume.of(message(800.0, 160)) == 60
+
+
+def test_last_traded_qty_without_day_volume():
+    tick_volume = TickVolume()
+    assert tick_volume.of(message(800.0, last_traded_qty=15)) == 15
+    assert tick_volume.of(message(800.0)) == 0
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    """handle_tick_message feeding fresh tick buffers and a candle aggregator."""
+    buffers = TickRingBuffers()
+    aggregator = CandleAggregator()
+    aggregator.track(SYMBOL, 1)
+    monkeypatch.setattr(FyresIntegration, 'tick_buffers', buffers)
+    monkeypatch.setattr(FyresIntegration, 'tick_volume', TickVolume())
+    monkeypatch.setattr(FyresIntegration, 'tick_handlers', [aggregator.on_message])
+    monkeypatch.setattr(FyresIntegration, 'tick_queue', None)
+    yield buffers, aggregator
+    FyresIntegration.shared_data.clear()
+
+
+def test_candles_and_tick_buffers_agree_on_volume(feed):
+    buffers, aggregator = feed
+    for day_volume in (1000, 1300, 200, 450):
+        FyresIntegration.handle_tick_message(message(800.0, day_volume))
+    volumes = buffers.ticks(SYMBOL)[2]
+    assert volumes.tolist() == [0.0, 300.0, 0.0, 250.0]
+    bar = aggregator.forming[(SYMBOL, 1)]
+    assert bar[5] == volumes.sum()
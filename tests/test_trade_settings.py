@@ -0,0 +1,228 @@
+from pathlib import Path
+
+import pytest
+
+import Strategy
+from PositionRecord import PositionRecord, PositionStatus
+from TradeSettings import load_trade_settings, diff_settings
+
+HEADER = ("Symbol,Timeframe,EntryLots,SL1Points,Sl2Points,Sl3Points,Sl4Points,Tgt1Lots,Tgt2Lots,"
+          "Tgt3Lots,Tgt4Lots,T1Percent,T2Percent,T3Percent,T4Percent,StartTime,StopTime,Market")
+
+
+def settings_row(symbol, timeframe=5, lots=4, start="09:25", stop="15:15"):
+    return f"{symbol},{timeframe},{lots},5,5,5,5,1,1,1,1,2,3,4,5,{start},{stop},UL"
+
+
+def write_settings(path, rows, header=HEADER):
+    path.write_text("\n".join([header] + rows) + "\n")
+    return str(path)
+
+
+def test_bad_cell_rejects_the_whole_file(tmp_path):
+    csv_path = write_settings(tmp_path / "TradeSettings.csv",
+                              [settings_row("SBIN-EQ"), settings_row("TCS-EQ", start="9.25")])
+    with pytest.raises(ValueError, match="row 3: StartTime='9.25'"):
+        load_trade_settings(csv_path)
+
+
+def test_skip_invalid_leaves_out_only_the_bad_row(tmp_path, capsys):
+    csv_path = write_settings(tmp_path / "TradeSettings.csv",
+                              [settings_row("SBIN-EQ"), settings_row("TCS-EQ", lots="four"), settings_row("INFY-EQ")])
+    rows = load_trade_settings(csv_path, skip_invalid=True)
+    # Keys keep the file row index of the rows that were loaded
+    assert list(rows) == ["SBIN-EQ_0", "INFY-EQ_2"]
+    assert "row 3: EntryLots='four'" in capsys.readouterr().out
+
+
+def test_missing_column_fails_even_when_skipping(tmp_path):
+    csv_path = write_settings(tmp_path / "TradeSettings.csv", ["SBIN-EQ,5"], header="Symbol,Timeframe")
+    with pytest.raises(ValueError, match="missing column EntryLots"):
+        load_trade_settings(csv_path, skip_invalid=True)
+
+
+def test_startup_fails_loudly_without_settings(tmp_path, monkeypatch):
+    csv_path = write_settings(tmp_path / "TradeSettings.csv", ["SBIN-EQ,5"], header="Symbol,Timeframe")
+    monkeypatch.setattr(Strategy, 'SETTINGS_PATH', csv_path)
+    with pytest.raises(ValueError):
+        Strategy.get_user_settings()
+
+
+def test_startup_trades_the_valid_rows(tmp_path, monkeypatch):
+    csv_path = write_settings(tmp_path / "TradeSettings.csv",
+                              [settings_row("SBIN-EQ"), settings_row("TCS-EQ", stop="3pm")])
+    monkeypatch.setattr(Strategy, 'SETTINGS_PATH', csv_path)
+    Strategy.get_user_settings()
+    assert list(Strategy.result_dict) == ["SBIN-EQ_0"]
+    assert Strategy.FyerSymbolList == ["NSE:SBIN-EQ"]
+
+
+def load_rows(tmp_path, rows):
+    return load_trade_settings(write_settings(tmp_path / "TradeSettings.csv", rows))
+
+
+def test_diff_insert_above_a_row_of_the_same_symbol(tmp_path):
+    current = load_rows(tmp_path, [settings_row("SBIN-EQ"), settings_row("TCS-EQ")])
+    loaded = load_rows(tmp_path, [settings_row("SBIN-EQ", lots=2), settings_row("SBIN-EQ"), settings_row("TCS-EQ")])
+    added, removed, changed = diff_settings(current, loaded)
+    assert [params['EntryLots'] for params in added] == [2]
+    assert removed == []
+    assert changed == []
+
+
+def test_diff_delete(tmp_path):
+    current = load_rows(tmp_path, [settings_row("SBIN-EQ", lots=2), settings_row("SBIN-EQ"), settings_row("TCS-EQ")])
+    loaded = load_rows(tmp_path, [settings_row("SBIN-EQ"), settings_row("TCS-EQ")])
+    assert diff_settings(current, loaded) == ([], ["SBIN-EQ_0"], [])
+
+
+def test_diff_reorder(tmp_path):
+    current = load_rows(tmp_path, [settings_row("SBIN-EQ", lots=2), settings_row("TCS-EQ"), settings_row("SBIN-EQ")])
+    loaded = load_rows(tmp_path, [settings_row("SBIN-EQ"), settings_row("TCS-EQ"), settings_row("SBIN-EQ", lots=2)])
+    assert diff_settings(current, loaded) == ([], [], [])
+
+
+def test_diff_edit_is_matched_with_the_closest_row(tmp_path):
+    current = load_rows(tmp_path, [settings_row("SBIN-EQ")])
+    # A new SBIN row inserted above, and the existing row's StopTime edited
+    loaded = load_rows(tmp_path, [settings_row("SBIN-EQ", timeframe=15, lots=9, start="10:00"),
+                                  settings_row("SBIN-EQ", stop="15:00")])
+    added, removed, changed = diff_settings(current, loaded)
+    assert [params['EntryLots'] for params in added] == [9]
+    assert removed == []
+    assert [(unique_key, columns) for unique_key, _, columns in changed] == [("SBIN-EQ_0", ["StopTime"])]
+
+
+@pytest.fixture
+def reload_rows(tmp_path, monkeypatch):
+    """Load rows into Strategy; returns a function that reloads the file with new rows."""
+    csv_path = str(tmp_path / "TradeSettings.csv")
+    monkeypatch.setattr(Strategy, 'SETTINGS_PATH', csv_path)
+    monkeypatch.setattr(Strategy, 'positions_state', {}, raising=False)
+    monkeypatch.setattr(Strategy, 'write_to_order_logs', lambda message, flush=False: None)
+    Strategy.retired_rows.clear()
+
+    def reload(rows, startup=False):
+        write_settings(tmp_path / "TradeSettings.csv", rows)
+        if startup:
+            Strategy.get_user_settings()
+        else:
+            Strategy.apply_settings(load_trade_settings(csv_path, entry_offset=Strategy.ENTRY_OFFSET))
+
+    yield reload
+    Strategy.retired_rows.clear()
+    Strategy.scheduler.clear()
+
+
+def in_position():
+    record = PositionRecord()
+    record.state = PositionStatus.IN_POSITION
+    return record
+
+
+def test_insert_does_not_retire_a_row_in_position(reload_rows):
+    reload_rows([settings_row("SBIN-EQ")], startup=True)
+    Strategy.positions_state["SBIN-EQ_0"] = in_position()
+
+    reload_rows([settings_row("SBIN-EQ", lots=2), settings_row("SBIN-EQ")])
+    assert Strategy.retired_rows == set()
+    assert [params['EntryLots'] for params in Strategy.result_dict.values()] == [4, 2]
+    assert Strategy.symbol_index["NSE:SBIN-EQ"][0] == "SBIN-EQ_0"
+
+
+def test_row_put_back_is_not_traded_twice(reload_rows):
+    reload_rows([settings_row("SBIN-EQ"), settings_row("TCS-EQ")], startup=True)
+    Strategy.positions_state["SBIN-EQ_0"] = in_position()
+
+    reload_rows([settings_row("TCS-EQ")])
+    assert Strategy.retired_rows == {"SBIN-EQ_0"}
+
+    reload_rows([settings_row("SBIN-EQ"), settings_row("TCS-EQ")])
+    assert Strategy.retired_rows == set()
+    assert list(Strategy.result_dict) == ["SBIN-EQ_0", "TCS-EQ_1"]
+
+
+def closed_after_trading():
+    record = PositionRecord()
+    record.state = PositionStatus.EXITED_SL1
+    return record
+
+
+def test_row_that_traded_today_keeps_its_record(reload_rows):
+    reload_rows([settings_row("SBIN-EQ"), settings_row("TCS-EQ")], startup=True)
+    record = closed_after_trading()
+    Strategy.positions_state["SBIN-EQ_0"] = record
+
+    # Removed after its position closed: the record stays until the day rolls over
+    reload_rows([settings_row("TCS-EQ")])
+    assert Strategy.retired_rows == {"SBIN-EQ_0"}
+    reload_rows([settings_row("SBIN-EQ"), settings_row("TCS-EQ")])
+    assert list(Strategy.result_dict) == ["SBIN-EQ_0", "TCS-EQ_1"]
+    assert Strategy.positions_state["SBIN-EQ_0"] is record
+
+    # Dropped at the day rollover once removed again
+    reload_rows([settings_row("TCS-EQ")])
+    Strategy.drop_retired_rows()
+    assert list(Strategy.result_dict) == ["TCS-EQ_1"]
+
+
+def test_row_that_has_not_traded_is_removed(reload_rows):
+    reload_rows([settings_row("SBIN-EQ"), settings_row("TCS-EQ")], startup=True)
+    record = PositionRecord()
+    record.state = PositionStatus.WAITING_ENTRY
+    Strategy.positions_state["SBIN-EQ_0"] = record
+
+    reload_rows([settings_row("TCS-EQ")])
+    assert Strategy.retired_rows == set()
+    assert "SBIN-EQ_0" not in Strategy.positions_state
+
+
+def test_exit_rejected_after_removal_is_still_managed(reload_rows, monkeypatch):
+    reload_rows([settings_row("SBIN-EQ")], startup=True)
+    record = in_position()
+    record.remaining_lots = 4
+    Strategy.positions_state["SBIN-EQ_0"] = record
+    acks = []
+    submit = lambda symbol, quantity, price, product_type="INTRADAY", on_ack=None, order_tag="tag1": acks.append(on_ack)
+    Strategy.submit_row_exit("SBIN-EQ_0", Strategy.result_dict["SBIN-EQ_0"], record, submit, 4, 100.0,
+                             PositionStatus.EXITED_SL1)
+
+    # Removed while the exit is in flight, then the broker rejects it
+    reload_rows([])
+    acks[0]({'s': 'error', 'message': 'rejected'})
+    assert record.state is PositionStatus.IN_POSITION
+    Strategy.drop_retired_rows()
+    assert "SBIN-EQ_0" in Strategy.result_dict
+    assert Strategy.positions_state["SBIN-EQ_0"] is record
+
+
+def test_reload_waits_until_the_file_settles(reload_rows, monkeypatch):
+    reload_rows([settings_row("SBIN-EQ")], startup=True)
+    started = []
+    monkeypatch.setattr(Strategy, 'SETTINGS_RELOAD', True)
+    monkeypatch.setattr(Strategy, 'settings_reload_running', False)
+    monkeypatch.setattr(Strategy, 'load_settings_in_background', started.append)
+    Strategy.settings_signature_loaded = Strategy.settings_signature(Strategy.SETTINGS_PATH)
+
+    write_settings(Path(Strategy.SETTINGS_PATH), [settings_row("SBIN-EQ"), settings_row("TCS-EQ")])
+    Strategy.check_settings_file()
+    assert not Strategy.settings_reload_running
+    Strategy.check_settings_file()
+    assert Strategy.settings_reload_running
+    monkeypatch.setattr(Strategy, 'settings_reload_running', False)
+
+
+def test_file_changed_while_read_is_not_applied(reload_rows, monkeypatch):
+    reload_rows([settings_row("SBIN-EQ")], startup=True)
+    signature = Strategy.settings_signature(Strategy.SETTINGS_PATH)
+
+    def load_while_writing(csv_path, entry_offset=None):
+        rows = load_trade_settings(csv_path)
+        with open(csv_path, "a") as file:
+            file.write(settings_row("TCS-EQ") + "\n")
+        return rows
+
+    monkeypatch.setattr(Strategy, 'load_trade_settings', load_while_writing)
+    monkeypatch.setattr(Strategy, 'settings_reload_running', True)
+    Strategy.load_settings_in_background(signature)
+    assert Strategy.engine_queue.get_nowait() == ("settings", None)
@@ -0,0 +1,82 @@
+from TradingSchedule import RowSchedule, ist_day_start, next_timeframe_boundary
+
+# 2026-01-05 00:00 IST
+DAY_START = 1767551400
+
+
+def at(hhmm, seconds=0):
+    hour, minute = map(int, hhmm.split(':'))
+    return DAY_START + hour * 3600 + minute * 60 + seconds
+
+
+def test_day_start_is_ist_midnight():
+    assert ist_day_start(at('00:00')) == DAY_START
+    assert ist_day_start(at('23:59', 59)) == DAY_START
+    assert ist_day_start(at('23:59', 60)) == DAY_START + 86400
+
+
+def test_normal_window_is_inclusive():
+    schedule = RowSchedule('09:25', '15:15', at('08:00'))
+    assert not schedule.overnight
+    assert not schedule.in_window(at('09:24', 59))
+    assert schedule.in_window(at('09:25'))
+    assert schedule.in_window(at('15:15'))
+    assert not schedule.in_window(at('15:15', 1))
+    assert schedule.first_check == at('09:25', 1)
+    assert schedule.square_off == at('15:15')
+
+
+def test_overnight_window():
+    schedule = RowSchedule('22:00', '02:00', at('12:00'))
+    assert schedule.overnight
+    assert schedule.in_window(at('23:30'))
+    assert schedule.in_window(at('01:00'))
+    assert schedule.in_window(at('02:00'))
+    assert not schedule.in_window(at('02:00', 1))
+    assert not schedule.in_window(at('12:00'))
+    assert not schedule.in_window(at('21:59', 59))
+
+
+def test_overnight_square_off_is_the_next_stop_time():
+    # Morning half: today's StopTime
+    assert RowSchedule('22:00', '02:00', at('01:00')).square_off == at('02:00')
+    # Evening half: tomorrow's, so the row is not squared off as it starts
+    schedule = RowSchedule('22:00', '02:00', at('22:30'))
+    assert schedule.square_off == at('02:00') + 86400
+    assert schedule.square_off > at('22:30')
+
+
+def test_overnight_square_off_rolls_when_the_session_opens():
+    # Compiled at midnight: today's StopTime closes the session that opened yesterday
+    schedule = RowSchedule('22:00', '02:00', at('00:00'))
+    assert not schedule.roll_square_off(at('02:00'))
+    assert schedule.roll_square_off(at('22:00'))
+    assert schedule.square_off == at('02:00') + 86400
+    assert not RowSchedule('09:25', '15:15', at('08:00')).roll_square_off(at('16:00'))
+
+
+def test_unreadable_times_trade_all_day():
+    schedule = RowSchedule(None, '15:15', at('08:00'))
+    assert schedule.always_open
+    assert schedule.in_window(at('03:00'))
+    assert schedule.square_off == at('15:15')
+
+
+def test_next_timeframe_boundary():
+    assert next_timeframe_boundary(at('09:27', 30), 5) == at('09:30')
+    assert next_timeframe_boundary(at('09:30'), 5) == at('09:35')
+    # Minutes are floored within the hour, so a 7-minute timeframe restarts every hour
+    assert next_timeframe_boundary(at('09:58'), 7) == at('10:03')
+
+
+def test_row_started_in_the_evening_is_not_squared_off_at_once(monkeypatch):
+    import Strategy
+    from Scheduler import EventScheduler
+
+    scheduler = EventScheduler()
+    monkeypatch.setattr(Strategy, 'scheduler', scheduler)
+    monkeypatch.setattr(Strategy, 'positions_state', {}, raising=False)
+    params = {'Timeframe': 5, 'Schedule': RowSchedule('22:00', '02:00', at('22:30'))}
+    Strategy.schedule_row_events("TEST-EQ_0", params, at('22:30'))
+    assert scheduler.pop_due(at('22:30')) == []
+    assert scheduler.pending[('stop_time', "TEST-EQ_0")] == at('02:00') + 86400
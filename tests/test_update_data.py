@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+import pytz
+
+import FyresIntegration
+import Strategy
+from PositionRecord import PositionStatus
+from TickBuffer import TickRingBuffers
+
+SYMBOL = "NSE:TEST-EQ"
+KEY = "TEST-EQ_0"
+
+
+@pytest.fixture
+def row(monkeypatch):
+    """One row trading SYMBOL, with empty tick state."""
+    params = {'FyresSymbol': SYMBOL, 'FyresLtp': None}
+    buffers = TickRingBuffers()
+    # Strategy reads these through `from FyresIntegration import *`
+    monkeypatch.setattr(FyresIntegration, 'tick_buffers', buffers)
+    monkeypatch.setattr(Strategy, 'tick_buffers', buffers)
+    monkeypatch.setattr(Strategy, 'result_dict', {KEY: params}, raising=False)
+    monkeypatch.setattr(Strategy, 'symbol_index', {SYMBOL: [KEY]}, raising=False)
+    monkeypatch.setattr(FyresIntegration, 'tick_queue', None)
+    monkeypatch.setattr(FyresIntegration, 'tick_handlers', [])
+    FyresIntegration.shared_data.clear()
+    Strategy.last_applied_ltp.clear()
+    yield params
+    FyresIntegration.shared_data.clear()
+    Strategy.last_applied_ltp.clear()
+
+
+def tick(ltp):
+    FyresIntegration.handle_tick_message({'symbol': SYMBOL, 'ltp': ltp})
+
+
+def test_interval_high_reaches_row_when_ltp_returns(row):
+    tick(100.0)
+    Strategy.UpdateData()
+    assert row['FyresLtp'] == 100.0
+    row.pop('IntervalHigh')
+    row.pop('IntervalLow')
+
+    # Crosses 110 and comes back between two polls: the LTP looks unchanged
+    tick(110.0)
+    tick(100.0)
+    Strategy.UpdateData()
+    assert row['FyresLtp'] == 100.0
+    assert row['IntervalHigh'] == 110.0
+    assert row['IntervalLow'] == 100.0
+
+
+def test_range_is_not_reused_by_a_later_update(row):
+    tick(100.0)
+    tick(110.0)
+    tick(100.0)
+    Strategy.UpdateData()
+    assert row.pop('IntervalHigh') == 110.0
+    row.pop('IntervalLow')
+
+    # Nothing new: no stale range is applied
+    Strategy.UpdateData()
+    assert 'IntervalHigh' not in row
+
+    tick(101.0)
+    Strategy.UpdateData()
+    assert row['IntervalHigh'] == 101.0
+    assert row['IntervalLow'] == 101.0
+
+
+class OpenSchedule:
+    """Trading window that is always open, with no StopTime square-off."""
+    square_off = None
+
+    def in_window(self, now):
+        return True
+
+
+class NoArchive:
+    def append(self, symbol, timeframe, df, before=None):
+        return 0
+
+
+def buy_signal_candles(symbol, timeframe):
+    """Two completed 5-minute candles: a green one inside a higher one (BUY, signal candle high 105)."""
+    start = datetime.now(pytz.timezone('Asia/Kolkata')).replace(second=0, microsecond=0) - timedelta(hours=1)
+    return pd.DataFrame({'date': [start, start + timedelta(minutes=5)], 'open': [100.0, 92.0],
+                         'high': [110.0, 105.0], 'low': [95.0, 90.0], 'close': [98.0, 104.0],
+                         'volume': [1000, 1000]})
+
+
+def test_new_signal_drops_the_range_from_before_it(row, monkeypatch):
+    row.update({'Symbol': 'TEST-EQ', 'Timeframe': 5, 'EntryLots': 4, 'Market': 'EQ', 'Schedule': OpenSchedule()})
+    monkeypatch.setattr(Strategy, 'get_candles', buy_signal_candles)
+    monkeypatch.setattr(Strategy, 'candle_archive', NoArchive())
+    monkeypatch.setattr(Strategy, 'write_to_order_logs', lambda message, flush=False: None)
+    monkeypatch.setattr(Strategy.latency_tracker, 'record_signal', lambda *args, **kwargs: None)
+    positions_state = {}
+
+    # A spike above the signal candle high, polled before the signal and just after the poll
+    tick(100.0)
+    tick(130.0)
+    Strategy.UpdateData()
+    tick(131.0)
+    assert Strategy.check_signal_for_symbol(KEY, row, positions_state)
+    assert positions_state[KEY].state is PositionStatus.WAITING_ENTRY
+    assert 'IntervalHigh' not in row
+
+    # Only the ticks after the signal make up the row's next range
+    tick(101.0)
+    Strategy.UpdateData()
+    assert (row['IntervalHigh'], row['IntervalLow']) == (101.0, 101.0)
+    assert 'IntervalFrom' not in row